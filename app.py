@@ -4,14 +4,22 @@ from flask_cors import CORS
 from flask_session import Session
 import pyodbc
 import pandas as pd
+import numpy as np
 import os
 import json
+import sys
+import pickle
+import re
+import hashlib
+import zlib
 import decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
-import shutil
 import tempfile
+import threading
 import time
+import atexit
+from collections import OrderedDict
 
 app = Flask(__name__)
 app.secret_key = 'vav-data-merger-secret-key-2025'  # Required for Flask sessions
@@ -127,75 +135,619 @@ def safe_string_convert(value):
         except:
             return None
 
-def get_mdb_connection(file_path):
-    """Create a connection to the Access database with error handling"""
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Database file not found: {file_path}")
-    
-    abs_path = os.path.abspath(file_path)
-    
-    # Try different connection strings
-    connection_strings = [
+# ODBC connection pool settings. Opening the Jet engine on a network share is far
+# more expensive than the queries we run, so connections are reused per file.
+MDB_POOL_MAX_PER_FILE = 4          # open connections (idle + in use) allowed per file
+MDB_POOL_MAX_IDLE = 8              # idle connections kept across all files
+MDB_POOL_IDLE_TIMEOUT = 5          # seconds before an idle connection (and its .ldb lock) is closed
+MDB_POOL_HEALTH_CHECK_AFTER = 2    # seconds idle before a connection is re-verified
+MDB_POOL_ACQUIRE_TIMEOUT = 30      # seconds to wait for a free connection slot
+MDB_POOL_HEALTH_QUERY = "SELECT COUNT(*) FROM tblSchedule WHERE 1=0"
+
+
+def _mdb_connection_strings(abs_path):
+    """Connection strings to try for an Access database, in order of preference"""
+    return [
         f'DRIVER={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={abs_path};',
         f'DRIVER={{Microsoft Access Driver (*.mdb)}};DBQ={abs_path};',
         f'DRIVER={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={abs_path};PWD=;'
     ]
-    
-    for conn_str in connection_strings:
+
+
+def _mdb_file_signature(abs_path):
+    """Identify the current on-disk version of a file (changes when it is replaced)"""
+    st = os.stat(abs_path)
+    return (st.st_mtime_ns, st.st_size, getattr(st, 'st_ino', 0))
+
+
+class PooledMdbConnection:
+    """Connection checked out of MdbConnectionPool.
+
+    Behaves like a pyodbc connection; close() hands it back to the pool instead of
+    tearing down the Jet engine. Uncommitted work is rolled back on release.
+    """
+
+    def __init__(self, pool, key, conn, generation):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._generation = generation
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self)
+
+    def discard(self):
+        """Close the underlying connection instead of returning it to the pool"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self, healthy=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
         try:
-            return pyodbc.connect(conn_str)
-        except Exception as e:
-            continue
-    
-    raise Exception(f"Failed to connect to database with any driver")
+            self.close()
+        except Exception:
+            pass
+
+
+class MdbConnectionPool:
+    """Bounded, thread-safe pool of ODBC connections keyed by absolute file path.
 
-def read_tw2_data_safe(file_path):
-    """Read TW2 data using safe methods that avoid cursor.columns()"""
+    - Idle connections are closed after ``idle_timeout`` seconds by a timer, so
+      the .ldb lock on a shared TW2 file goes away soon after the last request.
+    - Connections idle longer than ``health_check_after`` are verified before reuse.
+    - The driver string that worked for each file is remembered and tried first.
+    - Idle connections are dropped when the file's mtime/size/inode changes, i.e.
+      the file was replaced on disk by something other than our own connections.
+    """
+
+    def __init__(self, max_per_file=MDB_POOL_MAX_PER_FILE, max_idle=MDB_POOL_MAX_IDLE,
+                 idle_timeout=MDB_POOL_IDLE_TIMEOUT, health_check_after=MDB_POOL_HEALTH_CHECK_AFTER,
+                 acquire_timeout=MDB_POOL_ACQUIRE_TIMEOUT):
+        self.max_per_file = max_per_file
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._cond = threading.Condition()
+        self._idle = {}         # key -> [(conn, signature, last_used), ...] (most recent last)
+        self._in_use = {}       # key -> number of checked-out connections
+        self._generation = {}   # key -> bumped on invalidate() so in-flight connections are dropped
+        self._drivers = {}      # key -> connection string that worked last time
+        self._stats = {'opened': 0, 'reused': 0, 'closed': 0, 'invalidated': 0}
+        self._reaper = None     # threading.Timer closing expired idle connections
+
+    def acquire(self, file_path):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Database file not found: {file_path}")
+
+        key = os.path.abspath(file_path)
+        signature = _mdb_file_signature(key)
+        deadline = time.monotonic() + self.acquire_timeout
+        to_close = []
+        candidate = None
+
+        with self._cond:
+            while True:
+                to_close.extend(self._prune_locked(time.monotonic()))
+                idle = self._idle.get(key, [])
+                while idle:
+                    conn, conn_signature, last_used = idle.pop()
+                    if conn_signature != signature:
+                        self._stats['invalidated'] += 1
+                        to_close.append(conn)
+                        continue
+                    candidate = (conn, last_used)
+                    break
+
+                if candidate or self._open_count_locked(key) < self.max_per_file:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    generation = self._generation.get(key, 0)
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._close_all(to_close)
+                    raise Exception(f"Timed out waiting for a database connection to {key}")
+                self._cond.wait(remaining)
+
+        self._close_all(to_close)
+
+        try:
+            conn = None
+            if candidate:
+                conn, last_used = candidate
+                if time.monotonic() - last_used > self.health_check_after and not self._is_healthy(conn):
+                    self._close_all([conn])
+                    conn = None
+                else:
+                    with self._cond:
+                        self._stats['reused'] += 1
+            if conn is None:
+                conn = self._open(key)
+        except Exception:
+            with self._cond:
+                self._in_use[key] -= 1
+                self._cond.notify()
+            raise
+
+        return PooledMdbConnection(self, key, conn, generation)
+
+    def release(self, pooled, healthy=True):
+        key = pooled._key
+        conn = pooled._conn
+        signature = None
+        if healthy:
+            try:
+                conn.rollback()
+                signature = _mdb_file_signature(key)
+            except Exception:
+                healthy = False
+
+        to_close = []
+        with self._cond:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            if healthy and pooled._generation == self._generation.get(key, 0):
+                # Record the signature as of release so our own writes don't look
+                # like an external replacement next time
+                self._idle.setdefault(key, []).append((conn, signature, time.monotonic()))
+                to_close.extend(self._trim_idle_locked())
+                self._schedule_reap_locked()
+            else:
+                to_close.append(conn)
+            self._cond.notify()
+        self._close_all(to_close)
+
+    def invalidate(self, file_path=None):
+        """Drop pooled connections for one file (or all files)"""
+        with self._cond:
+            keys = [os.path.abspath(file_path)] if file_path else list(set(self._idle) | set(self._in_use))
+            to_close = []
+            for key in keys:
+                to_close.extend(conn for conn, _, _ in self._idle.pop(key, []))
+                self._generation[key] = self._generation.get(key, 0) + 1
+            self._stats['invalidated'] += len(to_close)
+            self._cond.notify_all()
+        self._close_all(to_close)
+
+    def close_all(self):
+        with self._cond:
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+        self.invalidate()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'idle': {key: len(conns) for key, conns in self._idle.items() if conns},
+                'in_use': {key: count for key, count in self._in_use.items() if count},
+                'drivers': dict(self._drivers),
+                **self._stats
+            }
+
+    def _open(self, key):
+        connection_strings = _mdb_connection_strings(key)
+        preferred = self._drivers.get(key)
+        if preferred in connection_strings:
+            connection_strings.remove(preferred)
+            connection_strings.insert(0, preferred)
+
+        for conn_str in connection_strings:
+            try:
+                conn = pyodbc.connect(conn_str)
+            except Exception:
+                continue
+            with self._cond:
+                self._drivers[key] = conn_str
+                self._stats['opened'] += 1
+            return conn
+
+        with self._cond:
+            self._drivers.pop(key, None)
+        raise Exception("Failed to connect to database with any driver")
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute(MDB_POOL_HEALTH_QUERY)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _schedule_reap_locked(self):
+        if self._reaper is None:
+            self._reaper = threading.Timer(self.idle_timeout, self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def _reap(self):
+        with self._cond:
+            self._reaper = None
+            expired = self._prune_locked(time.monotonic())
+            if any(self._idle.values()):
+                self._schedule_reap_locked()
+        if expired:
+            logger.debug(f"POOL: closing {len(expired)} idle connection(s)")
+        self._close_all(expired)
+
+    def _open_count_locked(self, key):
+        return len(self._idle.get(key, [])) + self._in_use.get(key, 0)
+
+    def _prune_locked(self, now):
+        expired = []
+        for key, conns in self._idle.items():
+            keep = [entry for entry in conns if now - entry[2] <= self.idle_timeout]
+            expired.extend(entry[0] for entry in conns if now - entry[2] > self.idle_timeout)
+            self._idle[key] = keep
+        return expired
+
+    def _trim_idle_locked(self):
+        entries = sorted(
+            ((entry[2], key, entry) for key, conns in self._idle.items() for entry in conns),
+            key=lambda item: item[0]
+        )
+        excess = len(entries) - self.max_idle
+        evicted = []
+        for _, key, entry in entries[:max(0, excess)]:
+            self._idle[key].remove(entry)
+            evicted.append(entry[0])
+        return evicted
+
+    def _close_all(self, conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if conns:
+            with self._cond:
+                self._stats['closed'] += len(conns)
+
+
+_mdb_pool = MdbConnectionPool()
+atexit.register(_mdb_pool.close_all)
+
+
+def get_mdb_connection(file_path):
+    """Get a pooled connection to the Access database.
+
+    Call close() on the result when done; it returns the connection to the pool.
+    """
+    return _mdb_pool.acquire(file_path)
+
+
+def invalidate_mdb_connections(file_path=None):
+    """Close pooled connections for a file that is about to be replaced"""
+    _mdb_pool.invalidate(file_path)
+
+
+# Rows fetched per fetchmany() call when reading tblSchedule
+TW2_FETCH_BATCH_SIZE = 500
+
+_NULL_TEXT_VALUES = ('nan', 'n/a', '')
+
+
+def _convert_text_value(value):
+    """safe_string_convert for values from a text column"""
+    if value is None:
+        return None
+    if value.__class__ is not str:
+        return safe_string_convert(value)
+    if len(value) <= 3 and value.lower() in _NULL_TEXT_VALUES:
+        return None
+    if value.isascii():
+        return value
+    return value.encode('ascii', 'ignore').decode('ascii')
+
+
+def _convert_exact_value(value):
+    """safe_string_convert for values from an integer or bit column"""
+    if value is None or value.__class__ is int or value.__class__ is bool:
+        return value
+    return safe_string_convert(value)
+
+
+def _convert_float_value(value):
+    """safe_string_convert for values from a floating point column"""
+    if value is None:
+        return None
+    if value.__class__ is float:
+        return None if value != value else value
+    return safe_string_convert(value)
+
+
+def _convert_decimal_value(value):
+    """safe_string_convert for values from a decimal/currency column"""
+    if value is None:
+        return None
+    if value.__class__ is decimal.Decimal:
+        return None if value.is_nan() else float(value)
+    return safe_string_convert(value)
+
+
+def _convert_datetime_value(value):
+    """safe_string_convert for values from a date/time column"""
+    if value is None:
+        return None
+    if value.__class__ is datetime:
+        return value.isoformat()
+    return safe_string_convert(value)
+
+
+_TYPE_CONVERTERS = {
+    str: _convert_text_value,
+    int: _convert_exact_value,
+    bool: _convert_exact_value,
+    float: _convert_float_value,
+    decimal.Decimal: _convert_decimal_value,
+    datetime: _convert_datetime_value,
+}
+
+
+def build_column_converters(description):
+    """Pick a converter for each column from cursor.description type codes.
+
+    Each converter returns exactly what safe_string_convert would for the same
+    value; binary and unrecognised types fall back to safe_string_convert.
+    """
+    return [_TYPE_CONVERTERS.get(desc[1], safe_string_convert) for desc in description]
+
+
+# Converters that return values of these classes unchanged (NaN aside)
+_PASSTHROUGH_CLASSES = {
+    _convert_exact_value: (int, bool),
+    _convert_float_value: (float,),
+}
+
+
+def _convert_column(converter, values):
+    """Apply a converter to one column, doing the work once per distinct value.
+
+    TW2 columns are highly repetitive (and often entirely NULL), so checking the
+    distinct values first lets most columns skip per-cell calls altogether.
+    """
     try:
-        print(f"Attempting to read TW2 data from: {file_path}")
-        
+        distinct = set(values)
+    except TypeError:
+        # Unhashable values (binary columns)
+        return list(map(converter, values))
+
+    distinct.discard(None)
+    if not distinct:
+        return list(values)
+
+    passthrough = _PASSTHROUGH_CLASSES.get(converter)
+    if passthrough and all(v.__class__ in passthrough and v == v for v in distinct):
+        return list(values)
+
+    if converter is _convert_text_value and all(v.__class__ is str for v in distinct):
+        lookup = {v: _convert_text_value(v) for v in distinct}
+        lookup[None] = None
+        return list(map(lookup.__getitem__, values))
+
+    return list(map(converter, values))
+
+
+def convert_rows_columnwise(rows, column_names, converters):
+    """Convert fetched rows into safe dictionaries one column at a time"""
+    if not rows:
+        return []
+
+    converted_columns = []
+    for column_name, converter, values in zip(column_names, converters, zip(*rows)):
+        try:
+            converted_columns.append(_convert_column(converter, values))
+        except Exception:
+            # Fall back to per-cell conversion so one bad value doesn't lose the column
+            column_values = []
+            for value in values:
+                try:
+                    column_values.append(safe_string_convert(value))
+                except Exception as e:
+                    logger.warning(f"Error converting column {column_name}: {e}")
+                    column_values.append(None)
+            converted_columns.append(column_values)
+
+    return [dict(zip(column_names, values)) for values in zip(*converted_columns)]
+
+
+def tw2_file_fingerprint(file_path):
+    """(absolute path, mtime, size) identifying one on-disk version of a TW2 file"""
+    abs_path = os.path.abspath(file_path)
+    st = os.stat(abs_path)
+    return (abs_path, st.st_mtime_ns, st.st_size)
+
+
+class TW2SchemaCache:
+    """tblSchedule column layout per TW2 file fingerprint.
+
+    Filled as a by-product of every data read so writers (save_hw_rows,
+    apply_mapping) can resolve column names without a WHERE 1=0 probe.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # fingerprint -> schema dict
+
+    def get(self, fingerprint):
+        with self._lock:
+            schema = self._entries.get(fingerprint)
+            if schema is not None:
+                self._entries.move_to_end(fingerprint)
+            return schema
+
+    def remember(self, fingerprint, description):
+        columns = [desc[0] for desc in description]
+        schema = {
+            'columns': columns,
+            'types': {desc[0]: desc[1] for desc in description},
+            'lookup': {(name or '').lower(): name for name in columns}
+        }
+        self.store(fingerprint, schema)
+        return schema
+
+    def store(self, fingerprint, schema):
+        with self._lock:
+            # Only the newest version of each file is worth keeping
+            for key in [k for k in self._entries if k[0] == fingerprint[0] and k != fingerprint]:
+                del self._entries[key]
+            self._entries[fingerprint] = schema
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def carry_forward(self, file_path, schema):
+        """Re-key a schema after our own UPDATEs changed the file's mtime (not its layout)"""
+        try:
+            self.store(tw2_file_fingerprint(file_path), schema)
+        except OSError:
+            pass
+
+
+_tw2_schema_cache = TW2SchemaCache()
+
+
+def get_tw2_schema(file_path, cursor=None):
+    """Column layout of tblSchedule for the current version of a file.
+
+    Uses the schema cache; on a miss runs one WHERE 1=0 probe on the given
+    cursor (or a pooled connection).
+    """
+    fingerprint = tw2_file_fingerprint(file_path)
+    schema = _tw2_schema_cache.get(fingerprint)
+    if schema is not None:
+        return schema
+
+    conn = None
+    if cursor is None:
         conn = get_mdb_connection(file_path)
         cursor = conn.cursor()
-        
-        # Method 1: Get column names by running a dummy query
-        print("Getting column information...")
+    try:
         cursor.execute("SELECT * FROM tblSchedule WHERE 1=0")
-        column_names = [desc[0] for desc in cursor.description]
-        print(f"Found {len(column_names)} columns: {column_names[:10]}...")
-        
-        # Method 2: Get record count
-        cursor.execute("SELECT COUNT(*) FROM tblSchedule")
-        record_count = cursor.fetchone()[0]
-        print(f"Found {record_count} records")
-        
-        # Method 3: Get actual data
-        cursor.execute("SELECT * FROM tblSchedule")
-        rows = cursor.fetchall()
-        
-        # Convert to safe dictionaries
-        data = []
-        for row in rows:
-            row_dict = {}
-            for i, column_name in enumerate(column_names):
-                try:
-                    # Safely convert each value
-                    raw_value = row[i]
-                    safe_value = safe_string_convert(raw_value)
-                    row_dict[column_name] = safe_value
-                except Exception as e:
-                    print(f"Error converting column {column_name}: {e}")
-                    row_dict[column_name] = None
-            data.append(row_dict)
+        return _tw2_schema_cache.remember(fingerprint, cursor.description or [])
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def resolve_tw2_column(schema, name):
+    """Actual tblSchedule column name for a case-insensitive match, or None"""
+    if not name:
+        return None
+    return schema['lookup'].get(name.lower())
+
+
+def hw_rows_columns_for(schema):
+    """HW rows columns written by save_hw_rows, resolved once per schema version"""
+    columns = schema.get('hw_rows_columns')
+    if columns is None:
+        lookup = schema['lookup']
+        columns = [lookup.get('hwrowscalc') or 'HWRowsCalc']
+        for name in ('hwrows', 'hwrow'):
+            column = lookup.get(name)
+            if column and column not in columns:
+                columns.append(column)
+        columns = schema['hw_rows_columns'] = tuple(columns)
+    return columns
+
+
+def resolve_tw2_columns(schema, names):
+    """Resolve requested column names case-insensitively.
+
+    Returns (actual column names in request order, requested names not found).
+    """
+    resolved = []
+    missing = []
+    for name in names:
+        column = resolve_tw2_column(schema, name)
+        if column is None:
+            missing.append(name)
+        elif column not in resolved:
+            resolved.append(column)
+    return resolved, missing
+
+
+def read_tw2_data_safe(file_path, batch_size=None, columns=None):
+    """Read TW2 data using safe methods that avoid cursor.columns()
+
+    Pass ``columns`` to read only those columns (resolved case-insensitively;
+    names that don't exist are skipped and listed in 'missing_columns').
+    """
+    try:
+        print(f"Attempting to read TW2 data from: {file_path}")
         
-        conn.close()
+        conn = get_mdb_connection(file_path)
+        try:
+            cursor = conn.cursor()
+
+            fingerprint = tw2_file_fingerprint(file_path)
+            column_names = None
+            missing_columns = []
+            if columns:
+                # Column projection: only transfer and convert what the caller uses
+                column_names, missing_columns = resolve_tw2_columns(get_tw2_schema(file_path, cursor), columns)
+
+            projected = bool(column_names)
+            if projected:
+                cursor.execute(f"SELECT {', '.join(f'[{name}]' for name in column_names)} FROM tblSchedule")
+            else:
+                # A single query: cursor.description supplies the schema and the row
+                # count comes from the fetched result
+                cursor.execute("SELECT * FROM tblSchedule")
+                schema = _tw2_schema_cache.remember(fingerprint, cursor.description)
+                column_names = schema['columns']
+            print(f"Found {len(column_names)} columns: {column_names[:10]}...")
+
+            # Convert each batch column-wise with converters chosen once from the column types
+            converters = build_column_converters(cursor.description)
+            batch_size = batch_size or TW2_FETCH_BATCH_SIZE
+
+            data = []
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                data.extend(convert_rows_columnwise(rows, column_names, converters))
+            record_count = len(data)
+            print(f"Found {record_count} records")
+        finally:
+            conn.close()
         print("Successfully read TW2 data")
         
-        return {
+        result = {
             'success': True,
             'data': data,
             'columns': column_names,
             'row_count': record_count
         }
+        if columns:
+            result['projected'] = projected
+            result['missing_columns'] = missing_columns
+        return result
         
     except Exception as e:
         print(f"Error reading TW2 data: {str(e)}")
@@ -207,31 +759,1019 @@ def read_tw2_data_safe(file_path):
             'error': str(e).encode('ascii', 'ignore').decode('ascii')
         }
 
-def get_project_name_from_tw2(file_path):
-    """Query tblProjectInfo in TW2 database to get project name"""
+# Process-wide cache of parsed TW2 tables. Entries are keyed by the file's
+# path, mtime and size, so an unchanged file is served from memory.
+TW2_CACHE_MAX_BYTES = 256 * 1024 * 1024   # approximate memory budget for cached tables
+TW2_CACHE_VERIFY_CONTENT = False          # also key on a sampled content hash (coarse-mtime shares)
+TW2_CACHE_HASH_SAMPLE_BYTES = 64 * 1024
+
+
+def _fast_file_hash(abs_path, sample_bytes=TW2_CACHE_HASH_SAMPLE_BYTES):
+    """Hash the head, middle and tail of a file; cheap even on large network files"""
+    size = os.path.getsize(abs_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(abs_path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - sample_bytes // 2), max(0, size - sample_bytes)}):
+            f.seek(offset)
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def _estimate_rows_size(rows, sample=50):
+    """Rough in-memory size of a list of row dicts, extrapolated from a sample"""
+    if not rows:
+        return 0
+    step = max(1, len(rows) // sample)
+    sampled = rows[::step][:sample]
+    total = 0
+    for row in sampled:
+        total += sys.getsizeof(row)
+        for key, value in row.items():
+            total += sys.getsizeof(value)
+    return int(total / len(sampled) * len(rows)) + sys.getsizeof(rows)
+
+
+def project_tw2_result(result, columns):
+    """Cut a successful read result down to the requested columns (case-insensitive)"""
+    lookup = {name.lower(): name for name in result['columns']}
+    resolved = []
+    missing = []
+    for name in columns:
+        column = lookup.get(name.lower())
+        if column is None:
+            missing.append(name)
+        elif column not in resolved:
+            resolved.append(column)
+
+    if resolved == result['columns']:
+        data = result['data']
+    else:
+        data = [{column: row.get(column) for column in resolved} for row in result['data']]
+    return {
+        'success': True,
+        'data': data,
+        'columns': resolved,
+        'row_count': len(data),
+        'projected': True,
+        'missing_columns': missing
+    }
+
+
+class TW2ReadCache:
+    """LRU cache of read_tw2_data_safe results under a memory budget.
+
+    Only the newest version of each path is kept. Full-table reads and column
+    projections are cached side by side; a projection is served from any cached
+    read of the same version that covers its columns. Cached rows are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=TW2_CACHE_MAX_BYTES, verify_content=TW2_CACHE_VERIFY_CONTENT):
+        self.max_bytes = max_bytes
+        self.verify_content = verify_content
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (key, covered) -> (result, size); covered is None for full reads
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, file_path):
+        fingerprint = tw2_file_fingerprint(file_path)
+        content_hash = _fast_file_hash(fingerprint[0]) if self.verify_content else None
+        return fingerprint + (content_hash,)
+
+    def get(self, key, columns=None):
+        wanted = frozenset(name.lower() for name in columns) if columns else None
+        with self._lock:
+            match = None
+            for entry_key in ([(key, None)] + [k for k in self._entries if k[0] == key and k[1] is not None]):
+                entry = self._entries.get(entry_key)
+                if entry is None:
+                    continue
+                covered = entry_key[1]
+                if covered is None or (wanted is not None and wanted <= covered):
+                    match = entry_key
+                    break
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            result = self._entries[match][0]
+
+        if columns:
+            return project_tw2_result(result, columns)
+        return result
+
+    def put(self, key, result, columns=None):
+        covered = None
+        if columns and result.get('projected'):
+            covered = frozenset(name.lower() for name in list(result['columns']) + list(result.get('missing_columns', [])))
+        size = _estimate_rows_size(result.get('data') or [])
+        with self._lock:
+            self._discard_path_locked(key[0], keep_key=key)
+            if size > self.max_bytes:
+                return
+            entry_key = (key, covered)
+            if entry_key in self._entries:
+                self._bytes -= self._entries.pop(entry_key)[1]
+            self._entries[entry_key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def write_through(self, old_key, new_key, updates):
+        """Move a version's cached reads to new_key after our own UPDATEs.
+
+        updates maps upper-cased tag -> {column: value}, typed as a fresh read
+        would return them. Patched rows are copied (cached rows are shared); other
+        versions of the path are dropped. Returns the number of entries kept.
+        """
+        with self._lock:
+            carried = []
+            for entry_key in [k for k in self._entries if k[0] == old_key]:
+                result, size = self._entries.pop(entry_key)
+                self._bytes -= size
+                data = result['data']
+                if 'Tag' in result['columns']:
+                    data = [self._patch_row(row, updates.get(str(row.get('Tag')).upper())) for row in data]
+                elif any(column in result['columns'] for patch in updates.values() for column in patch):
+                    continue
+                carried.append(((new_key, entry_key[1]), {**result, 'data': data}, size))
+            self._discard_path_locked(new_key[0])
+            for entry_key, result, size in carried:
+                self._entries[entry_key] = (result, size)
+                self._bytes += size
+            return len(carried)
+
+    def has_version(self, key):
+        with self._lock:
+            return any(entry_key[0] == key for entry_key in self._entries)
+
+    def merge_rows(self, old_key, new_key, tags, rows):
+        """Move a version's cached reads to new_key, swapping in re-read rows for tags.
+
+        rows are full tblSchedule rows re-read for the (case-insensitive) tags: a
+        tag with no row left is dropped, rows for tags not cached yet are appended.
+        Returns the number of entries kept.
+        """
+        touched = {str(tag).upper() for tag in tags}
+        fresh = OrderedDict()
+        for row in rows:
+            fresh.setdefault(str(row.get('Tag')).upper(), []).append(row)
+        fresh_columns = set(rows[0]) if rows else None
+        with self._lock:
+            carried = []
+            for entry_key in [k for k in self._entries if k[0] == old_key]:
+                result, size = self._entries.pop(entry_key)
+                self._bytes -= size
+                columns = result['columns']
+                if 'Tag' not in columns or (fresh_columns is not None and not fresh_columns.issuperset(columns)):
+                    continue
+                data = []
+                placed = set()
+                for row in result['data']:
+                    tag = str(row.get('Tag')).upper()
+                    if tag not in touched:
+                        data.append(row)
+                    elif tag not in placed:
+                        placed.add(tag)
+                        data.extend({column: new_row.get(column) for column in columns} for new_row in fresh.get(tag, ()))
+                for tag, tag_rows in fresh.items():
+                    if tag not in placed:
+                        data.extend({column: new_row.get(column) for column in columns} for new_row in tag_rows)
+                carried.append(((new_key, entry_key[1]), {**result, 'data': data, 'row_count': len(data)}, size))
+            self._discard_path_locked(new_key[0])
+            for entry_key, result, size in carried:
+                self._entries[entry_key] = (result, size)
+                self._bytes += size
+            return len(carried)
+
+    @staticmethod
+    def _patch_row(row, patch):
+        if not patch:
+            return row
+        changed = {column: value for column, value in patch.items() if column in row}
+        return {**row, **changed} if changed else row
+
+    def invalidate(self, file_path=None):
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._discard_path_locked(os.path.abspath(file_path))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _discard_path_locked(self, abs_path, keep_key=None):
+        for entry_key in [k for k in self._entries if k[0][0] == abs_path and k[0] != keep_key]:
+            _, size = self._entries.pop(entry_key)
+            self._bytes -= size
+
+
+_tw2_read_cache = TW2ReadCache()
+
+
+def read_tw2_data_cached(file_path, columns=None):
+    """read_tw2_data_safe with the process-wide cache in front of it.
+
+    The result carries 'cache_hit' so callers can report whether ODBC was touched.
+    """
+    try:
+        key = _tw2_read_cache.make_key(file_path)
+    except OSError as e:
+        return {'success': False, 'error': str(e).encode('ascii', 'ignore').decode('ascii'), 'cache_hit': False}
+
+    cached = _tw2_read_cache.get(key, columns=columns)
+    if cached is not None:
+        return {**cached, 'cache_hit': True}
+
+    result = read_tw2_data_safe(file_path, columns=columns)
+    if result.get('success'):
+        _tw2_read_cache.put(key, result, columns=columns)
+    return {**result, 'cache_hit': False}
+
+
+def invalidate_tw2_cache(file_path=None):
+    """Forget cached TW2 reads after we write to a file"""
+    _tw2_read_cache.invalidate(file_path)
+
+
+# Tags per WHERE [Tag] IN (...) query; keeps Jet well inside its parameter and
+# expression-complexity limits
+TW2_TAG_CHUNK_SIZE = 50
+
+
+def read_tw2_rows_by_tags(cursor, tags, chunk_size=TW2_TAG_CHUNK_SIZE):
+    """Full tblSchedule rows for the given tags, converted like read_tw2_data_safe"""
+    tags = list(dict.fromkeys(str(tag) for tag in tags))
+    data = []
+    for start in range(0, len(tags), chunk_size):
+        chunk = tags[start:start + chunk_size]
+        cursor.execute(f"SELECT * FROM tblSchedule WHERE [Tag] IN ({', '.join('?' * len(chunk))})", chunk)
+        column_names = [desc[0] for desc in cursor.description]
+        data.extend(convert_rows_columnwise(cursor.fetchall(), column_names, build_column_converters(cursor.description)))
+    return data
+
+
+def merge_tw2_cache_rows(file_path, old_key, tags, rows):
+    """Carry cached reads of file_path across our own UPDATEs to the given tags.
+
+    old_key is the cache key taken before writing and rows the re-read rows for
+    tags (read_tw2_rows_by_tags); with rows None the cached reads are dropped
+    instead. A later external change still shows up as a new fingerprint and a
+    full reload.
+    """
+    if rows is None:
+        invalidate_tw2_cache(file_path)
+        return False
     try:
-        if not file_path or not os.path.exists(file_path):
+        new_key = _tw2_read_cache.make_key(file_path)
+    except OSError:
+        invalidate_tw2_cache(file_path)
+        return False
+    _tw2_read_cache.merge_rows(old_key, new_key, tags, rows)
+    return True
+
+
+def refresh_tw2_rows(file_path, old_key, tags):
+    """Re-read only the given tags after a write and merge them into the cached table"""
+    if not _tw2_read_cache.has_version(old_key):
+        return merge_tw2_cache_rows(file_path, old_key, tags, None)
+    rows = None
+    if tags:
+        try:
+            conn = get_mdb_connection(file_path)
+            try:
+                rows = read_tw2_rows_by_tags(conn.cursor(), tags)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"TW2 CACHE: partial re-read of {len(tags)} tags failed ({e}); dropping cached table")
+    else:
+        rows = []
+    return merge_tw2_cache_rows(file_path, old_key, tags, rows)
+
+
+# Python value each cursor.description type code reads back as (see _TYPE_CONVERTERS)
+_WRITE_THROUGH_TYPES = {int: int, float: float, decimal.Decimal: float, str: str}
+
+
+def write_through_tw2_cache(file_path, old_key, schema, updates):
+    """Keep cached reads of file_path valid across our own UPDATEs.
+
+    old_key is the cache key taken before writing; updates maps tag -> {column:
+    value}. Falls back to invalidating when a column's read-back type is unknown.
+    """
+    typed = {}
+    try:
+        for tag, values in updates.items():
+            typed[str(tag).upper()] = {
+                column: None if value is None else _WRITE_THROUGH_TYPES[schema['types'][column]](value)
+                for column, value in values.items()
+            }
+        new_key = _tw2_read_cache.make_key(file_path)
+    except (KeyError, TypeError, ValueError, OSError):
+        invalidate_tw2_cache(file_path)
+        return False
+    _tw2_read_cache.write_through(old_key, new_key, typed)
+    return True
+
+
+# Server-side dataset store. Full tables (TW2 reads, Excel rows) live here,
+# keyed by content hash; the session only keeps a small handle per dataset.
+DATASET_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+DATASET_STORE_MAX_MEMORY_BYTES = 128 * 1024 * 1024   # in-memory LRU budget
+DATASET_STORE_MAX_AGE_DAYS = 7                       # datasets on disk unused this long are removed
+DATASET_STORE_CHUNK_ROWS = 1000                      # rows per pickled chunk in a dataset file
+
+
+class DatasetStore:
+    """Content-addressed store of row lists, in memory (LRU) and on disk.
+
+    Identical tables get the same id, so sessions that loaded the same file
+    share one copy. Rows are loaded lazily and must be treated as read-only.
+
+    A dataset file is a pickled ('dataset', 2, columns) header followed by the
+    rows pickled DATASET_STORE_CHUNK_ROWS at a time, which lets put_stream write
+    a table as it is produced. The id hashes those bytes, so put and put_stream
+    give the same id for the same rows.
+    """
+
+    def __init__(self, directory, max_memory_bytes=DATASET_STORE_MAX_MEMORY_BYTES,
+                 max_age_days=DATASET_STORE_MAX_AGE_DAYS):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()     # dataset id -> (rows, size)
+        self._memory_bytes = 0
+        self._recent_ids = OrderedDict()   # id(rows) -> (dataset id, columns); trusted only while the LRU holds that list
+        os.makedirs(directory, exist_ok=True)
+        self._prune_disk(max_age_days)
+
+    def put(self, rows, columns=None):
+        """Store rows and return a handle: {'id', 'row_count', 'columns'}"""
+        columns = list(columns) if columns is not None else []
+
+        # The TW2 read cache hands out the same list for an unchanged file;
+        # skip re-hashing it. No reference is kept here: the id is only trusted
+        # while the in-memory LRU still holds that exact list, so it can't be reused
+        dataset_id = None
+        with self._lock:
+            recent = self._recent_ids.get(id(rows))
+            if recent is not None and recent[1] == columns:
+                entry = self._memory.get(recent[0])
+                if entry is not None and entry[0] is rows:
+                    dataset_id = recent[0]
+        if dataset_id is None:
+            chunk_rows = DATASET_STORE_CHUNK_ROWS
+            payloads = list(self._payloads(columns, (rows[i:i + chunk_rows] for i in range(0, len(rows), chunk_rows))))
+            file_hash = hashlib.blake2b(digest_size=16)
+            for payload in payloads:
+                file_hash.update(payload)
+            dataset_id = file_hash.hexdigest()
+            path = self._path(dataset_id)
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.writelines(payloads)
+                os.replace(tmp_path, path)
+            with self._lock:
+                self._recent_ids[id(rows)] = (dataset_id, columns)
+                while len(self._recent_ids) > 32:
+                    self._recent_ids.popitem(last=False)
+
+        self._remember(dataset_id, rows)
+        try:
+            os.utime(self._path(dataset_id))
+        except OSError:
+            pass
+        return {'id': dataset_id, 'row_count': len(rows), 'columns': columns}
+
+    def put_stream(self, records, columns=None):
+        """Store rows from an iterable as they arrive; returns the same handle as put.
+
+        Rows are written to disk one chunk at a time and never collected into a
+        list; the table is loaded on its first get.
+        """
+        columns = list(columns) if columns is not None else []
+        row_count = 0
+
+        def chunks():
+            nonlocal row_count
+            chunk = []
+            for row in records:
+                chunk.append(row)
+                if len(chunk) == DATASET_STORE_CHUNK_ROWS:
+                    row_count += len(chunk)
+                    yield chunk
+                    chunk = []
+            if chunk:
+                row_count += len(chunk)
+                yield chunk
+
+        file_hash = hashlib.blake2b(digest_size=16)
+        tmp_path = os.path.join(self.directory, f"stream_{threading.get_ident()}_{os.urandom(4).hex()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                for payload in self._payloads(columns, chunks()):
+                    file_hash.update(payload)
+                    f.write(payload)
+            dataset_id = file_hash.hexdigest()
+            # Same id means same bytes, so replacing an existing copy is harmless
+            os.replace(tmp_path, self._path(dataset_id))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return {'id': dataset_id, 'row_count': row_count, 'columns': columns}
+
+    def get(self, dataset_id):
+        """Rows for a dataset id, or None if it is no longer stored"""
+        with self._lock:
+            entry = self._memory.get(dataset_id)
+            if entry is not None:
+                self._memory.move_to_end(dataset_id)
+                return entry[0]
+
+        try:
+            with open(self._path(dataset_id), 'rb') as f:
+                header = pickle.load(f)
+                if isinstance(header, tuple) and len(header) == 3 and header[0] == 'dataset':
+                    rows = []
+                    while True:
+                        try:
+                            rows.extend(pickle.load(f))
+                        except EOFError:
+                            break
+                else:
+                    _, rows = header   # written as one (columns, rows) pickle
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
             return None
+        self._remember(dataset_id, rows)
+        return rows
 
-        conn = get_mdb_connection(file_path)
-        cursor = conn.cursor()
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes
+            }
 
-        # Query the project name from tblProjectInfo
-        cursor.execute("SELECT [Name] FROM [tblProjectInfo]")
-        result = cursor.fetchone()
+    def _remember(self, dataset_id, rows):
+        size = _estimate_rows_size(rows)
+        with self._lock:
+            if dataset_id in self._memory:
+                self._memory.move_to_end(dataset_id)
+                return
+            if size > self.max_memory_bytes:
+                return
+            self._memory[dataset_id] = (rows, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    @staticmethod
+    def _payloads(columns, chunks):
+        yield pickle.dumps(('dataset', 2, columns), protocol=pickle.HIGHEST_PROTOCOL)
+        for chunk in chunks:
+            yield pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _path(self, dataset_id):
+        return os.path.join(self.directory, f"{dataset_id}.pkl")
+
+    def _prune_disk(self, max_age_days):
+        cutoff = time.time() - max_age_days * 86400
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
 
-        conn.close()
 
-        if result:
-            project_name = result[0]
-            if project_name:
-                return str(project_name).strip()
+_dataset_store = DatasetStore(DATASET_STORE_DIR)
+
+
+def store_session_dataset(name, rows, columns=None):
+    """Put rows in the dataset store and keep only a handle in the session.
+
+    ``name`` is 'tw2', 'excel' or 'updated_tw2'; the handle is stored as
+    session['<name>_dataset'].
+    """
+    handle = _dataset_store.put(rows, columns)
+    session[f'{name}_dataset'] = handle
+    session.pop(f'{name}_data', None)
+    return handle
+
+
+def load_session_dataset(name):
+    """Rows behind a session dataset handle (loaded lazily), or None"""
+    handle = session.get(f'{name}_dataset')
+    if handle:
+        return _dataset_store.get(handle['id'])
+    # Sessions created before the dataset store kept the rows inline
+    return session.get(f'{name}_data')
+
+
+def session_dataset_id(name):
+    """Content id of a session dataset, or None for legacy inline data"""
+    handle = session.get(f'{name}_dataset')
+    return handle.get('id') if handle else None
+
+
+DATA_PAGE_DEFAULT_LIMIT = 100   # rows per page when the client doesn't ask
+DATA_PAGE_MAX_LIMIT = 500       # largest page served, whatever the client asks
+DATA_TAG_COLUMNS = {'tw2': 'Tag', 'updated_tw2': 'Tag', 'excel': 'Unit_No'}
+
+
+def _data_sort_key(value):
+    # Numbers before text, text case-insensitively; None is handled by the caller
+    if isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool):
+        return (0, float(value), '')
+    return (1, 0.0, str(value).lower())
+
+
+def data_page(rows, columns, args, tag_column=None, status_by_tag=None):
+    """One page of a table, filtered, sorted and projected from request-style args.
+
+    args (request.args or a dict) may carry offset, limit, columns (comma
+    separated), sort (a column; prefix '-' for descending), tag_prefix and
+    status (comma separated comparison statuses, matched through status_by_tag,
+    which maps normalized unit tags to statuses). Unknown columns are ignored.
+    The payload size depends on limit and the projection, not on the table size.
+    """
+    try:
+        offset = max(int(args.get('offset', 0)), 0)
+    except (TypeError, ValueError):
+        offset = 0
+    try:
+        limit = min(max(int(args.get('limit', DATA_PAGE_DEFAULT_LIMIT)), 1), DATA_PAGE_MAX_LIMIT)
+    except (TypeError, ValueError):
+        limit = DATA_PAGE_DEFAULT_LIMIT
+
+    known = set(columns)
+    requested = [name.strip() for name in (args.get('columns') or '').split(',') if name.strip()]
+    projection = [name for name in requested if name in known] or list(columns)
+
+    selected = rows
+    tag_prefix = (args.get('tag_prefix') or '').strip().upper()
+    if tag_prefix and tag_column:
+        selected = [row for row in selected if str(row.get(tag_column) or '').upper().startswith(tag_prefix)]
+    statuses = {status.strip().lower() for status in (args.get('status') or '').split(',') if status.strip()}
+    if statuses and tag_column:
+        status_by_tag = status_by_tag or {}
+        selected = [row for row in selected
+                    if (status_by_tag.get(normalize_unit_tag(row.get(tag_column))) or '').lower() in statuses]
+
+    sort = (args.get('sort') or '').strip()
+    descending = sort.startswith('-')
+    sort_column = sort.lstrip('-')
+    if sort_column in known:
+        present = [row for row in selected if row.get(sort_column) is not None]
+        present.sort(key=lambda row: _data_sort_key(row[sort_column]), reverse=descending)
+        # Empty cells go last either way
+        selected = present + [row for row in selected if row.get(sort_column) is None]
+    else:
+        sort = None
+
+    page_rows = selected[offset:offset + limit]
+    return {
+        'data': [{name: row.get(name) for name in projection} for row in page_rows],
+        'columns': projection,
+        'all_columns': list(columns),
+        'offset': offset,
+        'limit': limit,
+        'total': len(selected),
+        'row_count': len(rows),
+        'has_more': offset + len(page_rows) < len(selected),
+        'sort': sort
+    }
+
+
+def session_comparison_statuses():
+    """Normalized unit tag -> status from this session's latest comparison.
+
+    Keyed by the normalized Excel tag each result was matched on (unit_keys is
+    aligned with results); result['unit_tag'] is a display string for padded
+    matches such as V-1-1 -> V-1-01.
+    """
+    state_key = session.get('comparison_state_key')
+    state = _comparison_states.get(state_key) if state_key else None
+    if not state:
+        return {}
+    return {normalized_tag: result.get('status')
+            for (_, _, normalized_tag), result in zip(state['unit_keys'], state['results'])}
+
+
+BACKUP_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backups')
+BACKUP_CHUNK_SIZE = 64 * 1024   # Jet rewrites whole pages in place, so fixed chunks dedup well
+BACKUP_KEEP_LAST = 20           # newest snapshots kept per TW2 file
+BACKUP_KEEP_DAILY = 14          # days for which the last snapshot of the day is kept
+BACKUP_MTIME_SLACK_NS = 2 * 10**9   # coarsest mtime resolution we expect (FAT/SMB shares)
+
+
+class BackupStore:
+    """Snapshots of TW2 files in a local, deduplicated and compressed chunk store.
+
+    Files are split into fixed-size chunks stored once each (zlib-compressed,
+    keyed by blake2b hash) under chunks/, and every snapshot is a small JSON
+    manifest under snapshots/ listing its chunks. Snapshotting a file that has
+    not changed since its last snapshot returns that snapshot without writing.
+
+    A refcount per chunk (how many snapshots use it) and each chunk's stored size
+    are built once, when the manifests are first loaded, and kept up to date
+    afterwards, so retention and stats never walk chunks/.
+    """
+
+    def __init__(self, directory, chunk_size=BACKUP_CHUNK_SIZE,
+                 keep_last=BACKUP_KEEP_LAST, keep_daily=BACKUP_KEEP_DAILY):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self._lock = threading.Lock()
+        self._manifests = None   # snapshot id -> manifest, loaded on first use
+        self._chunk_refs = {}    # chunk id -> number of snapshots using it
+        self._chunk_sizes = {}   # chunk id -> compressed bytes on disk
+        os.makedirs(os.path.join(directory, 'chunks'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'snapshots'), exist_ok=True)
+
+    def snapshot(self, file_path, reason=''):
+        """Back up file_path and return its manifest ('new' is False when deduplicated)"""
+        abs_path = os.path.abspath(file_path)
+        with self._lock:
+            self._load_locked()
+            st = os.stat(abs_path)
+            latest = self._latest_locked(abs_path)
+            # Trust (mtime, size) only if the file was last modified well before that
+            # snapshot was taken; a write in the same timestamp tick could hide otherwise
+            if (latest and latest['mtime_ns'] == st.st_mtime_ns and latest['size'] == st.st_size
+                    and st.st_mtime_ns < latest.get('taken_ns', 0) - BACKUP_MTIME_SLACK_NS):
+                return {**latest, 'new': False}
+            taken_ns = time.time_ns()
+
+            file_hash = hashlib.blake2b(digest_size=16)
+            chunks = []
+            stored_bytes = 0
+            with open(abs_path, 'rb') as f:
+                while True:
+                    block = f.read(self.chunk_size)
+                    if not block:
+                        break
+                    file_hash.update(block)
+                    chunk_id = hashlib.blake2b(block, digest_size=16).hexdigest()
+                    stored_bytes += self._put_chunk_locked(chunk_id, block)
+                    chunks.append(chunk_id)
+            file_hash = file_hash.hexdigest()
+            if latest and latest['file_hash'] == file_hash:
+                # Touched but identical; remember the new fingerprint
+                latest.update(mtime_ns=st.st_mtime_ns, size=st.st_size, taken_ns=taken_ns)
+                self._write_manifest_locked(latest)
+                return {**latest, 'new': False}
+
+            created = datetime.now()
+            manifest = {
+                'id': f"{created.strftime('%Y%m%d_%H%M%S_%f')}_{file_hash[:8]}",
+                'source_path': abs_path,
+                'filename': os.path.basename(abs_path),
+                'created': created.isoformat(timespec='seconds'),
+                'reason': reason,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'taken_ns': taken_ns,
+                'file_hash': file_hash,
+                'stored_bytes': stored_bytes,
+                'chunks': chunks
+            }
+            self._write_manifest_locked(manifest)
+            self._manifests[manifest['id']] = manifest
+            for chunk_id in set(chunks):
+                self._chunk_refs[chunk_id] = self._chunk_refs.get(chunk_id, 0) + 1
+            self._apply_retention_locked(abs_path)
+            return {**manifest, 'new': True}
+
+    def list(self, file_paths=None):
+        """Snapshots (newest first) without their chunk lists, optionally for some files only"""
+        wanted = {os.path.abspath(p) for p in file_paths} if file_paths is not None else None
+        with self._lock:
+            self._load_locked()
+            manifests = [m for m in self._manifests.values() if wanted is None or m['source_path'] in wanted]
+        manifests.sort(key=lambda m: m['id'], reverse=True)
+        return [{k: v for k, v in m.items() if k != 'chunks'} for m in manifests]
+
+    def get(self, snapshot_id):
+        with self._lock:
+            self._load_locked()
+            return self._manifests.get(snapshot_id)
+
+    def restore(self, snapshot_id, target_path=None):
+        """Write a snapshot back over its file (or target_path), verifying every chunk"""
+        manifest = self.get(snapshot_id)
+        if manifest is None:
+            raise KeyError(snapshot_id)
+        target_path = os.path.abspath(target_path or manifest['source_path'])
+        file_hash = hashlib.blake2b(digest_size=16)
+        tmp_path = f"{target_path}.restore_{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk_id in manifest['chunks']:
+                    with open(self._chunk_path(chunk_id), 'rb') as f:
+                        block = zlib.decompress(f.read())
+                    if hashlib.blake2b(block, digest_size=16).hexdigest() != chunk_id:
+                        raise ValueError(f"Backup chunk {chunk_id} is corrupt")
+                    file_hash.update(block)
+                    out.write(block)
+            if file_hash.hexdigest() != manifest['file_hash']:
+                raise ValueError(f"Backup {snapshot_id} does not match its recorded hash")
+            os.replace(tmp_path, target_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return target_path
+
+    def stats(self):
+        with self._lock:
+            self._load_locked()
+            return {
+                'snapshots': len(self._manifests),
+                'logical_bytes': sum(m['size'] for m in self._manifests.values()),
+                'chunks': len(self._chunk_sizes),
+                'stored_bytes': sum(self._chunk_sizes.values())
+            }
+
+    def _load_locked(self):
+        if self._manifests is not None:
+            return
+        self._manifests = {}
+        snapshot_dir = os.path.join(self.directory, 'snapshots')
+        for name in os.listdir(snapshot_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(snapshot_dir, name), 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                self._manifests[manifest['id']] = manifest
+            except (OSError, ValueError, KeyError):
+                continue
+        for manifest in self._manifests.values():
+            for chunk_id in set(manifest['chunks']):
+                self._chunk_refs[chunk_id] = self._chunk_refs.get(chunk_id, 0) + 1
+        # The one walk of chunks/: record sizes and drop chunks left behind by a
+        # snapshot that failed before its manifest was written
+        chunk_dir = os.path.join(self.directory, 'chunks')
+        for prefix in os.listdir(chunk_dir):
+            for name in os.listdir(os.path.join(chunk_dir, prefix)):
+                path = os.path.join(chunk_dir, prefix, name)
+                if name in self._chunk_refs:
+                    self._chunk_sizes[name] = os.path.getsize(path)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def _latest_locked(self, abs_path):
+        latest = None
+        for manifest in self._manifests.values():
+            if manifest['source_path'] == abs_path and (latest is None or manifest['id'] > latest['id']):
+                latest = manifest
+        return latest
+
+    def _chunk_path(self, chunk_id):
+        return os.path.join(self.directory, 'chunks', chunk_id[:2], chunk_id)
+
+    def _put_chunk_locked(self, chunk_id, block):
+        """Store a chunk unless present; returns the compressed bytes written"""
+        if chunk_id in self._chunk_sizes:
+            return 0
+        path = self._chunk_path(chunk_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = zlib.compress(block, 6)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._chunk_sizes[chunk_id] = len(payload)
+        return len(payload)
+
+    def _write_manifest_locked(self, manifest):
+        path = os.path.join(self.directory, 'snapshots', f"{manifest['id']}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _apply_retention_locked(self, abs_path):
+        """Keep the newest keep_last snapshots of a file plus the last one of each recent day"""
+        snapshots = sorted((m for m in self._manifests.values() if m['source_path'] == abs_path),
+                           key=lambda m: m['id'], reverse=True)
+        keep = {m['id'] for m in snapshots[:self.keep_last]}
+        cutoff = (datetime.now().date() - timedelta(days=self.keep_daily - 1)).isoformat()
+        days_seen = set()
+        for manifest in snapshots:
+            day = manifest['created'][:10]
+            if day >= cutoff and day not in days_seen:
+                days_seen.add(day)
+                keep.add(manifest['id'])
+        expired = [m['id'] for m in snapshots if m['id'] not in keep]
+        if not expired:
+            return
+        for snapshot_id in expired:
+            manifest = self._manifests.pop(snapshot_id)
+            try:
+                os.remove(os.path.join(self.directory, 'snapshots', f"{snapshot_id}.json"))
+            except OSError:
+                pass
+            # Drop chunks no remaining snapshot refers to
+            for chunk_id in set(manifest['chunks']):
+                self._chunk_refs[chunk_id] -= 1
+                if self._chunk_refs[chunk_id] > 0:
+                    continue
+                del self._chunk_refs[chunk_id]
+                self._chunk_sizes.pop(chunk_id, None)
+                try:
+                    os.remove(self._chunk_path(chunk_id))
+                except OSError:
+                    pass
+
+
+_backup_store = BackupStore(BACKUP_STORE_DIR)
+
+
+def backup_tw2_file(file_path, reason):
+    """Snapshot a TW2 file into the backup store before we write to it"""
+    manifest = _backup_store.snapshot(file_path, reason)
+    logger.info(f"BACKUP: {manifest['id']} for {manifest['filename']} "
+                f"({'new, ' + str(manifest['stored_bytes']) + ' bytes stored' if manifest['new'] else 'unchanged'})")
+    return manifest
+
+
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal')
+
+
+class JournalJSONEncoder(CustomJSONEncoder):
+    """CustomJSONEncoder that keeps Decimal (currency) values exact for undo"""
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class ChangeJournal:
+    """Append-only record of the cells our writes changed, for undo.
+
+    One JSON-lines file per TW2 file; each line is a batch:
+    {'batch', 'ts', 'source', 'path', 'undoes', 'cells': [[tag, column, before, after], ...]}.
+    Lines are never rewritten, so an undo is itself recorded as a new batch.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, file_path, source, cells, undoes=None):
+        """Append a batch of (tag, column, before, after) cells; returns the batch or None if empty"""
+        if not cells:
+            return None
+        abs_path = os.path.abspath(file_path)
+        now = datetime.now()
+        batch = {
+            'batch': f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{os.urandom(3).hex()}",
+            'ts': now.isoformat(timespec='seconds'),
+            'source': source,
+            'path': abs_path,
+            'undoes': undoes,
+            'cells': [list(cell) for cell in cells]
+        }
+        line = json.dumps(batch, cls=JournalJSONEncoder, ensure_ascii=True)
+        with self._lock:
+            with open(self._path(abs_path), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return batch
+
+    def batches(self, file_path):
+        """Batches recorded for a file, oldest first"""
+        batches = []
+        try:
+            with open(self._path(os.path.abspath(file_path)), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        batches.append(json.loads(line))
+                    except ValueError:
+                        continue   # a torn last line from an interrupted append
+        except OSError:
+            pass
+        return batches
+
+    def _path(self, abs_path):
+        return os.path.join(self.directory, hashlib.blake2b(abs_path.encode('utf-8'), digest_size=8).hexdigest() + '.jsonl')
+
+
+_change_journal = ChangeJournal(JOURNAL_DIR)
+
+
+def journal_cells(groups, written_groups, before_values):
+    """Net (tag, column, before, after) for the cells a write plan actually wrote.
+
+    groups and written_groups are execute_write_plan's input and per-group result,
+    so rows of a group that failed are left out; before comes from the raw_values
+    index read_tw2_current_values filled before writing. A cell written more than
+    once keeps its last value (groups run in order); cells whose value ends up
+    where it started are dropped.
+    """
+    cells = OrderedDict()
+    for key, entries in groups.items():
+        done = written_groups.get(key, ())
+        for index, params in entries:
+            if index not in done:
+                continue
+            tag = params[-1]
+            current = before_values.get(str(tag).upper()) or {}
+            for column, value in zip(key[1], params):
+                if (tag, column) in cells:
+                    cells[(tag, column)][1] = value
+                else:
+                    cells[(tag, column)] = [current.get(column), value]
+    return [(tag, column, before, after) for (tag, column), (before, after) in cells.items()
+            if not tw2_values_equal(before, after)]
+
+
+def session_tw2_paths():
+    """Absolute paths of the TW2 files this session works on"""
+    paths = []
+    for key in ('tw2_file', 'original_tw2_path', 'updated_tw2_path'):
+        if session.get(key):
+            path = os.path.abspath(session[key])
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+PROJECT_NAME_CACHE_MAX = 64   # TW2 file versions whose project name is remembered
+
+_project_names = OrderedDict()   # tw2_file_fingerprint -> project name (or None)
+_project_names_lock = threading.Lock()
+
 
+def get_project_name_from_tw2(file_path):
+    """Project name from tblProjectInfo, queried once per TW2 file version"""
+    if not file_path or not os.path.exists(file_path):
+        return None
+    try:
+        fingerprint = tw2_file_fingerprint(file_path)
+    except OSError:
         return None
 
+    with _project_names_lock:
+        if fingerprint in _project_names:
+            _project_names.move_to_end(fingerprint)
+            return _project_names[fingerprint]
+
+    try:
+        project_name = _query_project_name(file_path)
     except Exception as e:
+        # Not cached: a transient ODBC error shouldn't stick to this file version
         print(f"Error querying project name from TW2: {str(e)}")
         return None
+    with _project_names_lock:
+        _project_names[fingerprint] = project_name
+        while len(_project_names) > PROJECT_NAME_CACHE_MAX:
+            _project_names.popitem(last=False)
+    return project_name
+
+
+def _query_project_name(file_path):
+    """Query tblProjectInfo in TW2 database to get project name (None if it has none)"""
+    conn = get_mdb_connection(file_path)
+    try:
+        cursor = conn.cursor()
+
+        # Query the project name from tblProjectInfo
+        cursor.execute("SELECT [Name] FROM [tblProjectInfo]")
+        result = cursor.fetchone()
+    finally:
+        conn.close()
+
+    if result:
+        project_name = result[0]
+        if project_name:
+            return str(project_name).strip()
+
+    return None
 
 def clean_size_value(value):
     """Remove inch marks (") from size values and add zero-padding for numeric sizes"""
@@ -240,7 +1780,11 @@ def clean_size_value(value):
     
     # Convert to string and remove all double quotes
     cleaned = str(value).replace('"', '')
-    
+    return _normalize_size_text(cleaned)
+
+
+def _normalize_size_text(cleaned):
+    """Zero-pad a quote-free size string if it is a simple number"""
     # Check if this is a simple numeric size that needs zero-padding
     # Handle both integer and string representations
     try:
@@ -259,6 +1803,72 @@ def clean_size_value(value):
         # Just return cleaned (without quotes)
         return cleaned
 
+
+def clean_size_series(series):
+    """clean_size_value over a whole column.
+
+    Quote stripping is a vectorized string operation; the numeric check runs
+    once per distinct size (a schedule only has a handful).
+    """
+    result = series.astype(object)
+    present = series.notna()
+    if not present.any():
+        return result
+    text = series[present].astype(str).str.replace('"', '', regex=False)
+    lookup = {value: _normalize_size_text(value) for value in text.unique()}
+    result = result.copy()
+    result[present] = text.map(lookup)
+    return result
+
+
+def _safe_convert_series(series):
+    """safe_string_convert applied to a whole column; returns an object ndarray"""
+    values = series.to_numpy(dtype=object)
+    converted = np.full(len(values), None, dtype=object)
+    present = ~series.isna().to_numpy()
+    if not present.any():
+        return converted
+
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype) \
+            or pd.api.types.is_float_dtype(series.dtype):
+        converted[present] = values[present]
+        return converted
+
+    # Strings: 'nan'/'n/a'/'' become None, the rest are reduced to ASCII
+    is_text = np.fromiter((value.__class__ is str for value in values), dtype=bool, count=len(values)) & present
+    if is_text.any():
+        text = pd.Series(values[is_text], dtype=object)
+        null_text = text.str.lower().isin(_NULL_TEXT_VALUES).to_numpy()
+        non_ascii = np.fromiter((not value.isascii() for value in text), dtype=bool, count=len(text))
+        if non_ascii.any():
+            text[non_ascii] = text[non_ascii].str.encode('ascii', 'ignore').str.decode('ascii')
+        cleaned = text.to_numpy(dtype=object, copy=True)
+        cleaned[null_text] = None
+        converted[is_text] = cleaned
+
+    # Everything else (numbers mixed into text columns, dates, ...) goes through
+    # safe_string_convert; there are few of these in a schedule
+    other = present & ~is_text
+    if other.any():
+        converted[other] = [safe_string_convert(value) for value in values[other]]
+    return converted
+
+
+def excel_frame_to_records(df):
+    """Convert a cleaned Excel DataFrame to JSON-safe records, column by column.
+
+    Produces the same values as calling safe_string_convert on every cell of
+    df.iterrows(), without boxing each row into a Series.
+    """
+    converted = pd.DataFrame(
+        {position: _safe_convert_series(df.iloc[:, position]) for position in range(df.shape[1])},
+        index=range(len(df)),
+        dtype=object
+    )
+    converted.columns = df.columns
+    return converted.to_dict('records')
+
+
 def normalize_header_text(text):
     """Clean and normalize header text"""
     if text is None or pd.isna(text):
@@ -311,33 +1921,37 @@ def normalize_hw_rows_value(value):
     except Exception:
         return None
 
-def combine_multi_row_headers(df, header_rows=2, title_row_offset=0):
-    """Combine multi-row headers into single header row
-    
+def combine_header_rows(rows, header_rows=2, title_row_offset=0, width=None):
+    """Combine multi-row headers into a single header row, from plain lists
+
     Args:
-        df: DataFrame with raw Excel data
+        rows: Leading sheet rows as lists, blank cells as None
         header_rows: Number of header rows to combine (default 2)
         title_row_offset: Number of title rows to skip before headers (default 0)
+        width: Number of columns (default: longest row)
     """
-    headers = []
-
-    start_row = title_row_offset
-    end_row = title_row_offset + header_rows
-    header_data = df.iloc[start_row:end_row]
+    header_data = rows[title_row_offset:title_row_offset + header_rows]
+    if not header_data:
+        raise ValueError(f'No header row at sheet row {title_row_offset + 1}')
+    if width is None:
+        width = max(len(row) for row in rows)
+    header_data = [(list(row) + [None] * width)[:width] for row in header_data]
 
     use_second_row = header_rows > 1 and len(header_data) > 1
     if use_second_row:
-        second_row_values = [val for val in header_data.iloc[1].tolist() if not pd.isna(val)]
+        second_row_values = [val for val in header_data[1] if not _is_blank_cell(val)]
         if second_row_values:
             header_like_count = sum(1 for val in second_row_values if is_probably_header_value(val))
             if header_like_count < len(second_row_values) * 0.5:
                 use_second_row = False
 
-    for col_idx in range(len(df.columns)):
-        row1_val = normalize_header_text(header_data.iloc[0, col_idx]) if not pd.isna(header_data.iloc[0, col_idx]) else ""
+    headers = []
+    for col_idx in range(width):
+        row1_cell = header_data[0][col_idx]
+        row1_val = normalize_header_text(row1_cell) if not _is_blank_cell(row1_cell) else ""
         row2_val = ""
-        if use_second_row and not pd.isna(header_data.iloc[1, col_idx]):
-            row2_val = normalize_header_text(header_data.iloc[1, col_idx])
+        if use_second_row and not _is_blank_cell(header_data[1][col_idx]):
+            row2_val = normalize_header_text(header_data[1][col_idx])
 
         if row1_val and row2_val:
             combined = f"{row1_val}_{row2_val}"
@@ -349,127 +1963,408 @@ def combine_multi_row_headers(df, header_rows=2, title_row_offset=0):
             combined = f"Column_{col_idx + 1}"
 
         headers.append(combined)
-    
+
     return headers
 
-def map_excel_headers_to_standard(excel_headers):
-    """Map Excel headers to our standard field names"""
-    # Define mapping from combined Excel headers to standard names
-    header_mapping = {
-        # Unit identification
-        'UNIT NO.': 'Unit_No',
-        'UNIT_NO.': 'Unit_No', 
-        'UNIT NO': 'Unit_No',
-        'UNIT_NO': 'Unit_No',
-        
-        # Manufacturer
-        'MANUFACTURER and MODEL NO.': 'Manufacturer_Model',
-        'MANUFACTURER & MODEL NO.': 'Manufacturer_Model',
-        'MANUFACTURER MODEL NO.': 'Manufacturer_Model',
-        'MANUFACTURER and MODEL': 'Manufacturer_Model',
-        
-        # Unit size
-        'UNIT SIZE': 'Unit_Size',
-        'UNIT_SIZE': 'Unit_Size',
-        
-        # Dimensions
-        'W x L x H': 'Dimensions',
-        'Wx Lx H': 'Dimensions',
-        'DIMENSIONS': 'Dimensions',
-        
-        # Inlet size
-        'INLET SIZE': 'Inlet_Size',
-        'INLET_SIZE': 'Inlet_Size',
-        
-        # Outlet size
-        'OUTLET SIZE': 'Outlet_Size',
-        'OUTLET_SIZE': 'Outlet_Size',
-        
-        # CFM values - handle the multi-row structure
-        'CFM_MAX': 'CFM_Max',
-        'CFM MAX': 'CFM_Max',
-        'CFM_MIN': 'CFM_Min', 
-        'CFM MIN': 'CFM_Min',
-        'CFM_HEAT': 'CFM_Heat',
-        'CFM HEAT': 'CFM_Heat',
-        # Handle single CFM column that gets combined with sub-headers
-        'CFM': 'CFM_Max',  # Default CFM to Max if no sub-header
-        
-        # Temperature values
-        'EAT': 'EAT',
-        'LAT': 'LAT',
-        
-        # Other values
-        'MBH': 'MBH',
-        'TOTAL MBH': 'Total_MBH',
-        'TOTAL_MBH': 'Total_MBH',
-        'EWT': 'EWT',
-        'FLUID': 'Fluid',
-        'GPM': 'GPM',
-        'MAX WPD': 'Max_WPD',
-        'MAX_WPD': 'Max_WPD',
-        'WPD': 'WPD',
-        'APD': 'APD',
-        'NOTES': 'Notes',
-        'TAG': 'Unit_No'
-    }
-    
-    # Map headers with smart CFM handling
-    mapped_headers = []
-    
-    for i, header in enumerate(excel_headers):
-        header_upper = header.upper().strip()
-        
-        # Direct mapping first
-        if header_upper in header_mapping:
-            mapped_headers.append(header_mapping[header_upper])
-        # Handle special cases for CFM sub-columns
-        elif header_upper == 'MAX':
-            # Check if this is likely a CFM sub-column by looking at previous headers
-            if i > 0 and ('CFM' in excel_headers[i-1].upper() or any('CFM' in str(excel_headers[j]).upper() for j in range(max(0, i-3), i))):
-                mapped_headers.append('CFM_Max')
-            else:
-                mapped_headers.append('MAX')
-        elif header_upper == 'MIN':
-            # Check if this is likely a CFM sub-column
-            if i > 0 and ('CFM' in excel_headers[i-1].upper() or any('CFM' in str(excel_headers[j]).upper() for j in range(max(0, i-3), i))):
-                mapped_headers.append('CFM_Min')
-            else:
-                mapped_headers.append('MIN')
-        elif header_upper == 'HEAT':
-            # Check if this is likely a CFM sub-column
-            if i > 0 and ('CFM' in excel_headers[i-1].upper() or any('CFM' in str(excel_headers[j]).upper() for j in range(max(0, i-3), i))):
-                mapped_headers.append('CFM_Heat')
+
+def _is_blank_cell(value):
+    return value is None or (value.__class__ is float and value != value) or value is pd.NaT
+
+
+def frame_head_rows(df, max_rows):
+    """First max_rows rows of a raw sheet DataFrame as lists, blank cells as None"""
+    head = df.iloc[:max_rows]
+    return [[None if _is_blank_cell(val) else val for val in row] for row in head.itertuples(index=False, name=None)]
+
+
+def combine_multi_row_headers(df, header_rows=2, title_row_offset=0):
+    """combine_header_rows for a raw sheet DataFrame"""
+    rows = frame_head_rows(df, title_row_offset + header_rows)
+    return combine_header_rows(rows, header_rows=header_rows, title_row_offset=title_row_offset, width=len(df.columns))
+
+# Excel header rules. Combined headers are matched exactly first (upper-case),
+# then as CFM sub-columns, then against the ordered substring/regex rules; the
+# first hit wins. Extra rules can be added in EXCEL_HEADER_RULES_FILE:
+#   {"exact": {"BOX SIZE": "Unit_Size"},
+#    "rules": [{"contains": ["DISCHARGE", "SIZE"], "field": "Outlet_Size"},
+#              {"regex": "^TAG\\b", "field": "Unit_No"}]}
+# File entries take precedence over the defaults below.
+EXCEL_HEADER_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'header_rules.json')
+
+DEFAULT_HEADER_EXACT = {
+    # Unit identification
+    'UNIT NO.': 'Unit_No',
+    'UNIT_NO.': 'Unit_No',
+    'UNIT NO': 'Unit_No',
+    'UNIT_NO': 'Unit_No',
+    'TAG': 'Unit_No',
+
+    # Manufacturer
+    'MANUFACTURER and MODEL NO.': 'Manufacturer_Model',
+    'MANUFACTURER & MODEL NO.': 'Manufacturer_Model',
+    'MANUFACTURER MODEL NO.': 'Manufacturer_Model',
+    'MANUFACTURER and MODEL': 'Manufacturer_Model',
+
+    # Unit size
+    'UNIT SIZE': 'Unit_Size',
+    'UNIT_SIZE': 'Unit_Size',
+
+    # Dimensions
+    'W x L x H': 'Dimensions',
+    'Wx Lx H': 'Dimensions',
+    'DIMENSIONS': 'Dimensions',
+
+    # Inlet / outlet size
+    'INLET SIZE': 'Inlet_Size',
+    'INLET_SIZE': 'Inlet_Size',
+    'OUTLET SIZE': 'Outlet_Size',
+    'OUTLET_SIZE': 'Outlet_Size',
+
+    # CFM values - handle the multi-row structure
+    'CFM_MAX': 'CFM_Max',
+    'CFM MAX': 'CFM_Max',
+    'CFM_MIN': 'CFM_Min',
+    'CFM MIN': 'CFM_Min',
+    'CFM_HEAT': 'CFM_Heat',
+    'CFM HEAT': 'CFM_Heat',
+    'CFM': 'CFM_Max',  # Default CFM to Max if no sub-header
+
+    # Temperature values
+    'EAT': 'EAT',
+    'LAT': 'LAT',
+
+    # Other values
+    'MBH': 'MBH',
+    'TOTAL MBH': 'Total_MBH',
+    'TOTAL_MBH': 'Total_MBH',
+    'EWT': 'EWT',
+    'FLUID': 'Fluid',
+    'GPM': 'GPM',
+    'MAX WPD': 'Max_WPD',
+    'MAX_WPD': 'Max_WPD',
+    'WPD': 'WPD',
+    'APD': 'APD',
+    'NOTES': 'Notes'
+}
+
+# Sub-headers under a merged CFM header (CFM within the previous 3 columns)
+DEFAULT_HEADER_CFM_SUBCOLUMNS = {'MAX': 'CFM_Max', 'MIN': 'CFM_Min', 'HEAT': 'CFM_Heat'}
+HEADER_CFM_LOOKBACK = 3
+
+# Partial matches, tried in order
+DEFAULT_HEADER_RULES = [
+    {'contains': ['MANUFACTURER'], 'field': 'Manufacturer_Model'},
+    {'contains': ['UNIT', 'SIZE'], 'field': 'Unit_Size'},
+    {'contains': ['UNIT', 'NO'], 'field': 'Unit_No'},
+    {'contains': ['INLET'], 'field': 'Inlet_Size'},
+    {'contains': ['OUTLET'], 'field': 'Outlet_Size'},
+    {'contains': ['DIMENSION'], 'field': 'Dimensions'},
+    {'contains': ['X'], 'field': 'Dimensions'},   # W x L x H variants
+]
+
+
+class HeaderRuleEngine:
+    """Compiled Excel header rules plus a memo of mapped header lists.
+
+    Rules are compiled once into an exact-match dict and an ordered list of
+    matchers. Mappings are memoized by the full header tuple, so every addendum
+    of the same sales-schedule format maps without re-running the rules. The
+    rules file is re-read (and the memo dropped) when it changes on disk.
+    """
+
+    def __init__(self, rules_file=EXCEL_HEADER_RULES_FILE, memo_size=256):
+        self.rules_file = rules_file
+        self.memo_size = memo_size
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+        self._file_version = None
+        self._compile(self._load_file())
+
+    def map_headers(self, excel_headers):
+        self._check_rules_file()
+        key = tuple(excel_headers)
+        with self._lock:
+            mapped = self._memo.get(key)
+            if mapped is not None:
+                self._memo.move_to_end(key)
+                return list(mapped)
+
+        mapped = self._map(excel_headers)
+        with self._lock:
+            self._memo[key] = tuple(mapped)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return mapped
+
+    def _map(self, excel_headers):
+        mapped_headers = []
+        last_cfm = None   # index of the latest header mentioning CFM
+        for i, header in enumerate(excel_headers):
+            header_upper = header.upper().strip()
+            near_cfm = last_cfm is not None and i - last_cfm <= HEADER_CFM_LOOKBACK
+
+            if header_upper in self._exact:
+                field = self._exact[header_upper]
+            elif header_upper in self._cfm_subcolumns:
+                field = self._cfm_subcolumns[header_upper] if near_cfm else header_upper
+            elif header_upper == '' and last_cfm == i - 1:
+                # Blank column right after CFM is the first (MAX) CFM column
+                field = 'CFM_Max'
             else:
-                mapped_headers.append('HEAT')
-        # Handle empty or generic CFM columns
-        elif header_upper == 'CFM' or (header_upper == '' and i > 0 and 'CFM' in excel_headers[i-1].upper()):
-            # This is likely the start of CFM multi-column, assign based on position
-            mapped_headers.append('CFM_Max')  # First CFM column is usually MAX
-        # Default handling - keep original or create generic name
-        else:
-            # Try partial matching for common patterns
-            if 'MANUFACTURER' in header_upper:
-                mapped_headers.append('Manufacturer_Model')
-            elif 'UNIT' in header_upper and ('SIZE' in header_upper or 'NO' in header_upper):
-                if 'SIZE' in header_upper:
-                    mapped_headers.append('Unit_Size')
-                else:
-                    mapped_headers.append('Unit_No')
-            elif 'INLET' in header_upper:
-                mapped_headers.append('Inlet_Size')
-            elif 'OUTLET' in header_upper:
-                mapped_headers.append('Outlet_Size')
-            elif 'DIMENSION' in header_upper or 'x' in header_upper.lower():
-                mapped_headers.append('Dimensions')
+                field = self._match_rules(header_upper)
+                if field is None:
+                    # Keep original header but clean it up
+                    field = header.replace(' ', '_').replace('&', 'and')
+
+            mapped_headers.append(field)
+            if 'CFM' in header_upper:
+                last_cfm = i
+        return mapped_headers
+
+    def _match_rules(self, header_upper):
+        for kind, matcher, field in self._rules:
+            if kind == 'contains':
+                if all(part in header_upper for part in matcher):
+                    return field
+            elif matcher.search(header_upper):
+                return field
+        return None
+
+    def _compile(self, custom):
+        exact = {key.upper().strip(): field for key, field in DEFAULT_HEADER_EXACT.items()}
+        exact.update({key.upper().strip(): field for key, field in custom.get('exact', {}).items()})
+        cfm_subcolumns = dict(DEFAULT_HEADER_CFM_SUBCOLUMNS)
+        cfm_subcolumns.update({key.upper().strip(): field for key, field in custom.get('cfm_subcolumns', {}).items()})
+
+        rules = []
+        for rule in list(custom.get('rules', [])) + DEFAULT_HEADER_RULES:
+            if 'regex' in rule:
+                rules.append(('regex', re.compile(rule['regex'], re.IGNORECASE), rule['field']))
             else:
-                # Keep original header but clean it up
-                clean_header = header.replace(' ', '_').replace('&', 'and')
-                mapped_headers.append(clean_header)
-    
+                parts = rule['contains'] if isinstance(rule['contains'], list) else [rule['contains']]
+                rules.append(('contains', tuple(part.upper() for part in parts), rule['field']))
+
+        with self._lock:
+            self._exact = exact
+            self._cfm_subcolumns = cfm_subcolumns
+            self._rules = rules
+            self._memo.clear()
+
+    def _rules_file_version(self):
+        try:
+            stat = os.stat(self.rules_file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _load_file(self):
+        self._file_version = self._rules_file_version()
+        if self._file_version is None:
+            return {}
+        try:
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
+                custom = json.load(f)
+            logger.info(f"Loaded Excel header rules from {self.rules_file}")
+            return custom
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring Excel header rules file {self.rules_file}: {e}")
+            return {}
+
+    def _check_rules_file(self):
+        if self._rules_file_version() != self._file_version:
+            self._compile(self._load_file())
+
+
+_header_rules = HeaderRuleEngine()
+
+
+def map_excel_headers_to_standard(excel_headers):
+    """Map Excel headers to our standard field names"""
+    mapped_headers = _header_rules.map_headers(excel_headers)
     print(f"Header mapping result: {list(zip(excel_headers, mapped_headers))}")
     return mapped_headers
 
+# Process-wide cache of raw Excel sheet grids (pd.read_excel(header=None)),
+# keyed by file content hash and sheet, so re-uploads with different header
+# settings and the debug endpoints don't re-parse the workbook.
+EXCEL_SHEET_CACHE_MAX_BYTES = 64 * 1024 * 1024   # approximate memory budget for cached sheets
+
+
+def _file_content_hash(abs_path, chunk_size=1024 * 1024):
+    """blake2b of the whole file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(abs_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExcelSheetCache:
+    """LRU cache of raw sheet DataFrames under a memory budget.
+
+    The same workbook saved under another name, or uploaded again, hits the
+    same entry. Cached frames are shared between callers and must be treated
+    as read-only (slice or copy before modifying).
+    """
+
+    def __init__(self, max_bytes=EXCEL_SHEET_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (content hash, sheet) -> (DataFrame, size)
+        self._hashes = OrderedDict()    # (abs path, mtime_ns, size) -> content hash
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def content_hash(self, file_path):
+        fingerprint = tw2_file_fingerprint(file_path)
+        with self._lock:
+            content_hash = self._hashes.get(fingerprint)
+        if content_hash is None:
+            content_hash = _file_content_hash(fingerprint[0])
+            with self._lock:
+                self._hashes[fingerprint] = content_hash
+                while len(self._hashes) > 64:
+                    self._hashes.popitem(last=False)
+        return content_hash
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_excel_sheet_cache = ExcelSheetCache()
+
+
+def read_excel_sheet_cached(file_path, sheet_name=0):
+    """pd.read_excel(file_path, sheet_name, header=None) with the sheet cache in front of it.
+
+    Returns the shared DataFrame; callers must not modify it in place.
+    """
+    key = (_excel_sheet_cache.content_hash(file_path), sheet_name)
+    df_raw = _excel_sheet_cache.get(key)
+    if df_raw is None:
+        df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+        _excel_sheet_cache.put(key, df_raw)
+    else:
+        logger.debug(f"Excel sheet cache hit for {os.path.basename(file_path)} (sheet {sheet_name})")
+    return df_raw
+
+
+def detect_title_row_offset(first_row, skip_title_row=True):
+    """0 if the first sheet row should be read as headers, 1 if it is a title row"""
+    if not skip_title_row:
+        return 0
+    first_row_values = [val for val in first_row if val is not None and not pd.isna(val)]
+    if first_row_values:
+        header_like = sum(1 for val in first_row_values if is_probably_header_value(val))
+        if header_like >= max(1, len(first_row_values) // 2):
+            print('AUTO-DETECT: using first row as headers')
+            return 0
+    return 1
+
+
+# Headers are settled from the first rows of a sheet before the full parse
+EXCEL_HEADER_SNIFF_ROWS = 10
+
+# Field names map_excel_headers_to_standard produces for recognized headers
+STANDARD_EXCEL_FIELDS = frozenset({
+    'Unit_No', 'Manufacturer_Model', 'Unit_Size', 'Dimensions', 'Inlet_Size', 'Outlet_Size',
+    'CFM_Max', 'CFM_Min', 'CFM_Heat', 'EAT', 'LAT', 'MBH', 'Total_MBH', 'EWT', 'Fluid', 'GPM',
+    'Max_WPD', 'WPD', 'APD', 'Notes'
+})
+CRITICAL_EXCEL_FIELDS = ('Unit_No', 'Unit_Size', 'CFM_Max', 'Manufacturer_Model')
+
+
+def _excel_cell_value(value):
+    """openpyxl cell value as pandas reads it (whole-number floats become int)"""
+    if value.__class__ is float and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_excel_head_rows(file_path, max_rows=EXCEL_HEADER_SNIFF_ROWS, sheet_name=0):
+    """First max_rows rows of a sheet as lists without parsing the rest of it"""
+    try:
+        cached = _excel_sheet_cache.get((_excel_sheet_cache.content_hash(file_path), sheet_name))
+    except OSError:
+        cached = None
+    if cached is not None:
+        return frame_head_rows(cached, max_rows)
+
+    if file_path.lower().endswith('.xls'):
+        return frame_head_rows(pd.read_excel(file_path, sheet_name=sheet_name, header=None, nrows=max_rows), max_rows)
+
+    rows = iter_excel_sheet_rows(file_path, sheet_name=sheet_name)
+    try:
+        return [[_excel_cell_value(val) for val in row] for _, row in zip(range(max_rows), rows)]
+    finally:
+        rows.close()
+
+
+def score_header_mapping(excel_headers, mapped_headers):
+    """Confidence (0-1) that a header mapping is right.
+
+    Half is the share of labelled columns that mapped to a standard field,
+    half is how many of the critical fields (tag, size, max CFM, model) were found.
+    """
+    labelled = [mapped for header, mapped in zip(excel_headers, mapped_headers)
+                if not (header.startswith('Column_') and header[7:].isdigit())]
+    coverage = sum(1 for mapped in labelled if mapped in STANDARD_EXCEL_FIELDS) / len(labelled) if labelled else 0.0
+    critical = sum(1 for field in CRITICAL_EXCEL_FIELDS if field in mapped_headers) / len(CRITICAL_EXCEL_FIELDS)
+    return round(0.5 * coverage + 0.5 * critical, 2)
+
+
+def sniff_excel_headers(rows, header_rows=2, skip_title_row=True):
+    """Settle headers from the leading rows of a sheet.
+
+    Returns the title row offset, combined and mapped headers, the column count
+    they cover and a confidence score for the mapping.
+    """
+    if not rows:
+        raise ValueError('Excel sheet is empty')
+    width = max((max((i + 1 for i, val in enumerate(row) if not _is_blank_cell(val)), default=0) for row in rows), default=0)
+    title_row_offset = detect_title_row_offset(rows[0], skip_title_row)
+    excel_headers = combine_header_rows(rows, header_rows=header_rows, title_row_offset=title_row_offset, width=width)
+    mapped_headers = map_excel_headers_to_standard(excel_headers)
+    return {
+        'title_row_offset': title_row_offset,
+        'excel_headers': excel_headers,
+        'mapped_headers': mapped_headers,
+        'width': width,
+        'confidence': score_header_mapping(excel_headers, mapped_headers)
+    }
+
+
 def read_excel_data_safe(file_path, data_start_row=3, header_rows=2, skip_title_row=True):
     """Read Excel data with proper error handling and configurable header detection
     
@@ -485,38 +2380,30 @@ def read_excel_data_safe(file_path, data_start_row=3, header_rows=2, skip_title_
         print("=" * 50)
         print(f"Attempting to read Excel data from: {file_path}")
         
-        # Read the Excel file without any header assumptions
-        df_raw = pd.read_excel(file_path, sheet_name=0, header=None)
-        print(f"Raw Excel shape: {df_raw.shape}")
-        
-        # Show first 5 rows for debugging
+        print(f"Configuration - Data start row: {data_start_row}, Header rows: {header_rows}, Skip title: {skip_title_row}")
+
+        # Settle headers from the first rows before parsing the whole sheet
+        head_rows = read_excel_head_rows(file_path, max(EXCEL_HEADER_SNIFF_ROWS, header_rows + 1))
         print("=== FIRST 5 ROWS OF RAW EXCEL ===")
-        for i in range(min(5, len(df_raw))):
-            row_values = df_raw.iloc[i].tolist()
+        for i, row_values in enumerate(head_rows[:5]):
             print(f"Row {i}: {row_values}")
         print("=== END RAW EXCEL PREVIEW ===")
-        
-        # Use configurable header detection
-        title_row_offset = 1 if skip_title_row else 0
-        
-        print(f"Configuration - Data start row: {data_start_row}, Header rows: {header_rows}, Skip title: {skip_title_row}")
-        print(f"Title row offset: {title_row_offset}")
-        
-        # Auto-adjust title row offset if the first row is actual headers
-        first_row_values = [val for val in df_raw.iloc[0].tolist() if not pd.isna(val)]
-        if skip_title_row and first_row_values:
-            header_like = sum(1 for val in first_row_values if is_probably_header_value(val))
-            if header_like >= max(1, len(first_row_values) // 2):
-                title_row_offset = 0
-                print('AUTO-DETECT: using first row as headers')
-
-        # Combine multi-row headers based on configuration
-        excel_headers = combine_multi_row_headers(df_raw, header_rows=header_rows, title_row_offset=title_row_offset)
+
+        sniffed = sniff_excel_headers(head_rows, header_rows=header_rows, skip_title_row=skip_title_row)
+        logger.debug(f"Title row offset: {sniffed['title_row_offset']}")
+        excel_headers = sniffed['excel_headers']
+        mapped_headers = sniffed['mapped_headers']
         print(f"Combined headers detected: {excel_headers}")
-        
-        # Map Excel headers to our standard names
-        mapped_headers = map_excel_headers_to_standard(excel_headers)
-        print(f"Mapped to standard headers: {mapped_headers}")
+        logger.debug(f"Mapped to standard headers: {mapped_headers} (confidence {sniffed['confidence']})")
+
+        # Read the Excel file without any header assumptions (parsed once per workbook)
+        df_raw = read_excel_sheet_cached(file_path, sheet_name=0)
+        print(f"Raw Excel shape: {df_raw.shape}")
+
+        # Columns past the sniffed rows have no header
+        for col_idx in range(len(excel_headers), len(df_raw.columns)):
+            excel_headers = excel_headers + [f"Column_{col_idx + 1}"]
+            mapped_headers = mapped_headers + [f"Column_{col_idx + 1}"]
         
         # Extract data starting from the configured row (convert to 0-based index)
         data_start_index = data_start_row - 1
@@ -549,17 +2436,10 @@ def read_excel_data_safe(file_path, data_start_row=3, header_rows=2, skip_title_
         size_columns = ['Unit_Size', 'Inlet_Size', 'Outlet_Size']
         for col in size_columns:
             if col in df_cleaned.columns:
-                df_cleaned[col] = df_cleaned[col].apply(clean_size_value)
+                df_cleaned[col] = clean_size_series(df_cleaned[col])
         
         # Convert to safe format
-        data = []
-        for _, row in df_cleaned.iterrows():
-            row_dict = {}
-            for col in df_cleaned.columns:
-                raw_value = row[col]
-                safe_value = safe_string_convert(raw_value)
-                row_dict[col] = safe_value
-            data.append(row_dict)
+        data = excel_frame_to_records(df_cleaned)
         
         print(f"Successfully read {len(data)} Excel records")
         
@@ -572,7 +2452,8 @@ def read_excel_data_safe(file_path, data_start_row=3, header_rows=2, skip_title_
                 'original_headers': excel_headers,
                 'combined_headers': excel_headers,  # Same as original for now
                 'mapped_headers': mapped_headers,
-                'data_start_row': data_start_row
+                'data_start_row': data_start_row,
+                'confidence': sniffed['confidence']
             }
         }
         
@@ -584,8 +2465,118 @@ def read_excel_data_safe(file_path, data_start_row=3, header_rows=2, skip_title_
         }
 
 
-def reload_tw2_data_from_disk(preferred_paths=None):
-    """Reload TW2 data from disk, updating the session with the latest contents."""
+# Large .xlsx uploads are read row by row with openpyxl and written straight to
+# the dataset store instead of going through a DataFrame and the cached sheet grid
+EXCEL_STREAMING_MIN_BYTES = 5 * 1024 * 1024
+
+
+def iter_excel_sheet_rows(file_path, sheet_name=0):
+    """Yield a sheet's cell values row by row (openpyxl read-only mode)"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def stream_excel_records(file_path, data_start_row=3, header_rows=2, skip_title_row=True):
+    """Streaming counterpart of read_excel_data_safe.
+
+    Settles the headers from the first rows (sniff_excel_headers), then
+    returns (header_info, records) where records is a generator of cleaned,
+    mapped row dicts. Only one sheet row is held at a time. Unlike the
+    DataFrame path there is no per-column dtype inference (a whole-number
+    cell in an otherwise numeric column with blanks stays an int rather than
+    becoming a float), and columns to the right of the sniffed rows are
+    ignored.
+    """
+    rows = iter_excel_sheet_rows(file_path)
+    data_start_index = max(data_start_row - 1, 0)
+    head_count = max(EXCEL_HEADER_SNIFF_ROWS, data_start_index, header_rows + 1)
+    head = [[_excel_cell_value(val) for val in row] for _, row in zip(range(head_count), rows)]
+
+    sniffed = sniff_excel_headers(head, header_rows=header_rows, skip_title_row=skip_title_row)
+    width = sniffed['width']
+    columns = list(sniffed['mapped_headers'])
+
+    header_info = {
+        'original_headers': sniffed['excel_headers'],
+        'combined_headers': sniffed['excel_headers'],
+        'mapped_headers': sniffed['mapped_headers'],
+        'data_start_row': data_start_row,
+        'confidence': sniffed['confidence'],
+        'columns': columns
+    }
+
+    size_indexes = [i for i, col in enumerate(columns) if col in ('Unit_Size', 'Inlet_Size', 'Outlet_Size')]
+    critical_indexes = [i for i, col in enumerate(columns) if col in ('Unit_Size', 'CFM_Max', 'Manufacturer_Model')]
+    pending = head[data_start_index:]
+
+    def cleaned_records():
+        for source in (pending, rows):
+            for row in source:
+                values = [_excel_cell_value(value) for value in (list(row) + [None] * width)[:width]]
+                # Same filters as the DataFrame path: blank rows, then rows with no critical data
+                if all(value is None for value in values):
+                    continue
+                if critical_indexes and all(values[i] is None for i in critical_indexes):
+                    continue
+                for i in size_indexes:
+                    values[i] = clean_size_value(values[i])
+                yield {col: safe_string_convert(value) for col, value in zip(columns, values)}
+
+    return header_info, cleaned_records()
+
+
+def read_excel_data_streaming(file_path, data_start_row=3, header_rows=2, skip_title_row=True,
+                              keep_rows=DATA_PAGE_MAX_LIMIT):
+    """Stream an Excel schedule into the dataset store (stream_excel_records -> put_stream).
+
+    Same result shape as read_excel_data_safe, except that 'data' holds only the
+    first keep_rows records and 'dataset' is the store handle for the whole table.
+    """
+    try:
+        logger.info(f"Streaming Excel data from: {file_path}")
+        header_info, records = stream_excel_records(file_path, data_start_row=data_start_row,
+                                                    header_rows=header_rows, skip_title_row=skip_title_row)
+        columns = header_info.pop('columns')
+        head = []
+
+        def keep_head():
+            for record in records:
+                if len(head) < keep_rows:
+                    head.append(record)
+                yield record
+
+        handle = _dataset_store.put_stream(keep_head(), columns)
+        logger.info(f"Successfully streamed {handle['row_count']} Excel records")
+        return {
+            'success': True,
+            'data': head,
+            'columns': columns,
+            'row_count': handle['row_count'],
+            'header_info': header_info,
+            'dataset': handle,
+            'streamed': True
+        }
+    except Exception as e:
+        logger.exception(f"Error streaming Excel data: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e).encode('ascii', 'ignore').decode('ascii')
+        }
+
+
+def reload_tw2_data_from_disk(preferred_paths=None, columns=None):
+    """Reload TW2 data from disk, updating the session with the latest contents.
+
+    With ``columns`` only those columns are read and kept in the session;
+    'updated_tw2_projection' records that the session holds a partial table.
+    """
     candidates = []
     seen_paths = set()
 
@@ -619,25 +2610,46 @@ def reload_tw2_data_from_disk(preferred_paths=None):
             last_error = {'message': f'File not found at {candidate_path}', 'code': 404}
             continue
 
-        result = read_tw2_data_safe(candidate_path)
+        result = read_tw2_data_cached(candidate_path, columns=columns)
         if result.get('success'):
-            session['updated_tw2_data'] = result['data']
-            session['updated_tw2_columns'] = result['columns']
-            session['updated_tw2_records'] = result['row_count']
-            session['updated_tw2_filename'] = os.path.basename(candidate_path)
-            session['last_tw2_reload_path'] = candidate_path
-            session['last_tw2_reload_source'] = label
-            session['tw2_last_path'] = candidate_path
+            projection = list(columns) if columns else None
             try:
-                session['tw2_last_mtime'] = os.path.getmtime(candidate_path)
+                current_mtime = os.path.getmtime(candidate_path)
             except Exception:
-                session.pop('tw2_last_mtime', None)
+                current_mtime = None
+
+            # Skip rewriting the session when it already holds this exact file version
+            unchanged = (
+                result.get('cache_hit')
+                and current_mtime is not None
+                and session.get('tw2_last_path') == candidate_path
+                and session.get('tw2_last_mtime') == current_mtime
+                and session.get('updated_tw2_dataset') is not None
+                and session.get('updated_tw2_projection') == projection
+            )
+            if not unchanged:
+                session['updated_tw2_projection'] = projection
+                store_session_dataset('updated_tw2', result['data'], result['columns'])
+                session.pop('updated_tw2_full_dataset', None)
+                session['updated_tw2_columns'] = result['columns']
+                session['updated_tw2_records'] = result['row_count']
+                session['updated_tw2_filename'] = os.path.basename(candidate_path)
+                session['tw2_last_path'] = candidate_path
+                if current_mtime is not None:
+                    session['tw2_last_mtime'] = current_mtime
+                else:
+                    session.pop('tw2_last_mtime', None)
+            if session.get('last_tw2_reload_path') != candidate_path:
+                session['last_tw2_reload_path'] = candidate_path
+            if session.get('last_tw2_reload_source') != label:
+                session['last_tw2_reload_source'] = label
             return {
                 'success': True,
                 'path': candidate_path,
                 'source': label,
                 'row_count': result['row_count'],
-                'column_count': len(result['columns'])
+                'column_count': len(result['columns']),
+                'cache_hit': result.get('cache_hit', False)
             }
         else:
             last_error = {
@@ -649,17 +2661,22 @@ def reload_tw2_data_from_disk(preferred_paths=None):
 
 
 
+_UNIT_TAG_PATTERN = re.compile(r'^([A-Z]+-\d+-)(\d+)$')
+
+
 def normalize_unit_tag(tag):
     """Normalize unit tags by adding zero-padding: V-1-1 -> V-1-01, V-1-12 -> V-1-12"""
     if not tag:
         return tag
     
     tag_str = str(tag).strip()
+
+    # Only a single-digit last segment needs padding; skip the regex otherwise
+    if len(tag_str) < 3 or tag_str[-2] != '-':
+        return tag_str
     
     # Look for pattern like V-1-1, V-2-3, etc.
-    import re
-    pattern = r'^([A-Z]+-\d+-)(\d+)$'
-    match = re.match(pattern, tag_str)
+    match = _UNIT_TAG_PATTERN.match(tag_str)
     
     if match:
         prefix = match.group(1)  # V-1-
@@ -671,153 +2688,191 @@ def normalize_unit_tag(tag):
     
     return tag_str
 
+# tblSchedule columns read by compare_performance_data
+COMPARISON_TW2_COLUMNS = (
+    'Tag', 'HWMBHCalc', 'HWLATCalc', 'HWPDCalc', 'HWAPDCalc',
+    'HWRowsCalc', 'HWRows', 'HWRow'
+)
+
+def _coerce_float_column(values):
+    """float() over a column at once: returns (float64 array, mask of values that converted)"""
+    raw = np.empty(len(values), dtype=object)
+    raw[:] = values
+    present = ~np.equal(raw, None)
+    try:
+        # One C-level cast; fails as a whole if any value can't be converted
+        return raw.astype(np.float64), present
+    except (ValueError, TypeError):
+        pass
+    # Cast the numbers in bulk and only try float() on the rest (text cells)
+    numeric = np.fromiter((value.__class__ in (float, int) for value in values), dtype=bool, count=len(values))
+    floats = np.full(len(values), np.nan)
+    floats[numeric] = raw[numeric].astype(np.float64)
+    ok = numeric.copy()
+    for i in np.flatnonzero(present & ~numeric).tolist():
+        try:
+            floats[i] = float(raw[i])
+            ok[i] = True
+        except (ValueError, TypeError):
+            pass
+    return floats, ok
+
+
+def _first_present(row, keys):
+    for key in keys:
+        candidate = row.get(key)
+        if candidate not in (None, ''):
+            return candidate
+    return None
+
+
 def compare_performance_data(excel_data, updated_tw2_data, mbh_lat_lower_margin=15, mbh_lat_upper_margin=25, wpd_threshold=5, apd_threshold=0.25):
-    """Compare performance values between Excel and updated TW2 data"""
+    """Compare performance values between Excel and updated TW2 data
+
+    Excel units are joined to TW2 rows on the normalized tag, the numeric
+    columns are converted once, and differences and thresholds are evaluated
+    as array operations; strings are only formatted for the result rows.
+    """
     try:
-        comparison_results = []
-        
-        # Convert updated TW2 data to DataFrame for easier processing
-        updated_tw2_df = pd.DataFrame(updated_tw2_data)
-        excel_df = pd.DataFrame(excel_data)
-        
-        # Create index mapping for faster lookups with normalized tags
+        # Tag -> TW2 row, normalized and original tags (later rows win)
         tw2_index = {}
         for row in updated_tw2_data:
             original_tag = str(row.get('Tag', '')).strip()
-            normalized_tag = normalize_unit_tag(original_tag)
-            tw2_index[normalized_tag] = row
-            # Also keep original tag as backup
+            tw2_index[normalize_unit_tag(original_tag)] = row
             tw2_index[original_tag] = row
-        
+
+        # Join: one pass over the Excel units gathers the compared columns
+        units = []          # (display tag, excel row) per unit; excel row is None once matched
+        excel_mbh, excel_lat, tw2_rows = [], [], []
         for excel_row in excel_data:
             unit_tag = str(excel_row.get('Unit_No', '')).strip()
             if not unit_tag:
                 continue
-                
-            # Normalize the Excel unit tag for matching
             normalized_excel_tag = normalize_unit_tag(unit_tag)
-            
-            # Find matching TW2 record - try normalized first, then original
+            display_tag = f"{unit_tag} \u001a {normalized_excel_tag}" if normalized_excel_tag != unit_tag else unit_tag
             tw2_row = tw2_index.get(normalized_excel_tag) or tw2_index.get(unit_tag)
             if not tw2_row:
-                comparison_results.append({
-                    'unit_tag': f"{unit_tag} \u001a {normalized_excel_tag}" if normalized_excel_tag != unit_tag else unit_tag,
+                units.append((display_tag, excel_row))
+                continue
+            units.append((display_tag, None))
+            excel_mbh.append(excel_row.get('MBH') or excel_row.get('MBH_Total') or excel_row.get('Total_MBH'))
+            excel_lat.append(excel_row.get('LAT') or excel_row.get('Leaving_Air_Temp'))
+            tw2_rows.append(tw2_row)
+
+        tw2_mbh = [row.get('HWMBHCalc') for row in tw2_rows]
+        tw2_lat = [row.get('HWLATCalc') for row in tw2_rows]
+        tw2_wpd = [row.get('HWPDCalc') for row in tw2_rows]
+        tw2_apd = [row.get('HWAPDCalc') for row in tw2_rows]
+        tw2_hw_raw = [_first_present(row, ('HWRowsCalc', 'HWRows', 'HWRow')) for row in tw2_rows]
+
+        excel_mbh_val, excel_mbh_ok = _coerce_float_column(excel_mbh)
+        excel_lat_val, excel_lat_ok = _coerce_float_column(excel_lat)
+        tw2_mbh_val, tw2_mbh_ok = _coerce_float_column(tw2_mbh)
+        tw2_lat_val, tw2_lat_ok = _coerce_float_column(tw2_lat)
+        wpd_val, wpd_ok = _coerce_float_column(tw2_wpd)
+        apd_val, apd_ok = _coerce_float_column(tw2_apd)
+
+        # Percent differences with separate lower/upper margins (-15% / +25% by default)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mbh_has_diff = excel_mbh_ok & tw2_mbh_ok & (excel_mbh_val != 0)
+            mbh_diff = np.where(mbh_has_diff, (tw2_mbh_val - excel_mbh_val) / excel_mbh_val * 100, np.nan)
+            lat_has_diff = excel_lat_ok & tw2_lat_ok & (excel_lat_val != 0)
+            lat_diff = np.where(lat_has_diff, (tw2_lat_val - excel_lat_val) / excel_lat_val * 100, np.nan)
+            mbh_low = mbh_has_diff & (mbh_diff < -mbh_lat_lower_margin)
+            mbh_high = mbh_has_diff & (mbh_diff > mbh_lat_upper_margin)
+            lat_low = lat_has_diff & (lat_diff < -mbh_lat_lower_margin)
+            lat_high = lat_has_diff & (lat_diff > mbh_lat_upper_margin)
+            wpd_high = wpd_ok & (wpd_val > wpd_threshold)
+            apd_high = apd_ok & (apd_val > apd_threshold)
+
+        fail = mbh_low | mbh_high | lat_low | lat_high
+        warning = ~fail & (wpd_high | apd_high)
+
+        # Strings are only built for result rows: percentages for every
+        # matched unit, flag text only where a threshold was crossed
+        statuses = np.where(fail, 'Fail', np.where(warning, 'Warning', 'Pass')).tolist()
+        mbh_text = [f'{diff:.1f}%' if has_diff else 'N/A' for diff, has_diff in zip(mbh_diff.tolist(), mbh_has_diff.tolist())]
+        lat_text = [f'{diff:.1f}%' if has_diff else 'N/A' for diff, has_diff in zip(lat_diff.tolist(), lat_has_diff.tolist())]
+        details = ['All within range'] * len(tw2_rows)
+        flagged = np.flatnonzero(fail | warning)
+        for i, mbh_flag, lat_flag, wpd_flag, apd_flag, wpd, apd in zip(
+                flagged.tolist(),
+                np.where(mbh_low[flagged], ' (too low)', np.where(mbh_high[flagged], ' (too high)', '')).tolist(),
+                np.where(lat_low[flagged], ' (too low)', np.where(lat_high[flagged], ' (too high)', '')).tolist(),
+                wpd_high[flagged].tolist(), apd_high[flagged].tolist(),
+                wpd_val[flagged].tolist(), apd_val[flagged].tolist()):
+            status_flags = []
+            if mbh_flag:
+                status_flags.append(f'MBH {mbh_text[i]}{mbh_flag}')
+            if lat_flag:
+                status_flags.append(f'LAT {lat_text[i]}{lat_flag}')
+            if wpd_flag:
+                status_flags.append(f'WPD {wpd:.2f}')
+            if apd_flag:
+                status_flags.append(f'APD {apd:.2f}')
+            details[i] = ', '.join(status_flags)
+
+        hw_rows_cache = {}
+        for raw in tw2_hw_raw:
+            if raw.__class__ in (int, float, str) and raw not in hw_rows_cache:
+                hw_rows_cache[raw] = normalize_hw_rows_value(raw)
+        tw2_hw_rows = [hw_rows_cache[raw] if raw.__class__ in (int, float, str) else normalize_hw_rows_value(raw)
+                       for raw in tw2_hw_raw]
+
+        matched_results = iter([
+            {
+                'unit_tag': None,
+                'status': status,
+                'status_details': status_details,
+                'excel_mbh': e_mbh,
+                'tw2_mbh': t_mbh,
+                'mbh_diff': mbh_diff_text,
+                'excel_lat': e_lat,
+                'tw2_lat': t_lat,
+                'lat_diff': lat_diff_text,
+                'tw2_wpd': t_wpd,
+                'tw2_apd': t_apd,
+                'tw2_hw_rows': hw_rows,
+                'tw2_hw_rows_raw': hw_raw
+            }
+            for status, status_details, e_mbh, t_mbh, mbh_diff_text, e_lat, t_lat, lat_diff_text, t_wpd, t_apd, hw_rows, hw_raw
+            in zip(statuses, details, excel_mbh, tw2_mbh, mbh_text, excel_lat, tw2_lat, lat_text,
+                   tw2_wpd, tw2_apd, tw2_hw_rows, tw2_hw_raw)
+        ])
+
+        comparison_results = []
+        for display_tag, missing_row in units:
+            if missing_row is None:
+                result = next(matched_results)
+                result['unit_tag'] = display_tag
+            else:
+                result = {
+                    'unit_tag': display_tag,
                     'status': 'Not Found',
-                    'excel_mbh': excel_row.get('MBH', 'N/A'),
+                    'excel_mbh': missing_row.get('MBH', 'N/A'),
                     'tw2_mbh': 'N/A',
                     'mbh_diff': 'N/A',
-                    'excel_lat': excel_row.get('LAT', 'N/A'),
+                    'excel_lat': missing_row.get('LAT', 'N/A'),
                     'tw2_lat': 'N/A',
                     'lat_diff': 'N/A',
                     'tw2_wpd': 'N/A',
                     'tw2_apd': 'N/A',
                     'tw2_hw_rows': None,
                     'tw2_hw_rows_raw': None,
-                })
-                continue
-            
-            # Extract values
-            excel_mbh = excel_row.get('MBH') or excel_row.get('MBH_Total') or excel_row.get('Total_MBH')
-            excel_lat = excel_row.get('LAT') or excel_row.get('Leaving_Air_Temp')
-            
-            tw2_mbh = tw2_row.get('HWMBHCalc')
-            tw2_lat = tw2_row.get('HWLATCalc')
-            tw2_wpd = tw2_row.get('HWPDCalc')
-            tw2_apd = tw2_row.get('HWAPDCalc')
-
-            tw2_hw_raw = None
-            for hw_key in ('HWRowsCalc', 'HWRows', 'HWRow'):
-                candidate = tw2_row.get(hw_key)
-                if candidate not in (None, ''):
-                    tw2_hw_raw = candidate
-                    break
-            tw2_hw_rows = normalize_hw_rows_value(tw2_hw_raw)
+                }
+            comparison_results.append(result)
 
-            
-            # Calculate differences and status
-            mbh_diff = 'N/A'
-            lat_diff = 'N/A'
-            status_flags = []
-            
-            # MBH comparison with separate upper/lower margins
-            if excel_mbh is not None and tw2_mbh is not None:
-                try:
-                    excel_mbh_val = float(excel_mbh)
-                    tw2_mbh_val = float(tw2_mbh)
-                    if excel_mbh_val != 0:
-                        mbh_diff = ((tw2_mbh_val - excel_mbh_val) / excel_mbh_val) * 100
-                        # Check if outside acceptable range: -15% to +25%
-                        if mbh_diff < -mbh_lat_lower_margin:  # Too low (under by more than 15%)
-                            status_flags.append(f'MBH {mbh_diff:.1f}% (too low)')
-                        elif mbh_diff > mbh_lat_upper_margin:  # Too high (over by more than 25%)
-                            status_flags.append(f'MBH {mbh_diff:.1f}% (too high)')
-                except (ValueError, TypeError):
-                    pass
-            
-            # LAT comparison with separate upper/lower margins
-            if excel_lat is not None and tw2_lat is not None:
-                try:
-                    excel_lat_val = float(excel_lat)
-                    tw2_lat_val = float(tw2_lat)
-                    if excel_lat_val != 0:
-                        lat_diff = ((tw2_lat_val - excel_lat_val) / excel_lat_val) * 100
-                        # Check if outside acceptable range: -15% to +25%
-                        if lat_diff < -mbh_lat_lower_margin:  # Too low (under by more than 15%)
-                            status_flags.append(f'LAT {lat_diff:.1f}% (too low)')
-                        elif lat_diff > mbh_lat_upper_margin:  # Too high (over by more than 25%)
-                            status_flags.append(f'LAT {lat_diff:.1f}% (too high)')
-                except (ValueError, TypeError):
-                    pass
-            
-            # WPD check
-            if tw2_wpd is not None:
-                try:
-                    wpd_val = float(tw2_wpd)
-                    if wpd_val > wpd_threshold:
-                        status_flags.append(f'WPD {wpd_val:.2f}')
-                except (ValueError, TypeError):
-                    pass
-            
-            # APD check
-            if tw2_apd is not None:
-                try:
-                    apd_val = float(tw2_apd)
-                    if apd_val > apd_threshold:
-                        status_flags.append(f'APD {apd_val:.2f}')
-                except (ValueError, TypeError):
-                    pass
-            
-            # Determine overall status
-            if status_flags:
-                status = 'Fail' if any('MBH' in flag or 'LAT' in flag for flag in status_flags) else 'Warning'
-            else:
-                status = 'Pass'
-            
-            comparison_results.append({
-                'unit_tag': f"{unit_tag} \u001a {normalized_excel_tag}" if normalized_excel_tag != unit_tag else unit_tag,
-                'status': status,
-                'status_details': ', '.join(status_flags) if status_flags else 'All within range',
-                'excel_mbh': excel_mbh,
-                'tw2_mbh': tw2_mbh,
-                'mbh_diff': f'{mbh_diff:.1f}%' if isinstance(mbh_diff, (int, float)) else mbh_diff,
-                'excel_lat': excel_lat,
-                'tw2_lat': tw2_lat,
-                'lat_diff': f'{lat_diff:.1f}%' if isinstance(lat_diff, (int, float)) else lat_diff,
-                'tw2_wpd': tw2_wpd,
-                'tw2_apd': tw2_apd,
-                'tw2_hw_rows': tw2_hw_rows,
-                'tw2_hw_rows_raw': tw2_hw_raw if tw2_hw_raw not in (None, '') else None
-            })
-        
+        fail_count = int(fail.sum())
+        warning_count = int(warning.sum())
         return {
             'success': True,
             'results': comparison_results,
             'summary': {
                 'total': len(comparison_results),
-                'pass': len([r for r in comparison_results if r['status'] == 'Pass']),
-                'warning': len([r for r in comparison_results if r['status'] == 'Warning']),
-                'fail': len([r for r in comparison_results if r['status'] == 'Fail']),
-                'not_found': len([r for r in comparison_results if r['status'] == 'Not Found'])
+                'pass': len(tw2_rows) - fail_count - warning_count,
+                'warning': warning_count,
+                'fail': fail_count,
+                'not_found': len(units) - len(tw2_rows)
             }
         }
     
@@ -827,6 +2882,644 @@ def compare_performance_data(excel_data, updated_tw2_data, mbh_lat_lower_margin=
             'error': f'Error during performance comparison: {str(e)}'
         }
 
+# Last comparison per session, so a refresh only re-evaluates units whose
+# TW2 rows changed. Kept in memory; a restart just means one full comparison.
+COMPARISON_STATE_MAX_SESSIONS = 64
+
+
+def _tw2_tag_positions(updated_tw2_data):
+    """Tag -> row position, built like compare_performance_data's index (later rows win)"""
+    positions = {}
+    for position, row in enumerate(updated_tw2_data):
+        original_tag = str(row.get('Tag', '')).strip()
+        positions[normalize_unit_tag(original_tag)] = position
+        positions[original_tag] = position
+    return positions
+
+
+def _tw2_row_fingerprint(row):
+    """The values of a TW2 row that compare_performance_data looks at"""
+    return (bool(row),) + tuple(row.get(column) for column in COMPARISON_TW2_COLUMNS)
+
+
+class ComparisonStateStore:
+    """Per-session snapshot of the last comparison (LRU over sessions).
+
+    A snapshot holds the inputs it was computed from (Excel dataset id,
+    thresholds, TW2 dataset id), a fingerprint of the TW2 row behind every tag
+    key, and the results in Excel order with the lookup keys of each unit.
+    """
+
+    def __init__(self, max_sessions=COMPARISON_STATE_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    def get(self, state_key):
+        with self._lock:
+            state = self._states.get(state_key)
+            if state is not None:
+                self._states.move_to_end(state_key)
+            return state
+
+    def put(self, state_key, state):
+        with self._lock:
+            self._states[state_key] = state
+            self._states.move_to_end(state_key)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+
+    def discard(self, state_key):
+        with self._lock:
+            self._states.pop(state_key, None)
+
+
+_comparison_states = ComparisonStateStore()
+
+
+def _summarize_comparison(results):
+    statuses = [result['status'] for result in results]
+    return {
+        'total': len(results),
+        'pass': statuses.count('Pass'),
+        'warning': statuses.count('Warning'),
+        'fail': statuses.count('Fail'),
+        'not_found': statuses.count('Not Found')
+    }
+
+
+def compare_performance_incremental(state_key, excel_data, updated_tw2_data, excel_id=None, tw2_id=None, **thresholds):
+    """compare_performance_data that reuses the session's previous comparison.
+
+    When the Excel data and thresholds are unchanged, only units whose tag keys
+    point at a TW2 row that was added, removed or changed since the last
+    snapshot are compared again. Returns the usual result plus 'version',
+    'base_version' and 'changed' (indexes into results that differ from the
+    previous snapshot); 'base_version' is None after a full comparison.
+    """
+    params = tuple(sorted(thresholds.items()))
+    previous = _comparison_states.get(state_key) if state_key else None
+    reusable = (previous is not None and excel_id is not None
+                and previous['excel_id'] == excel_id and previous['params'] == params)
+
+    if reusable and tw2_id is not None and previous['tw2_id'] == tw2_id:
+        # Same TW2 snapshot as last time: nothing to recompute
+        return {'success': True, 'results': previous['results'], 'summary': previous['summary'],
+                'version': previous['version'], 'base_version': previous['version'], 'changed': []}
+
+    positions = _tw2_tag_positions(updated_tw2_data)
+    fingerprints = {key: _tw2_row_fingerprint(updated_tw2_data[position]) for key, position in positions.items()}
+
+    if not reusable:
+        result = compare_performance_data(excel_data, updated_tw2_data, **thresholds)
+        if not result['success']:
+            return result
+        unit_keys = []
+        for excel_position, excel_row in enumerate(excel_data):
+            unit_tag = str(excel_row.get('Unit_No', '')).strip()
+            if unit_tag:
+                unit_keys.append((excel_position, unit_tag, normalize_unit_tag(unit_tag)))
+        results = result['results']
+        summary = result['summary']
+        changed = list(range(len(results)))
+        base_version = None
+        version = (previous['version'] + 1) if previous else 1
+    else:
+        old_fingerprints = previous['fingerprints']
+        changed_keys = {key for key, fingerprint in fingerprints.items() if old_fingerprints.get(key) != fingerprint}
+        changed_keys.update(key for key in old_fingerprints if key not in fingerprints)
+
+        unit_keys = previous['unit_keys']
+        changed = [i for i, (_, unit_tag, normalized_tag) in enumerate(unit_keys)
+                   if unit_tag in changed_keys or normalized_tag in changed_keys]
+        results = list(previous['results'])
+        if changed:
+            # Compare just those units against the TW2 rows their keys resolve to;
+            # keeping file order preserves which row wins a shared key
+            subset_positions = sorted({positions[key] for i in changed for key in unit_keys[i][1:] if key in positions})
+            result = compare_performance_data(
+                [excel_data[unit_keys[i][0]] for i in changed],
+                [updated_tw2_data[position] for position in subset_positions],
+                **thresholds
+            )
+            if not result['success']:
+                return result
+            for i, unit_result in zip(changed, result['results']):
+                results[i] = unit_result
+        summary = _summarize_comparison(results)
+        base_version = previous['version']
+        version = previous['version'] + 1 if changed else previous['version']
+
+    if state_key:
+        _comparison_states.put(state_key, {
+            'excel_id': excel_id,
+            'tw2_id': tw2_id,
+            'params': params,
+            'fingerprints': fingerprints,
+            'unit_keys': unit_keys,
+            'results': results,
+            'summary': summary,
+            'version': version
+        })
+    return {'success': True, 'results': results, 'summary': summary,
+            'version': version, 'base_version': base_version, 'changed': changed}
+
+
+def comparison_state_key():
+    """Per-session key for _comparison_states, created on first use"""
+    state_key = session.get('comparison_state_key')
+    if not state_key:
+        state_key = session['comparison_state_key'] = os.urandom(16).hex()
+    return state_key
+
+
+# TW2 fields written by apply_mapping, one UPDATE statement per group so a field the
+# Access driver rejects doesn't block the others
+MAPPING_FIELD_BATCHES = (
+    ('UnitSize', 'InletSize', 'CFMDesign'),
+    ('CFMMinPrime', 'CFMMin'),
+    ('HWCFM', 'HeatingPrimaryAirflow'),
+    ('HWGPM',),
+)
+
+
+def mapped_write_value(tw2_field, excel_field, value):
+    """Value apply_mapping writes to a TW2 field for an Excel cell (None for blanks)"""
+    if 'Size' in tw2_field:
+        final_value = clean_size_value(value)
+        if excel_field == 'Unit_Size' and tw2_field == 'InletSize':
+            # A size 40 unit takes a 24x16 inlet; otherwise InletSize follows UnitSize
+            try:
+                if int(float(str(final_value))) == 40:
+                    final_value = "24x16"
+            except (ValueError, TypeError):
+                pass
+    else:
+        final_value = value
+    if final_value is None or (isinstance(final_value, str) and final_value.strip() == ''):
+        return None
+    return final_value
+
+
+def index_tw2_values(rows, columns):
+    """Map upper-cased tag -> {column: value} for tblSchedule rows given as dicts.
+
+    Jet compares text case-insensitively, so tags are matched upper-cased. A tag
+    that appears more than once maps to None; its cells are always written.
+    """
+    values = {}
+    for row in rows:
+        tag = row.get('Tag')
+        if tag is None:
+            continue
+        key = str(tag).upper()
+        values[key] = None if key in values else {column: row.get(column) for column in columns}
+    return values
+
+
+def read_tw2_current_values(cursor, columns, raw_values=None):
+    """Current values of the given tblSchedule columns, indexed like index_tw2_values.
+
+    Values go through the same converters as read_tw2_data_safe, so a plan diffed
+    against them matches one diffed against the cached table (preview_mapping_writes).
+    A raw_values dict is filled with the same index over the values as pyodbc
+    returned them, which is what the change journal records.
+    """
+    names = ['Tag'] + [column for column in columns if column != 'Tag']
+    cursor.execute(f"SELECT {', '.join(f'[{name}]' for name in names)} FROM tblSchedule")
+    raw_rows = cursor.fetchall()
+    rows = convert_rows_columnwise(raw_rows, names, build_column_converters(cursor.description))
+    if raw_values is not None:
+        # Keyed by the converted tag so both indexes answer the same lookups
+        raw_values.update(index_tw2_values(
+            [{**dict(zip(names, raw)), 'Tag': row['Tag']} for raw, row in zip(raw_rows, rows)], columns))
+    return index_tw2_values(rows, columns)
+
+
+def resolve_mapping_columns(lookup, mappings):
+    """Resolve mapped TW2 fields through a lower-cased name -> column lookup.
+
+    Returns (resolved columns by field, errors for fields not in tblSchedule).
+    """
+    resolved_columns = {}
+    errors = []
+    for batch_fields in MAPPING_FIELD_BATCHES:
+        for tw2_field in batch_fields:
+            if tw2_field not in mappings:
+                continue
+            column = lookup.get(tw2_field.lower())
+            if column:
+                resolved_columns[tw2_field] = column
+            else:
+                errors.append(f"Column {tw2_field} not found in tblSchedule; skipped")
+    return resolved_columns, errors
+
+
+def tw2_values_equal(current, new):
+    """Whether writing new over a cell holding current would leave it unchanged"""
+    if current is None or new is None:
+        return current is None and new is None
+    if isinstance(current, str):
+        if isinstance(new, float) and new.is_integer():
+            new = int(new)
+        return current == str(new)
+    if isinstance(current, (int, float, decimal.Decimal)) and not isinstance(current, bool):
+        try:
+            current_float = float(current)
+            new_float = float(new)
+        except (TypeError, ValueError):
+            return False
+        if current_float == new_float:
+            return True
+        # Single columns read back widened (1.9 -> 1.899999976...); writing the same
+        # value again would store the identical float32
+        current_single = np.float32(current_float)
+        return float(current_single) == current_float and bool(current_single == np.float32(new_float))
+    return current == new
+
+
+def plan_mapping_writes(excel_data, mappings, resolved_columns, current_values=None):
+    """Work out apply_mapping's UPDATEs, grouped by field batch and SET column list.
+
+    With current_values (from read_tw2_current_values / index_tw2_values) only cells
+    whose value would change are planned, and rows whose tag isn't in the file are
+    reported as missing. Returns a dict with:
+      groups - (batch label, columns) -> [(row index, params)], the normalized tag
+               last in params, so each group runs as one prepared statement
+      row_labels - row index -> Excel tag value, for error messages
+      changes - [{'tag', 'column', 'old', 'new'}] for every planned cell
+      changed_tags / unchanged_tags / missing_tags - normalized tags, in Excel order
+      errors - rows that could not be planned
+    """
+    plan = {
+        'groups': OrderedDict(),
+        'row_labels': {},
+        'changes': [],
+        'changed_tags': [],
+        'unchanged_tags': [],
+        'missing_tags': [],
+        'unchanged_cells': 0,
+        'errors': []
+    }
+    tag_field = mappings.get('Tag')
+    if not tag_field:
+        return plan
+
+    batches = []
+    for batch_num, batch_fields in enumerate(MAPPING_FIELD_BATCHES, 1):
+        fields = [(tw2_field, resolved_columns[tw2_field], mappings[tw2_field])
+                  for tw2_field in batch_fields if tw2_field in resolved_columns]
+        if fields:
+            batches.append((batch_num, fields))
+
+    tag_status = OrderedDict()
+    for index, excel_row in enumerate(excel_data):
+        tag_value = excel_row.get(tag_field)
+        if not tag_value:
+            continue
+        normalized_tag = normalize_tag_format(str(tag_value))
+        current = None
+        if current_values is not None:
+            tag_key = normalized_tag.upper()
+            if tag_key not in current_values:
+                tag_status.setdefault(normalized_tag, 'missing')
+                continue
+            current = current_values[tag_key]
+        try:
+            row_writes = []
+            row_changes = []
+            unchanged_cells = 0
+            for batch_num, fields in batches:
+                columns = []
+                params = []
+                for tw2_field, column, excel_field in fields:
+                    if excel_field not in excel_row:
+                        continue
+                    value = mapped_write_value(tw2_field, excel_field, excel_row[excel_field])
+                    old_value = current.get(column) if current is not None else None
+                    if current is not None and tw2_values_equal(old_value, value):
+                        unchanged_cells += 1
+                        continue
+                    columns.append(column)
+                    params.append(value)
+                    row_changes.append({'tag': normalized_tag, 'column': column,
+                                        'old': old_value, 'new': value})
+                if columns:
+                    params.append(normalized_tag)
+                    row_writes.append(((f'Batch {batch_num}', tuple(columns)), params))
+        except Exception as e:
+            plan['errors'].append(f"Error updating {tag_value}: {str(e)}")
+            continue
+
+        plan['unchanged_cells'] += unchanged_cells
+        if not row_writes:
+            tag_status.setdefault(normalized_tag, 'unchanged')
+            continue
+        tag_status[normalized_tag] = 'changed'
+        plan['row_labels'][index] = tag_value
+        plan['changes'].extend(row_changes)
+        for key, params in row_writes:
+            plan['groups'].setdefault(key, []).append((index, params))
+        if current is not None:
+            # Later rows for the same tag are diffed against what this row writes
+            for change in row_changes:
+                current[change['column']] = change['new']
+
+    for tag, status in tag_status.items():
+        plan[f'{status}_tags'].append(tag)
+    return plan
+
+
+JOB_WORKERS = 2                 # background jobs running at once; later ones wait their turn
+JOB_PROGRESS_CHUNK_ROWS = 250   # rows between progress reports (and cancellation checks)
+JOB_KEEP_SECONDS = 30 * 60      # finished jobs stay readable this long
+JOB_STREAM_KEEPALIVE = 15       # seconds between SSE keep-alive comments while nothing changes
+
+
+class JobCancelled(Exception):
+    """Raised inside a background job at its next progress report after a cancel"""
+
+
+class Job:
+    """State of one background job, changed only through its JobQueue"""
+
+    def __init__(self, queue, kind, owner):
+        self.id = os.urandom(12).hex()
+        self.kind = kind
+        self.owner = owner
+        self.state = 'queued'   # queued -> running -> done | failed | cancelled
+        self.done = 0
+        self.total = None
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.version = 0        # bumped on every change so streams know when to send
+        self._queue = queue
+
+    def progress(self, done, total, stage=None):
+        """Report progress from inside the job; raises JobCancelled after a cancel"""
+        self._queue._update(self, done=done, total=total, stage=stage)
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def snapshot(self):
+        now = time.time()
+        elapsed = ((self.finished or now) - self.started) if self.started else 0.0
+        eta = None
+        if self.state == 'running' and self.total and 0 < self.done < self.total:
+            eta = round(elapsed / self.done * (self.total - self.done), 1)
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'version': self.version,
+            'done': self.done,
+            'total': self.total,
+            'stage': self.stage,
+            'percent': round(100.0 * self.done / self.total, 1) if self.total else None,
+            'elapsed_seconds': round(elapsed, 1),
+            'eta_seconds': eta,
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """In-process worker pool for long merges, HW Rows saves and exports.
+
+    A job is a callable taking its Job. It reports progress with job.progress,
+    which is also where a requested cancellation takes effect; the writers run
+    in one transaction, so a cancelled write rolls back completely. Finished
+    jobs are kept for JOB_KEEP_SECONDS so clients can pick up the result.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, keep_seconds=JOB_KEEP_SECONDS):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.keep_seconds = keep_seconds
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()   # job id -> Job, oldest first
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def submit(self, kind, owner, func):
+        job = Job(self, kind, owner)
+        with self._cond:
+            self._prune(time.time())
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func)
+        logger.info(f"JOB: queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id, owner):
+        """The job if it exists and belongs to owner, else None"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+        return job if job is not None and job.owner == owner else None
+
+    def list(self, owner):
+        with self._cond:
+            return [job.snapshot() for job in self._jobs.values() if job.owner == owner]
+
+    def cancel(self, job):
+        with self._cond:
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished = time.time()
+            elif job.state == 'running':
+                job.cancel_requested = True
+            job.version += 1
+            self._cond.notify_all()
+            return job.snapshot()
+
+    def wait(self, job, version, timeout):
+        """Snapshot once the job changed from version (or after timeout)"""
+        with self._cond:
+            self._cond.wait_for(lambda: job.version != version, timeout)
+            return job.snapshot()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _update(self, job, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+
+    def _run(self, job, func):
+        with self._cond:
+            if job.state != 'queued':
+                return   # cancelled while waiting
+            job.state = 'running'
+            job.started = time.time()
+            job.version += 1
+            self._cond.notify_all()
+
+        try:
+            result = func(job)
+        except JobCancelled:
+            logger.info(f"JOB: {job.kind} job {job.id} cancelled")
+            self._update(job, state='cancelled', finished=time.time())
+        except Exception as e:
+            logger.exception(f"JOB: {job.kind} job {job.id} failed: {e}")
+            self._update(job, state='failed', error=str(e), finished=time.time())
+        else:
+            logger.info(f"JOB: {job.kind} job {job.id} done in {time.time() - job.started:.2f}s")
+            self._update(job, state='done', result=result, finished=time.time())
+
+    def _prune(self, now):
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished > self.keep_seconds]:
+            del self._jobs[job_id]
+
+
+_jobs = JobQueue()
+atexit.register(_jobs.shutdown)
+
+
+def job_owner_key():
+    """Per-session key background jobs are filed under, created on first use"""
+    owner = session.get('job_owner_key')
+    if not owner:
+        owner = session['job_owner_key'] = os.urandom(16).hex()
+    return owner
+
+
+def job_submitted_response(job):
+    """202 body for an endpoint that handed its work to a background job"""
+    return {
+        'success': True,
+        'job_id': job.id,
+        'state': job.state,
+        'events_url': f'/jobs/{job.id}',
+        'status_url': f'/jobs/{job.id}/status'
+    }
+
+
+def execute_write_plan(cursor, groups, row_labels, progress=None):
+    """Run each planned group of tblSchedule UPDATEs as a single executemany.
+
+    groups maps (label, columns) to [(row index, params)] with the tag last in
+    params; row_labels names each row in error messages.
+
+    A group that fails is retried row by row so only the offending rows are
+    reported. Returns (indexes of rows with at least one successful write, errors,
+    number of statements executed, number of rows retried individually, and the
+    indexes written per group as {(label, columns): set}).
+
+    With progress (called with rows done, total rows and the group label, as
+    Job.progress is) groups are sent in slices of JOB_PROGRESS_CHUNK_ROWS so a
+    background job can report progress and stop between slices.
+    """
+    written = set()
+    written_groups = {}
+    errors = []
+    statements = 0
+    retried = 0
+    total_rows = sum(len(entries) for entries in groups.values())
+    done_rows = 0
+    for (label, columns), group_entries in groups.items():
+        set_clause = ', '.join(f'[{column}] = ?' for column in columns)
+        query = f"UPDATE tblSchedule SET {set_clause} WHERE [Tag] = ?"
+        slice_size = JOB_PROGRESS_CHUNK_ROWS if progress else max(len(group_entries), 1)
+        group_written = written_groups[(label, columns)] = set()
+        for start in range(0, max(len(group_entries), 1), slice_size):
+            entries = group_entries[start:start + slice_size]
+            try:
+                cursor.executemany(query, [params for _, params in entries])
+                statements += 1
+                group_written.update(index for index, _ in entries)
+            except Exception as batch_error:
+                logger.warning(f"WRITE: {label} executemany failed ({batch_error}); retrying {len(entries)} rows individually")
+                retried += len(entries)
+                for index, params in entries:
+                    try:
+                        cursor.execute(query, params)
+                        statements += 1
+                        group_written.add(index)
+                    except Exception as row_error:
+                        errors.append(f"{label} error for {row_labels[index]}: {str(row_error)}")
+            done_rows += len(entries)
+            if progress:
+                progress(done_rows, total_rows, label)
+        written |= group_written
+    return written, errors, statements, retried, written_groups
+
+
+MAPPING_PREVIEW_TTL = 30 * 60   # seconds a dry-run preview token stays valid
+MAPPING_PREVIEW_MAX = 32        # previews kept across all sessions
+MAPPING_PREVIEW_STALE_ERROR = 'TW2 or Excel data changed since the preview; run the preview again'
+
+
+class MappingPreviewStore:
+    """Dry-run plans from apply_mapping, held until applied under their token.
+
+    An entry records the TW2 file version and Excel dataset it was computed
+    against so a stale preview is refused instead of applied.
+    """
+
+    def __init__(self, ttl=MAPPING_PREVIEW_TTL, max_entries=MAPPING_PREVIEW_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _expire(self, now):
+        while self._entries:
+            token, entry = next(iter(self._entries.items()))
+            if now - entry['created'] <= self.ttl and len(self._entries) <= self.max_entries:
+                break
+            self._entries.pop(token)
+
+    def put(self, entry):
+        token = os.urandom(16).hex()
+        now = time.time()
+        with self._lock:
+            self._entries[token] = {**entry, 'created': now}
+            self._expire(now)
+        return token
+
+    def take(self, token):
+        """Remove and return the entry for token (None if unknown or expired)"""
+        with self._lock:
+            self._expire(time.time())
+            return self._entries.pop(token, None)
+
+
+_mapping_previews = MappingPreviewStore()
+
+
+def preview_mapping_writes(tw2_file, excel_data, mappings):
+    """Compute apply_mapping's change set from the cached TW2 table, without writing.
+
+    No backup is made and, when the file version is already cached, no ODBC
+    connection is opened.
+    """
+    started = time.perf_counter()
+    fields = [field for batch in MAPPING_FIELD_BATCHES for field in batch if field in mappings]
+    tw2 = read_tw2_data_cached(tw2_file, columns=['Tag'] + fields)
+    if not tw2.get('success'):
+        return {'success': False, 'error': tw2.get('error', 'Unable to read TW2 data')}
+
+    lookup = {column.lower(): column for column in tw2['columns']}
+    resolved_columns, column_errors = resolve_mapping_columns(lookup, mappings)
+    current_values = index_tw2_values(tw2['data'], list(dict.fromkeys(resolved_columns.values())))
+    plan = plan_mapping_writes(excel_data, mappings, resolved_columns, current_values)
+    plan['errors'] = column_errors + plan['errors']
+    return {
+        'success': True,
+        'plan': plan,
+        'tw2_cache_hit': tw2.get('cache_hit', False),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -846,9 +3539,13 @@ def upload_tw2():
             filename = secure_filename(file.filename)
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
             
+            # Release pooled connections to a previous upload with the same name;
+            # an open Jet connection would otherwise hold the old file
+            abs_filepath = os.path.abspath(filepath)
+            invalidate_mdb_connections(abs_filepath)
+
             # Save the file
             file.save(filepath)
-            abs_filepath = os.path.abspath(filepath)
             
             # Read the tw2 data using safe method
             result = read_tw2_data_safe(abs_filepath)
@@ -856,9 +3553,11 @@ def upload_tw2():
             if result['success']:
                 # Store in session data
                 session['tw2_file'] = abs_filepath
-                session['tw2_data'] = result['data']
+                store_session_dataset('tw2', result['data'], result['columns'])
                 session['tw2_columns'] = result['columns']
                 session['original_filename'] = file.filename
+                # Metadata and the first page only; the rest comes from /data/tw2
+                result = {**result, **data_page(result['data'], result['columns'], request.form, 'Tag')}
             
             # Use custom JSON encoding
             return Response(
@@ -900,15 +3599,33 @@ def upload_excel():
             header_rows = int(request.form.get('header_rows', 2))
             skip_title_row = request.form.get('skip_title_row', 'true').lower() == 'true'
             
-            # Read the Excel data with configuration
-            result = read_excel_data_safe(filepath, data_start_row=data_start_row, 
-                                        header_rows=header_rows, skip_title_row=skip_title_row)
+            # Read the Excel data with configuration; large .xlsx files are streamed
+            streaming = filename.lower().endswith('.xlsx') and (
+                request.form.get('streaming', '').lower() == 'true'
+                or os.path.getsize(filepath) >= EXCEL_STREAMING_MIN_BYTES)
+            reader = read_excel_data_streaming if streaming else read_excel_data_safe
+            result = reader(filepath, data_start_row=data_start_row,
+                            header_rows=header_rows, skip_title_row=skip_title_row)
             
             if result['success']:
                 # Store in session data
                 session['excel_file'] = filepath
-                session['excel_data'] = result['data']
+                rows = result['data']
+                if result.get('streamed'):
+                    # Already in the dataset store; result['data'] is just the first rows
+                    session['excel_dataset'] = result.pop('dataset')
+                    session.pop('excel_data', None)
+                    if any(request.form.get(arg) for arg in ('offset', 'sort', 'tag_prefix', 'status')):
+                        rows = _dataset_store.get(session['excel_dataset']['id'])
+                else:
+                    store_session_dataset('excel', rows, result['columns'])
                 session['excel_columns'] = result['columns']
+                # Metadata and the first page only; the rest comes from /data/excel
+                page = data_page(rows, result['columns'], request.form, 'Unit_No')
+                if len(rows) < result['row_count']:
+                    page.update(total=result['row_count'], row_count=result['row_count'],
+                                has_more=page['offset'] + len(page['data']) < result['row_count'])
+                result = {**result, **page}
             
             return Response(
                 json.dumps(result, cls=CustomJSONEncoder, ensure_ascii=True),
@@ -923,6 +3640,46 @@ def upload_excel():
             status=500
         )
 
+@app.route('/preview_excel_headers', methods=['POST'])
+def preview_excel_headers():
+    """Detect headers from the first rows of an Excel file, without reading the data"""
+    try:
+        file = request.files.get('file')
+        if file and file.filename:
+            if not allowed_file(file.filename):
+                return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file.filename))
+            file.save(filepath)
+        elif 'excel_file' in session:
+            filepath = session['excel_file']
+        else:
+            return jsonify({'success': False, 'error': 'No file provided'}), 400
+
+        header_rows = int(request.form.get('header_rows', 2))
+        skip_title_row = request.form.get('skip_title_row', 'true').lower() == 'true'
+
+        head_rows = read_excel_head_rows(filepath, max(EXCEL_HEADER_SNIFF_ROWS, header_rows + 1))
+        sniffed = sniff_excel_headers(head_rows, header_rows=header_rows, skip_title_row=skip_title_row)
+        result = {
+            'success': True,
+            'title_row_offset': sniffed['title_row_offset'],
+            'combined_headers': sniffed['excel_headers'],
+            'mapped_headers': sniffed['mapped_headers'],
+            'confidence': sniffed['confidence'],
+            'first_rows': [[safe_string_convert(val) for val in row] for row in head_rows[:5]]
+        }
+        return Response(
+            json.dumps(result, cls=CustomJSONEncoder, ensure_ascii=True),
+            mimetype='application/json'
+        )
+    except Exception as e:
+        error_msg = str(e).encode('ascii', 'ignore').decode('ascii')
+        return Response(
+            json.dumps({'success': False, 'error': error_msg}, ensure_ascii=True),
+            mimetype='application/json',
+            status=500
+        )
+
 @app.route('/debug_excel', methods=['GET'])
 def debug_excel():
     """Debug endpoint to show raw Excel data"""
@@ -931,7 +3688,7 @@ def debug_excel():
     
     try:
         file_path = session['excel_file']
-        df_raw = pd.read_excel(file_path, sheet_name=0, header=None)
+        df_raw = read_excel_sheet_cached(file_path, sheet_name=0)
         
         # Get first 5 rows as lists
         debug_info = {
@@ -959,7 +3716,7 @@ def debug_headers():
     
     try:
         file_path = session['excel_file'] 
-        df_raw = pd.read_excel(file_path, sheet_name=0, header=None)
+        df_raw = read_excel_sheet_cached(file_path, sheet_name=0)
         
         # Show header processing step by step
         title_row_offset = 1  # Skip title row
@@ -997,7 +3754,7 @@ def debug_data():
     
     try:
         file_path = session['excel_file'] 
-        df_raw = pd.read_excel(file_path, sheet_name=0, header=None)
+        df_raw = read_excel_sheet_cached(file_path, sheet_name=0)
         
         # Simulate the data extraction with default settings
         data_start_row = 4  # This should be row 4 (index 3)
@@ -1109,11 +3866,13 @@ def upload_updated_tw2():
         
         if result['success']:
             # Store updated TW2 data and file path in session
-            session['updated_tw2_data'] = result['data']
+            store_session_dataset('updated_tw2', result['data'], result['columns'])
             session['updated_tw2_columns'] = result['columns']
             session['updated_tw2_filename'] = filename
             session['updated_tw2_records'] = result['row_count']
             session['updated_tw2_path'] = persistent_path  # Local copy for refresh
+            session.pop('updated_tw2_projection', None)
+            session.pop('updated_tw2_full_dataset', None)
             
             # Store original path if provided for remote refresh capability
             if original_path:
@@ -1139,163 +3898,170 @@ def upload_updated_tw2():
         print(f"Error in upload_updated_tw2: {str(e)}")
         return jsonify({'error': f'Error processing updated TW2 file: {str(e)}'}), 500
 
-@app.route('/apply_mapping', methods=['POST'])
-def apply_mapping():
-    """Apply the mapping and update the tw2 database"""
+def write_mapping(tw2_file, excel_data, mappings, approved_plan=None, progress=None):
+    """Back up tw2_file, write the mapped Excel values and journal the change.
+
+    Needs no request context, so it runs the same inline or as a background job
+    (progress is passed on to execute_write_plan). Returns the apply_mapping result.
+    """
+    backup = backup_tw2_file(tw2_file, 'apply_mapping')
+    
+    old_cache_key = _tw2_read_cache.make_key(tw2_file)
+    conn = get_mdb_connection(tw2_file)
     try:
-        data = request.json
-        mappings = data.get('mappings', {})
-        
-        if not session.get('tw2_file') or not session.get('excel_data'):
-            return Response(
-                json.dumps({'success': False, 'error': 'Files not loaded'}, ensure_ascii=True),
-                mimetype='application/json',
-                status=400
-            )
-        
-        # Create a backup
-        backup_path = session['tw2_file'] + '.backup_' + datetime.now().strftime('%Y%m%d_%H%M%S')
-        shutil.copy2(session['tw2_file'], backup_path)
-        
-        # Connect to the database
-        conn = get_mdb_connection(session['tw2_file'])
         cursor = conn.cursor()
-        
-        updated_records = 0
-        errors = []
-        
-        # Process each Excel row
-        for excel_row in session['excel_data']:
-            try:
-                # Get the Tag value from Excel to match with tw2
-                tag_field = mappings.get('Tag')
-                if not tag_field:
-                    continue
-                    
-                tag_value = excel_row.get(tag_field)
-                if not tag_value:
-                    continue
-                
-                # Normalize tag format for matching (V-1-1 -> V-1-01)
-                normalized_tag = normalize_tag_format(str(tag_value))
-                print(f"Original tag: {tag_value} -> Normalized: {normalized_tag}")
-                
-                # Implement batched field updates to avoid SQL parameter limits
-                print(f"Debug - All mappings received: {mappings}")
-                
-                # Group fields into smaller batches to isolate the problematic field
-                field_batches = [
-                    ['UnitSize', 'InletSize', 'CFMDesign'],      # Batch 1: Size and design fields
-                    ['CFMMinPrime', 'CFMMin'],                   # Batch 2a: CFM Min fields
-                    ['HWCFM', 'HeatingPrimaryAirflow'],                 # Batch 2b: Heating airflow fields
-                    ['HWGPM']                                    # Batch 3: GPM field
-                ]
-                
-                record_updated = False
-                batch_success_count = 0
-                
-                for batch_num, batch_fields in enumerate(field_batches, 1):
-                    update_fields = []
-                    params = []
-                    
-                    # Build update for this batch
-                    for tw2_field in batch_fields:
-                        if tw2_field in mappings:
-                            excel_field = mappings[tw2_field]
-                            if excel_field in excel_row:
-                                value = excel_row[excel_field]
-                                
-                                # Special handling for Unit_Size mapping
-                                if excel_field == 'Unit_Size' and tw2_field in ['UnitSize', 'InletSize']:
-                                    # Clean and format the value first
-                                    cleaned_value = clean_size_value(value)
-                                    
-                                    if tw2_field == 'UnitSize':
-                                        # UnitSize always gets the cleaned Unit_Size value
-                                        final_value = cleaned_value
-                                    elif tw2_field == 'InletSize':
-                                        # InletSize: special case when Unit_Size = 40, then InletSize = "24x16"
-                                        # Otherwise, InletSize gets the same value as UnitSize
-                                        try:
-                                            unit_size_num = int(float(str(cleaned_value)))
-                                            if unit_size_num == 40:
-                                                final_value = "24x16"
-                                            else:
-                                                final_value = cleaned_value
-                                        except (ValueError, TypeError):
-                                            # If not a number, use cleaned value as-is
-                                            final_value = cleaned_value
-                                    
-                                    update_fields.append(f"[{tw2_field}] = ?")
-                                    if final_value is None or (isinstance(final_value, str) and str(final_value).strip() == ''):
-                                        params.append(None)
-                                    else:
-                                        params.append(final_value)
-                                    print(f"Debug - Batch {batch_num}: Unit_Size special mapping {tw2_field} = {final_value} (from {value})")
-                                    
-                                else:
-                                    # Standard field mapping - apply size cleaning if it's a size field
-                                    if tw2_field in ['UnitSize', 'InletSize'] or 'Size' in tw2_field:
-                                        cleaned_value = clean_size_value(value)
-                                        final_value = cleaned_value
-                                    else:
-                                        final_value = value
-                                    
-                                    update_fields.append(f"[{tw2_field}] = ?")
-                                    # Convert empty strings to None for database
-                                    if final_value is None or (isinstance(final_value, str) and str(final_value).strip() == ''):
-                                        params.append(None)
-                                    else:
-                                        params.append(final_value)
-                                    print(f"Debug - Batch {batch_num}: Adding field {tw2_field} = {final_value}")
-                    
-                    # Execute batch if we have fields to update
-                    if update_fields:
-                        # Add the WHERE clause parameter - use normalized tag for matching
-                        params.append(normalized_tag)
-                        
-                        query = f"""
-                            UPDATE tblSchedule 
-                            SET {', '.join(update_fields)}
-                            WHERE [Tag] = ?
-                        """
-                        
-                        print(f"Debug - Batch {batch_num} query: {query}")
-                        print(f"Debug - Batch {batch_num} params: {params}")
-                        
-                        try:
-                            cursor.execute(query, params)
-                            if cursor.rowcount > 0:
-                                batch_success_count += 1
-                                record_updated = True
-                                print(f"Debug - Batch {batch_num} successful for {tag_value}")
-                            else:
-                                print(f"Debug - Batch {batch_num} no rows affected for {tag_value}")
-                        except Exception as batch_error:
-                            error_msg = f"Batch {batch_num} error for {tag_value}: {str(batch_error)}"
-                            errors.append(error_msg)
-                            print(error_msg)
-                
-                if record_updated:
-                    updated_records += 1
-                    print(f"Debug - Successfully updated {tag_value} with {batch_success_count}/{len(field_batches)} batches")
-                    
-            except Exception as e:
-                error_msg = f"Error updating {tag_value}: {str(e)}"
-                errors.append(error_msg)
-                print(error_msg)
-        
-        # Commit the changes
+
+        # Resolve mapped TW2 fields against the real column names once
+        schema = get_tw2_schema(tw2_file, cursor)
+
+        started = time.perf_counter()
+        raw_values = {}
+        if approved_plan is not None:
+            # The preview already resolved and diffed against this file version;
+            # only the journal's before values are read here
+            plan = approved_plan
+            read_tw2_current_values(cursor, list(dict.fromkeys(
+                column for _, columns in plan['groups'] for column in columns)), raw_values)
+        else:
+            resolved_columns, column_errors = resolve_mapping_columns(schema['lookup'], mappings)
+            current_values = read_tw2_current_values(
+                cursor, list(dict.fromkeys(resolved_columns.values())), raw_values)
+            plan = plan_mapping_writes(excel_data, mappings, resolved_columns, current_values)
+            plan['errors'] = column_errors + plan['errors']
+        errors = list(plan['errors'])
+
+        # All statements run in one transaction, committed once at the end
+        written, write_errors, statements, retried, written_groups = execute_write_plan(
+            cursor, plan['groups'], plan['row_labels'], progress)
+        errors.extend(write_errors)
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
+    elapsed = time.perf_counter() - started
+    journal_batch = _change_journal.record(tw2_file, 'apply_mapping',
+                                           journal_cells(plan['groups'], written_groups, raw_values))
+    _tw2_schema_cache.carry_forward(tw2_file, schema)
+    # Re-read just the changed units (Single columns read back rounded)
+    refresh_tw2_rows(tw2_file, old_cache_key, plan['changed_tags'])
+
+    updated_records = len(written)
+    write_stats = {
+        'rows': updated_records,
+        'statements': statements,
+        'retried_rows': retried,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(updated_records / elapsed, 1) if elapsed > 0 else None
+    }
+    logger.info(f"APPLY: updated {updated_records} rows ({len(plan['changes'])} cells, "
+                f"{len(plan['unchanged_tags'])} unchanged) with {statements} statements in {elapsed:.3f}s")
+
+    result = {
+        'success': True,
+        'updated_records': updated_records,
+        'changed_cells': len(plan['changes']),
+        'unchanged_cells': plan['unchanged_cells'],
+        'changed_tags': plan['changed_tags'],
+        'unchanged_tags': plan['unchanged_tags'],
+        'missing_tags': plan['missing_tags'],
+        'from_preview': approved_plan is not None,
+        'journal_batch': journal_batch['batch'] if journal_batch else None,
+        'backup_id': backup['id'],
+        'write_stats': write_stats,
+        'errors': errors if errors else None
+    }
+
+    return result
+
+
+@app.route('/apply_mapping', methods=['POST'])
+def apply_mapping():
+    """Apply the mapping and update the tw2 database"""
+    try:
+        data = request.json
+        mappings = data.get('mappings', {})
         
-        result = {
-            'success': True,
-            'updated_records': updated_records,
-            'backup_file': backup_path,
-            'errors': errors if errors else None
-        }
+        excel_data = load_session_dataset('excel')
+        session_tw2 = session.get('tw2_file')
+        if not session_tw2 or not excel_data:
+            return Response(
+                json.dumps({'success': False, 'error': 'Files not loaded'}, ensure_ascii=True),
+                mimetype='application/json',
+                status=400
+            )
         
+        if data.get('dry_run'):
+            fingerprint = tw2_file_fingerprint(session['tw2_file'])
+            preview = preview_mapping_writes(session['tw2_file'], excel_data, mappings)
+            if not preview['success']:
+                return Response(
+                    json.dumps(preview, ensure_ascii=True),
+                    mimetype='application/json',
+                    status=500
+                )
+            plan = preview['plan']
+            token = _mapping_previews.put({
+                'fingerprint': fingerprint,
+                'excel_id': session_dataset_id('excel'),
+                'plan': plan
+            })
+            result = {
+                'success': True,
+                'dry_run': True,
+                'preview_token': token,
+                'expires_in': MAPPING_PREVIEW_TTL,
+                'changes': plan['changes'],
+                'changed_cells': len(plan['changes']),
+                'unchanged_cells': plan['unchanged_cells'],
+                'changed_tags': plan['changed_tags'],
+                'unchanged_tags': plan['unchanged_tags'],
+                'missing_tags': plan['missing_tags'],
+                'tw2_cache_hit': preview['tw2_cache_hit'],
+                'elapsed_ms': preview['elapsed_ms'],
+                'errors': plan['errors'] if plan['errors'] else None
+            }
+            return Response(
+                json.dumps(result, cls=CustomJSONEncoder, ensure_ascii=True),
+                mimetype='application/json'
+            )
+
+        # A preview token applies exactly the previewed change set, provided
+        # neither the TW2 file nor the Excel data changed in between
+        approved_plan = None
+        preview_token = data.get('preview_token')
+        if preview_token:
+            preview = _mapping_previews.take(str(preview_token))
+            if preview is None:
+                error = 'Preview expired or not found; run the preview again'
+            elif (preview['fingerprint'] != tw2_file_fingerprint(session['tw2_file'])
+                  or preview['excel_id'] != session_dataset_id('excel')):
+                error = MAPPING_PREVIEW_STALE_ERROR
+            else:
+                error = None
+                approved_plan = preview['plan']
+            if error:
+                return Response(
+                    json.dumps({'success': False, 'error': error}, ensure_ascii=True),
+                    mimetype='application/json',
+                    status=409
+                )
+
+        if data.get('background'):
+            fingerprint = preview['fingerprint'] if approved_plan is not None else None
+
+            def run_mapping_job(job):
+                # The job may wait behind others; the file must still be the previewed one
+                if fingerprint is not None and tw2_file_fingerprint(session_tw2) != fingerprint:
+                    return {'success': False, 'error': MAPPING_PREVIEW_STALE_ERROR, 'status': 409}
+                return write_mapping(session_tw2, excel_data, mappings, approved_plan, job.progress)
+
+            job = _jobs.submit('apply_mapping', job_owner_key(), run_mapping_job)
+            return jsonify(job_submitted_response(job)), 202
+
+        result = write_mapping(session_tw2, excel_data, mappings, approved_plan)
+
         return Response(
             json.dumps(result, cls=CustomJSONEncoder, ensure_ascii=True),
             mimetype='application/json'
@@ -1335,6 +4101,86 @@ def download_merged_tw2():
         return jsonify({'error': f'Failed to download TW2 file: {str(e)}'}), 500
 
 
+def write_hw_rows(target_file, edits, progress=None):
+    """Back up target_file, write validated HW Rows edits and journal the change.
+
+    Runs inline or as a background job, like write_mapping. Returns the
+    save_hw_rows result.
+    """
+    backup = backup_tw2_file(target_file, 'save_hw_rows')
+
+    old_cache_key = _tw2_read_cache.make_key(target_file)
+    errors = []
+
+    conn = get_mdb_connection(target_file)
+    try:
+        cursor = conn.cursor()
+        try:
+            schema = get_tw2_schema(target_file, cursor)
+            hw_rows_columns = hw_rows_columns_for(schema)
+        except Exception as e:
+            print(f"HW ROWS: Unable to inspect columns: {e}")
+            schema = None
+            hw_rows_columns = ('HWRowsCalc',)
+
+        raw_values = {}
+        current_values = read_tw2_current_values(cursor, list(hw_rows_columns), raw_values)
+        entries = []
+        row_labels = {}
+        for index, edit in enumerate(edits):
+            unit_tag = edit.get('unit_tag')
+            if unit_tag in (None, ''):
+                errors.append('Missing unit tag in edit payload')
+                continue
+            unit_tag = str(unit_tag)
+            clean_tag = unit_tag.split('  ')[0] if '  ' in unit_tag else unit_tag
+            if clean_tag.upper() not in current_values:
+                errors.append(f"No record found for tag: {clean_tag}")
+                continue
+            hw_rows_value = int(edit['hw_rows'])
+            row_labels[index] = clean_tag
+            entries.append((index, [hw_rows_value] * len(hw_rows_columns) + [clean_tag]))
+
+        # One prepared statement for every edit, committed as one transaction
+        groups = {('HW Rows', hw_rows_columns): entries}
+        written, write_errors, _, _, written_groups = execute_write_plan(cursor, groups, row_labels, progress)
+        errors.extend(write_errors)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    updated_count = len(written)
+    journal_batch = _change_journal.record(target_file, 'save_hw_rows',
+                                           journal_cells(groups, written_groups, raw_values))
+    updates = {}
+    for index, params in entries:
+        if index in written:
+            updates[params[-1]] = dict(zip(hw_rows_columns, params))
+    if schema is not None:
+        _tw2_schema_cache.carry_forward(target_file, schema)
+        write_through_tw2_cache(target_file, old_cache_key, schema, updates)
+    else:
+        invalidate_tw2_cache(target_file)
+    logger.info(f"HW ROWS: updated {updated_count} of {len(edits)} edits in {target_file}")
+
+    result = {
+        'success': True,
+        'updated_count': updated_count,
+        'journal_batch': journal_batch['batch'] if journal_batch else None,
+        'backup_id': backup['id'],
+        'target_file': os.path.basename(target_file),
+        'target_path': target_file
+    }
+
+    if errors:
+        result['warnings'] = errors
+
+    return result
+
+
 @app.route('/save_hw_rows', methods=['POST'])
 def save_hw_rows():
     """Save HW Rows changes to the TW2 file"""
@@ -1374,104 +4220,255 @@ def save_hw_rows():
                 'error': 'Original TW2 file path is not accessible. Please validate the path and try again.'
             }), 400
 
-        target_file = original_tw2_path
-
-        backup_path = target_file + '.backup_hw_rows_' + datetime.now().strftime('%Y%m%d_%H%M%S')
-        shutil.copy2(target_file, backup_path)
+        if data.get('background'):
+            job = _jobs.submit('save_hw_rows', job_owner_key(),
+                               lambda job: write_hw_rows(original_tw2_path, edits, job.progress))
+            return jsonify(job_submitted_response(job)), 202
 
-        conn = get_mdb_connection(target_file)
-        cursor = conn.cursor()
+        return jsonify(write_hw_rows(original_tw2_path, edits))
 
-        hw_rows_columns = []
-        try:
-            cursor.execute("SELECT * FROM tblSchedule WHERE 1=0")
-            column_lookup = {(desc[0] or '').lower(): desc[0] for desc in (cursor.description or [])}
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to save HW Rows: {str(e)}'
+        }), 500
 
-            hwrows_calc_column = column_lookup.get('hwrowscalc') or 'HWRowsCalc'
-            hw_rows_columns.append(hwrows_calc_column)
 
-            hwrows_column = column_lookup.get('hwrows')
-            if hwrows_column and hwrows_column not in hw_rows_columns:
-                hw_rows_columns.append(hwrows_column)
+@app.route('/backups', methods=['GET'])
+def list_backups():
+    """Backups of this session's TW2 files, newest first"""
+    try:
+        return jsonify({'success': True, 'backups': _backup_store.list(session_tw2_paths())})
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Failed to list backups: {str(e)}'}), 500
 
-            hwrow_column = column_lookup.get('hwrow')
-            if hwrow_column and hwrow_column not in hw_rows_columns:
-                hw_rows_columns.append(hwrow_column)
-        except Exception as e:
-            print(f"HW ROWS: Unable to inspect columns: {e}")
-            hw_rows_columns = hw_rows_columns or ['HWRowsCalc']
 
-        updated_count = 0
-        errors = []
+@app.route('/restore_backup', methods=['POST'])
+def restore_backup():
+    """Restore a TW2 file from a backup; the current contents are backed up first"""
+    try:
+        data = request.get_json(silent=True) or {}
+        backup_id = str(data.get('backup_id') or '')
+        manifest = _backup_store.get(backup_id) if backup_id else None
+        if manifest is None:
+            return jsonify({'success': False, 'error': 'Backup not found'}), 404
 
-        for edit in edits:
-            unit_tag = edit.get('unit_tag')
-            hw_rows = edit.get('hw_rows')
+        target_file = manifest['source_path']
+        if target_file not in session_tw2_paths():
+            return jsonify({'success': False, 'error': 'Backup does not belong to a TW2 file in this session'}), 403
 
-            if unit_tag in (None, ''):
-                errors.append('Missing unit tag in edit payload')
-                continue
+        previous = backup_tw2_file(target_file, 'before_restore') if os.path.exists(target_file) else None
+        invalidate_mdb_connections(target_file)
+        _backup_store.restore(backup_id)
+        invalidate_tw2_cache(target_file)
+        logger.info(f"BACKUP: restored {backup_id} over {target_file}")
 
-            try:
-                clean_tag = unit_tag.split('  ')[0] if '  ' in unit_tag else unit_tag
+        return jsonify({
+            'success': True,
+            'backup_id': backup_id,
+            'target_file': os.path.basename(target_file),
+            'target_path': target_file,
+            'previous_backup_id': previous['id'] if previous else None
+        })
 
-                hw_rows_value = int(hw_rows)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to restore backup: {str(e)}'
+        }), 500
 
-                set_clauses = [f'[{column}] = ?' for column in hw_rows_columns]
-                params = [hw_rows_value] * len(hw_rows_columns)
 
-                update_query = f"UPDATE tblSchedule SET {', '.join(set_clauses)} WHERE [Tag] = ?"
-                params.append(clean_tag)
-                cursor.execute(update_query, params)
+@app.route('/journal', methods=['GET'])
+def list_journal():
+    """Journaled write batches for this session's TW2 files, newest first"""
+    try:
+        batches = []
+        for path in session_tw2_paths():
+            batches.extend(_change_journal.batches(path))
+        undone = {batch['undoes'] for batch in batches if batch.get('undoes')}
+        batches.sort(key=lambda batch: batch['batch'], reverse=True)
+        return jsonify({
+            'success': True,
+            'batches': [{**batch, 'filename': os.path.basename(batch['path']), 'cell_count': len(batch['cells']),
+                         'undone': batch['batch'] in undone} for batch in batches]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Failed to read change journal: {str(e)}'}), 500
 
-                if cursor.rowcount > 0:
-                    updated_count += 1
-                    print(f"Updated HW Rows for {clean_tag}: {hw_rows_value}")
-                else:
-                    errors.append(f"No record found for tag: {clean_tag}")
-                    print(f"No record found for tag: {clean_tag}")
 
-            except Exception as e:
-                error_msg = f"Error updating {unit_tag}: {str(e)}"
-                errors.append(error_msg)
-                print(error_msg)
+@app.route('/undo_changes', methods=['POST'])
+def undo_changes():
+    """Revert a journaled write batch (default: the latest not yet undone) with inverse UPDATEs.
 
-        conn.commit()
-        conn.close()
+    Cells that changed again since the batch are reported as conflicts and nothing
+    is written unless 'force' is set.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        batch_id = data.get('batch_id')
+
+        batches = []
+        for path in session_tw2_paths():
+            batches.extend(_change_journal.batches(path))
+        undone = {entry['undoes'] for entry in batches if entry.get('undoes')}
+        if batch_id:
+            batch = next((entry for entry in batches if entry['batch'] == batch_id), None)
+        else:
+            candidates = [entry for entry in batches if not entry.get('undoes') and entry['batch'] not in undone]
+            batch = max(candidates, key=lambda entry: entry['batch']) if candidates else None
+        if batch is None:
+            return jsonify({'success': False, 'error': 'No journaled changes to undo'}), 404
+        if batch['batch'] in undone:
+            return jsonify({'success': False, 'error': f"Batch {batch['batch']} has already been undone"}), 409
+
+        target_file = batch['path']
+        if not os.path.exists(target_file):
+            return jsonify({'success': False, 'error': 'TW2 file for this batch is not accessible'}), 400
+
+        old_cache_key = _tw2_read_cache.make_key(target_file)
+        conn = get_mdb_connection(target_file)
+        try:
+            cursor = conn.cursor()
+            schema = get_tw2_schema(target_file, cursor)
+            columns = list(dict.fromkeys(column for _, column, _, _ in batch['cells']))
+            raw_values = {}
+            current_values = read_tw2_current_values(cursor, columns, raw_values)
+
+            conflicts = []
+            restore = OrderedDict()   # tag -> {column: before}
+            for tag, column, before, after in batch['cells']:
+                current = current_values.get(str(tag).upper())
+                if current is None or not tw2_values_equal(current.get(column), after):
+                    conflicts.append({'tag': tag, 'column': column, 'expected': after,
+                                      'current': current.get(column) if current else None})
+                restore.setdefault(tag, OrderedDict())[column] = before
+            if conflicts and not data.get('force'):
+                conn.rollback()
+                return Response(
+                    json.dumps({'success': False, 'error': 'Some cells changed since this batch was written',
+                                'conflicts': conflicts}, cls=CustomJSONEncoder, ensure_ascii=True),
+                    mimetype='application/json',
+                    status=409
+                )
+
+            groups = OrderedDict()
+            row_labels = {}
+            for index, (tag, values) in enumerate(restore.items()):
+                row_labels[index] = tag
+                groups.setdefault(('Undo', tuple(values)), []).append((index, list(values.values()) + [tag]))
+            written, errors, statements, _, written_groups = execute_write_plan(cursor, groups, row_labels)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        reverted_tags = [row_labels[index] for index in sorted(written)]
+        undo_batch = _change_journal.record(target_file, 'undo', journal_cells(groups, written_groups, raw_values),
+                                            undoes=batch['batch'])
+        _tw2_schema_cache.carry_forward(target_file, schema)
+        refresh_tw2_rows(target_file, old_cache_key, reverted_tags)
+        logger.info(f"UNDO: reverted batch {batch['batch']} ({len(reverted_tags)} tags, {statements} statements)")
 
         result = {
             'success': True,
-            'updated_count': updated_count,
-            'backup_file': os.path.basename(backup_path),
+            'batch_id': batch['batch'],
+            'undo_batch': undo_batch['batch'] if undo_batch else None,
+            'reverted_tags': reverted_tags,
+            'reverted_cells': len(undo_batch['cells']) if undo_batch else 0,
             'target_file': os.path.basename(target_file),
-            'target_path': target_file
+            'conflicts': conflicts or None,
+            'errors': errors or None
         }
-
-        if errors:
-            result['warnings'] = errors
-
-        return jsonify(result)
+        return Response(
+            json.dumps(result, cls=CustomJSONEncoder, ensure_ascii=True),
+            mimetype='application/json'
+        )
 
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Failed to save HW Rows: {str(e)}'
+            'error': f'Failed to undo changes: {str(e)}'
         }), 500
 
 
+def session_table(name):
+    """(rows, columns) of a session dataset as the data viewer shows it, or (None, None)"""
+    rows = load_session_dataset(name)
+    if not rows:
+        return None, None
+    columns = session.get(f'{name}_columns', [])
+
+    # Refreshes only keep the comparison columns; the viewer shows the whole table
+    last_path = session.get('tw2_last_path')
+    if name == 'updated_tw2' and session.get('updated_tw2_projection') and last_path and os.path.exists(last_path):
+        full_rows, full_columns = session_full_tw2_table(last_path)
+        if full_rows is not None:
+            rows, columns = full_rows, full_columns
+    return rows, columns
+
+
+def session_full_tw2_table(file_path):
+    """(rows, columns) of the whole tblSchedule behind a projected 'updated_tw2'.
+
+    Read once per file version and kept in the dataset store as
+    'updated_tw2_full', tagged with the file's fingerprint, so later pages slice
+    the stored table. Returns (None, None) if the file can't be read.
+    """
+    fingerprint = list(tw2_file_fingerprint(file_path))
+    handle = session.get('updated_tw2_full_dataset')
+    if handle and session.get('updated_tw2_full_fingerprint') == fingerprint:
+        rows = _dataset_store.get(handle['id'])
+        if rows is not None:
+            return rows, handle['columns']
+
+    full = read_tw2_data_cached(file_path)
+    if not full.get('success'):
+        return None, None
+    handle = store_session_dataset('updated_tw2_full', full['data'], full['columns'])
+    session['updated_tw2_full_fingerprint'] = fingerprint
+    return full['data'], handle['columns']
+
+
+@app.route('/data/<dataset>', methods=['GET'])
+def get_data_page(dataset):
+    """A page of the session's TW2, Excel or updated TW2 table (see data_page for the arguments)"""
+    try:
+        if dataset not in DATA_TAG_COLUMNS:
+            return jsonify({'success': False, 'error': f'Unknown dataset: {dataset}'}), 404
+        rows, columns = session_table(dataset)
+        if not rows:
+            return jsonify({'success': False, 'error': f'No {dataset} data loaded'}), 400
+
+        status_by_tag = session_comparison_statuses() if request.args.get('status') else None
+        page = data_page(rows, columns, request.args, DATA_TAG_COLUMNS[dataset], status_by_tag)
+        return Response(
+            json.dumps({'success': True, 'dataset': dataset, **page}, cls=CustomJSONEncoder, ensure_ascii=True),
+            mimetype='application/json'
+        )
+
+    except Exception as e:
+        logger.exception(f"Error in get_data_page: {str(e)}")
+        return jsonify({'success': False, 'error': f'Error retrieving {dataset} data: {str(e)}'}), 500
+
+
 @app.route('/get_updated_tw2_data', methods=['GET'])
 def get_updated_tw2_data():
-    """Get updated TW2 data for display"""
+    """Get updated TW2 data for display, one page at a time (same arguments as /data)"""
     try:
-        if not session.get('updated_tw2_data'):
+        data, columns = session_table('updated_tw2')
+        if not data:
             return jsonify({'error': 'No updated TW2 data loaded'}), 400
-        
+
+        status_by_tag = session_comparison_statuses() if request.args.get('status') else None
+        page = data_page(data, columns, request.args, 'Tag', status_by_tag)
+
         # Return the same structure as the original TW2 data viewer
         return Response(
             json.dumps({
                 'success': True,
-                'data': session['updated_tw2_data'],
-                'columns': session.get('updated_tw2_columns', []),
+                **page,
                 'filename': session.get('updated_tw2_filename', 'Unknown'),
                 'records': session.get('updated_tw2_records', 0)
             }, cls=CustomJSONEncoder, ensure_ascii=True),
@@ -1493,22 +4490,26 @@ def compare_performance():
         apd_threshold = float(data.get('apd_threshold', 0.25))
 
         # Check if required data is available
-        if not session.get('excel_data'):
+        excel_data = load_session_dataset('excel')
+        if not excel_data:
             return jsonify({'success': False, 'error': 'Excel data not loaded'}), 400
 
-        reload_info = reload_tw2_data_from_disk()
+        reload_info = reload_tw2_data_from_disk(columns=COMPARISON_TW2_COLUMNS)
         if not reload_info.get('success'):
             status_code = 404 if reload_info.get('code') == 404 else 500
             return jsonify({'success': False, 'error': 'Unable to reload TW2 data: {}'.format(reload_info.get('error'))}), status_code
 
-        updated_tw2_data = session.get('updated_tw2_data')
+        updated_tw2_data = load_session_dataset('updated_tw2')
         if not updated_tw2_data:
             return jsonify({'success': False, 'error': 'Updated TW2 data not loaded'}), 500
 
-        # Perform comparison
-        result = compare_performance_data(
-            session['excel_data'],
+        # Perform comparison (re-using the session's last one where TW2 rows are unchanged)
+        result = compare_performance_incremental(
+            comparison_state_key(),
+            excel_data,
             updated_tw2_data,
+            excel_id=session_dataset_id('excel'),
+            tw2_id=session_dataset_id('updated_tw2'),
             mbh_lat_lower_margin=mbh_lat_lower_margin,
             mbh_lat_upper_margin=mbh_lat_upper_margin,
             wpd_threshold=wpd_threshold,
@@ -1521,10 +4522,12 @@ def compare_performance():
                 'data': {
                     'results': result['results'],
                     'summary': result['summary'],
+                    'comparison_version': result['version'],
                     'tw2_path': reload_info.get('path'),
                     'tw2_source': reload_info.get('source'),
                     'tw2_records': reload_info.get('row_count'),
-                    'tw2_column_count': reload_info.get('column_count')
+                    'tw2_column_count': reload_info.get('column_count'),
+                    'tw2_cache_hit': reload_info.get('cache_hit', False)
                 }
             })
         else:
@@ -1548,7 +4551,14 @@ def debug_session():
             'session_keys': session_keys,
             'session_data': {},
             'flask_session_working': True,
-            'storage_type': 'filesystem'
+            'storage_type': 'filesystem',
+            'connection_pool': _mdb_pool.stats(),
+            'tw2_read_cache': _tw2_read_cache.stats(),
+            'excel_sheet_cache': _excel_sheet_cache.stats(),
+            'dataset_store': _dataset_store.stats(),
+            'backup_store': _backup_store.stats(),
+            'export_cache': _export_cache.stats(),
+            'jobs': _jobs.list(session.get('job_owner_key'))
         }
         
         # Show session data with file info
@@ -1561,6 +4571,10 @@ def debug_session():
                     'exists': os.path.exists(file_path) if file_path else False,
                     'absolute_path': os.path.abspath(file_path) if file_path else None
                 }
+            elif key.endswith('_dataset'):
+                # Dataset handles: show the handle without the column list
+                handle = session[key] or {}
+                debug_info['session_data'][key] = {'id': handle.get('id'), 'row_count': handle.get('row_count')}
             elif key.endswith('_data'):
                 # For data, just show count
                 data = session[key]
@@ -1578,6 +4592,7 @@ def debug_session():
 def clear_session():
     """Debug endpoint to clear session data"""
     try:
+        _comparison_states.discard(session.get('comparison_state_key'))
         session.clear()
         return jsonify({'success': True, 'message': 'Session cleared'})
     except Exception as e:
@@ -1650,7 +4665,7 @@ def validate_tw2_path():
         
         # Try to read the file to ensure it's accessible
         try:
-            result = read_tw2_data_safe(file_path)
+            result = read_tw2_data_cached(file_path)
             if result['success']:
                 return jsonify({
                     'valid': True, 
@@ -1700,7 +4715,7 @@ def refresh_and_compare():
             else:
                 logger.warning(f"REFRESH: [WARNING] Request original path not accessible: {request_original_path}")
 
-        reload_info = reload_tw2_data_from_disk(preferred_paths=preferred_paths)
+        reload_info = reload_tw2_data_from_disk(preferred_paths=preferred_paths, columns=COMPARISON_TW2_COLUMNS)
         if not reload_info.get('success'):
             status_code = 404 if reload_info.get('code') == 404 else 500
             logger.error(f"REFRESH: Unable to reload TW2 data: {reload_info.get('error')}")
@@ -1710,7 +4725,8 @@ def refresh_and_compare():
         tw2_path = reload_info.get('path')
         logger.info(f"REFRESH: Reloaded TW2 data from {tw2_path} (source: {path_source})")
 
-        if not session.get('excel_data'):
+        excel_data = load_session_dataset('excel')
+        if not excel_data:
             return jsonify({
                 'success': True,
                 'data': {
@@ -1721,13 +4737,21 @@ def refresh_and_compare():
                     'tw2_path': tw2_path,
                     'tw2_records': reload_info.get('row_count'),
                     'tw2_column_count': reload_info.get('column_count'),
-                    'skipped_read': False
+                    'skipped_read': reload_info.get('cache_hit', False),
+                    'tw2_cache_hit': reload_info.get('cache_hit', False)
                 }
             })
 
-        comparison_result = compare_performance_data(
-            session['excel_data'],
-            session['updated_tw2_data'],
+        updated_tw2_data = load_session_dataset('updated_tw2')
+        if not updated_tw2_data:
+            return jsonify({'success': False, 'error': 'Updated TW2 data not loaded'}), 500
+
+        comparison_result = compare_performance_incremental(
+            comparison_state_key(),
+            excel_data,
+            updated_tw2_data,
+            excel_id=session_dataset_id('excel'),
+            tw2_id=session_dataset_id('updated_tw2'),
             mbh_lat_lower_margin=mbh_lat_lower_margin,
             mbh_lat_upper_margin=mbh_lat_upper_margin,
             wpd_threshold=wpd_threshold,
@@ -1735,19 +4759,39 @@ def refresh_and_compare():
         )
 
         if comparison_result['success']:
+            comparison_data = {
+                'summary': comparison_result['summary'],
+                'comparison_version': comparison_result['version']
+            }
+            # Clients holding the previous version get only the rows that changed
+            client_version = data.get('base_version')
+            if data.get('incremental') and client_version is not None \
+                    and comparison_result['base_version'] == client_version:
+                comparison_data['delta'] = {
+                    'base_version': client_version,
+                    'changed': [
+                        {'index': i, 'result': comparison_result['results'][i]}
+                        for i in comparison_result['changed']
+                    ]
+                }
+                logger.info(f"REFRESH: {len(comparison_result['changed'])} of "
+                            f"{len(comparison_result['results'])} units changed since version {client_version}")
+            else:
+                comparison_data['results'] = comparison_result['results']
+
             return jsonify({
                 'success': True,
                 'data': {
                     'message': 'TW2 data refreshed and comparison completed successfully',
                     'tw2_refreshed': True,
                     'comparison_available': True,
-                    'results': comparison_result['results'],
-                    'summary': comparison_result['summary'],
+                    **comparison_data,
                     'path_source': path_source,
                     'tw2_path': tw2_path,
                     'tw2_records': reload_info.get('row_count'),
                     'tw2_column_count': reload_info.get('column_count'),
-                    'skipped_read': False
+                    'skipped_read': reload_info.get('cache_hit', False),
+                    'tw2_cache_hit': reload_info.get('cache_hit', False)
                 }
             })
         else:
@@ -1766,123 +4810,445 @@ def refresh_and_compare():
         return jsonify({'success': False, 'error': f'Error during refresh and compare: {str(e)}'}), 500
 
 
-def generate_schedule_data_excel(tw2_data, project_name):
+# tblSchedule columns read by generate_schedule_data_excel
+SCHEDULE_EXPORT_TW2_COLUMNS = (
+    'Tag', 'UnitSize', 'OutletSize', 'CFMDesign', 'CFMMinPrime', 'SPInlet',
+    'SPDownstream', 'SPMin', 'RadNCRoom', 'DisNCRoom', 'HWCFM', 'HWMBHCalc',
+    'HWEATCalc', 'HWEWT', 'HWLATCalc', 'HWAPDCalc', 'HWGPMCalc', 'HWLWTCalc',
+    'HWPDCalc', 'HWRowsCalc', 'HWRows', 'ControlHand', 'HWFPI', 'FluidType',
+    'PctGlycol'
+)
+
+
+SCHEDULE_TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'Schedule_Data_Template.xlsx')
+SCHEDULE_TEMPLATE_ROW = 5                          # first data row; its formatting is reused for the rest
+SCHEDULE_STYLED_COLUMNS = 30                       # columns A-AD carry the data row formatting
+SCHEDULE_ROW_MERGES = ((1, 2), (3, 5), (18, 19))   # A:B, C:E and R:S are merged on every data row
+SCHEDULE_ROW_STYLE_PREFIX = 'Schedule Data row'    # hidden named styles carrying the data row formatting
+
+
+def schedule_row_formats(ws):
+    """Formatting of the (merged) template data row: (font, border, alignment, fill, number format) per column.
+
+    Unformatted columns get None. The first cell of each row merge also gets the
+    right and bottom border of the merge's last cell, as ws.merge_cells gives it.
+    """
+    from copy import copy
+    from openpyxl.styles import Border
+
+    template = [ws.cell(row=SCHEDULE_TEMPLATE_ROW, column=col_num) for col_num in range(1, SCHEDULE_STYLED_COLUMNS + 1)]
+    merge_ends = dict(SCHEDULE_ROW_MERGES)
+    formats = []
+    for col_num, cell in enumerate(template, 1):
+        if not cell.has_style:
+            formats.append(None)
+            continue
+        border = copy(cell.border)
+        if col_num in merge_ends:
+            end_border = template[merge_ends[col_num] - 1].border
+            border = border + Border(right=copy(end_border.right), bottom=copy(end_border.bottom))
+        formats.append((copy(cell.font), border, copy(cell.alignment), copy(cell.fill), cell.number_format))
+    return formats
+
+
+def schedule_row_styles(ws, row_formats=None):
+    """Register the template data row formatting as named styles; returns one name per column.
+
+    A data row cell then takes its font, border, alignment, fill and number format
+    from a single cell.style assignment. Columns formatted alike share a style, and
+    the styles are hidden from Excel's style gallery. row_formats is
+    schedule_row_formats of the template; it is read from ws when not given.
+    """
+    from openpyxl.styles import NamedStyle
+
+    if row_formats is None:
+        row_formats = schedule_row_formats(ws)
+    wb = ws.parent
+    names = {}
+    styles = []
+    for formatting in row_formats:
+        if formatting is None:
+            styles.append(None)
+            continue
+        if formatting not in names:
+            number = len(names) + 1
+            while f"{SCHEDULE_ROW_STYLE_PREFIX} {number}" in wb.named_styles:
+                number += 1
+            font, border, alignment, fill, number_format = formatting
+            style = NamedStyle(name=f"{SCHEDULE_ROW_STYLE_PREFIX} {number}", font=font, border=border,
+                               alignment=alignment, fill=fill, number_format=number_format, hidden=True)
+            wb.add_named_style(style)
+            names[formatting] = style.name
+        styles.append(names[formatting])
+    return styles
+
+
+def _merge_new_schedule_range(ws, row_num, min_col, max_col):
+    """ws.merge_cells for a data row range that is known not to be merged yet.
+
+    merge_cells first compares the range with every merged range on the sheet,
+    which makes merging thousands of rows quadratic. This does the rest of what it
+    does: the range is added to ws.merged_cells and MergedCellRange.format()
+    creates the merged cells (the caller leaves them unset) with the first cell's
+    borders.
+    """
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.merge import MergedCellRange
+
+    merged_range = MergedCellRange(ws, f"{get_column_letter(min_col)}{row_num}:{get_column_letter(max_col)}{row_num}")
+    ws.merged_cells.ranges.add(merged_range)
+    merged_range.format()
+
+
+def schedule_unmerge_ranges(ws):
+    """Merged ranges of the template sheet that load_schedule_template removes"""
+    merged_to_unmerge = []
+    for merged_range in list(ws.merged_cells.ranges):
+        # Unmerge anything in rows 6 and below (will be shifted by row insertions)
+        # and anything in rows 14 and below (will be used for notes)
+        if merged_range.min_row >= 6 or (merged_range.min_row >= 1 and merged_range.max_row >= 6):
+            merged_to_unmerge.append(str(merged_range))
+    return merged_to_unmerge
+
+
+def load_schedule_template(template_path=SCHEDULE_TEMPLATE_FILE, unmerge_ranges=None):
+    """Schedule Data template workbook and sheet, with the merges below the header row removed.
+
+    template_path can be a path or a file-like object. unmerge_ranges is
+    schedule_unmerge_ranges of the template; it is read from the sheet when not given.
+    """
+    from openpyxl import load_workbook
+
+    # Load template file
+    wb = load_workbook(template_path)
+    ws = wb.active
+
+    # IMPORTANT: Unmerge all cells that will be affected by row insertions and notes population
+    # This must be done BEFORE we insert any rows
+    merged_to_unmerge = schedule_unmerge_ranges(ws) if unmerge_ranges is None else unmerge_ranges
+
+    for merged_range_str in merged_to_unmerge:
+        try:
+            ws.unmerge_cells(merged_range_str)
+        except:
+            pass
+
+    return wb, ws
+
+
+def write_schedule_rows(ws, tw2_data, progress=None, row_formats=None):
+    """Lay out one formatted, merged data row per record starting at the template row.
+
+    progress, if given, is called with rows done, total rows and a stage name
+    every JOB_PROGRESS_CHUNK_ROWS rows. row_formats is schedule_row_formats of
+    the merged template row, as ScheduleTemplate.clone returns it.
+    """
+    # Open the whole data block in one shift instead of one insert_rows per
+    # record (each of which moves every cell below it)
+    if len(tw2_data) > 1:
+        ws.insert_rows(SCHEDULE_TEMPLATE_ROW + 1, len(tw2_data) - 1)
+
+    row_styles = None
+    template_row_merged = False
+    # Cells that become part of a merge are left for the merge to create
+    merged_columns = {col_num for min_col, max_col in SCHEDULE_ROW_MERGES for col_num in range(min_col + 1, max_col + 1)}
+
+    def set_row_value(column, row_num, value):
+        ws.cell(row=row_num, column=column).value = value
+
+    def style_row_cells(row_num, columns):
+        for col_num in columns:
+            cell = ws.cell(row=row_num, column=col_num)
+            if row_styles[col_num - 1] is not None:
+                cell.style = row_styles[col_num - 1]
+
+    # Populate data rows starting at row 5
+    for i, record in enumerate(tw2_data):
+        row_num = SCHEDULE_TEMPLATE_ROW + i
+        if progress and i % JOB_PROGRESS_CHUNK_ROWS == 0:
+            progress(i, len(tw2_data), 'Schedule rows')
+
+        if i > 0:
+            # Formatting of the (already populated and merged) template row, registered once
+            if row_styles is None:
+                row_styles = schedule_row_styles(ws, row_formats if template_row_merged else None)
+            style_row_cells(row_num, [col_num for col_num in range(1, len(row_styles) + 1) if col_num not in merged_columns])
+
+        # Populate data columns
+        try:
+            set_row_value(1, row_num, record.get('Tag', ''))             # A
+            set_row_value(6, row_num, 'DESV')                           # F: Model - always DESV
+            set_row_value(7, row_num, record.get('UnitSize', ''))        # G
+            set_row_value(8, row_num, record.get('OutletSize', ''))      # H
+            set_row_value(9, row_num, record.get('CFMDesign', ''))       # I
+            set_row_value(10, row_num, record.get('CFMMinPrime', ''))    # J
+            set_row_value(11, row_num, record.get('SPInlet', ''))        # K
+            set_row_value(12, row_num, record.get('SPDownstream', ''))   # L
+            set_row_value(13, row_num, record.get('SPMin', ''))          # M
+            set_row_value(14, row_num, record.get('RadNCRoom', ''))      # N
+            set_row_value(15, row_num, record.get('DisNCRoom', ''))      # O
+            set_row_value(16, row_num, record.get('HWCFM', ''))          # P
+
+            if record.get('HWMBHCalc'):
+                set_row_value(17, row_num, round(float(record.get('HWMBHCalc', 0))))        # Q
+
+            set_row_value(18, row_num, record.get('HWEATCalc', ''))      # R
+            set_row_value(21, row_num, record.get('HWEWT', ''))          # U
+
+            if record.get('HWLATCalc'):
+                set_row_value(22, row_num, round(float(record.get('HWLATCalc', 0)), 1))     # V
+
+            if record.get('HWAPDCalc'):
+                set_row_value(23, row_num, round(float(record.get('HWAPDCalc', 0)), 2))     # W
+
+            set_row_value(24, row_num, record.get('HWGPMCalc', ''))      # X
+
+            if record.get('HWLWTCalc'):
+                set_row_value(25, row_num, round(float(record.get('HWLWTCalc', 0)), 1))     # Y
+
+            if record.get('HWPDCalc'):
+                set_row_value(26, row_num, round(float(record.get('HWPDCalc', 0)), 2))      # Z
+
+            hw_rows = record.get('HWRowsCalc') or record.get('HWRows', '')
+            control_hand = record.get('ControlHand', '')
+            if hw_rows:
+                set_row_value(27, row_num, f"{hw_rows}-{control_hand}")                      # AA
+
+            set_row_value(28, row_num, record.get('HWFPI', ''))          # AB
+            set_row_value(29, row_num, record.get('ControlHand', ''))    # AC
+
+            # Re-merge cells for this data row to match original template structure
+            for min_col, max_col in SCHEDULE_ROW_MERGES:
+                if i == 0:
+                    ws.merge_cells(start_row=row_num, start_column=min_col, end_row=row_num, end_column=max_col)
+                else:
+                    _merge_new_schedule_range(ws, row_num, min_col, max_col)
+            if i == 0:
+                template_row_merged = True
+
+        except Exception as e:
+            logger.error(f"Error processing row for tag {record.get('Tag', 'Unknown')}: {str(e)}")
+            if i > 0:
+                # The row stays unmerged, so its would-be merged cells get the row formatting too
+                style_row_cells(row_num, sorted(merged_columns))
+            continue
+
+    if progress:
+        progress(len(tw2_data), len(tw2_data), 'Schedule rows')
+
+
+class ScheduleTemplate:
+    """Schedule Data template read from disk once and loaded from memory for every export.
+
+    The file's bytes are kept and each export gets its own workbook from
+    load_workbook on them, so exports never share openpyxl objects and no
+    request re-reads the file. The merges to remove and the data row formatting
+    are worked out once per template version and reused by every export; the
+    workbook itself is still parsed per export, as openpyxl has no way to copy
+    one. The template is re-read when it changes on disk.
+    """
+
+    def __init__(self, template_file=SCHEDULE_TEMPLATE_FILE):
+        self.template_file = template_file
+        self._lock = threading.Lock()
+        self._file_version = None
+        self._template_bytes = None
+        self._unmerge_ranges = None
+        self._row_formats = None
+
+    def clone(self):
+        """(workbook, sheet, row formats) for a new export.
+
+        The workbook and sheet are as load_schedule_template returns them; the row
+        formats are schedule_row_formats of the template, for write_schedule_rows.
+        """
+        from io import BytesIO
+
+        with self._lock:
+            file_version = self._template_file_version()
+            if self._template_bytes is None or file_version != self._file_version:
+                self._load(file_version)
+            template_bytes, unmerge_ranges, row_formats = self._template_bytes, self._unmerge_ranges, self._row_formats
+
+        wb, ws = load_schedule_template(BytesIO(template_bytes), unmerge_ranges)
+        return wb, ws, row_formats
+
+    def _load(self, file_version):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        with open(self.template_file, 'rb') as f:
+            template_bytes = f.read()
+        ws = load_workbook(BytesIO(template_bytes)).active
+        unmerge_ranges = schedule_unmerge_ranges(ws)
+        for merged_range_str in unmerge_ranges:
+            ws.unmerge_cells(merged_range_str)
+        # The data row formatting is read with the template row merged, as write_schedule_rows leaves it
+        for min_col, max_col in SCHEDULE_ROW_MERGES:
+            ws.merge_cells(start_row=SCHEDULE_TEMPLATE_ROW, start_column=min_col, end_row=SCHEDULE_TEMPLATE_ROW, end_column=max_col)
+
+        self._template_bytes = template_bytes
+        self._unmerge_ranges = unmerge_ranges
+        self._row_formats = schedule_row_formats(ws)
+        self._file_version = file_version
+        logger.info(f"Loaded Schedule Data template from {self.template_file}")
+
+    @property
+    def version(self):
+        """(mtime_ns, size) of the template file on disk; the next clone is of this version"""
+        return self._template_file_version()
+
+    def _template_file_version(self):
+        try:
+            stat = os.stat(self.template_file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+
+_schedule_template = ScheduleTemplate()
+
+
+EXPORT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+EXPORT_CACHE_MAX_BYTES = 128 * 1024 * 1024   # disk budget for cached Schedule Data workbooks
+EXPORT_CACHE_FORMAT = 1                      # bump when generate_schedule_data_excel output changes
+
+
+class ExportCache:
+    """Generated Schedule Data workbooks on disk, LRU by total size.
+
+    Keyed by a hash of the report rows, the project name and the template
+    version, so clicking Export again without changes serves the same bytes
+    (and the key doubles as the response ETag).
+    """
+
+    def __init__(self, directory, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> size, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan_disk()
+
+    @staticmethod
+    def make_key(rows, project_name, template_version):
+        payload = pickle.dumps((EXPORT_CACHE_FORMAT, project_name, template_version, rows),
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Workbook bytes for a key, or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            self._forget(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"EXPORT: could not cache export {key}: {e}")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = []
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _forget(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.xlsx")
+
+    def _scan_disk(self):
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.xlsx'):
+                # Leftover temp file from an interrupted write
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-len('.xlsx')], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+
+_export_cache = ExportCache(EXPORT_CACHE_DIR)
+
+
+def generate_schedule_data_excel(tw2_data, project_name, progress=None):
     """Generate Schedule Data Excel report from TW2 data using template"""
     try:
-        from openpyxl import load_workbook
-        from copy import copy
         from openpyxl.styles import Font
         from io import BytesIO
 
-        # Load template file
-        template_path = os.path.join(os.path.dirname(__file__), 'templates', 'Schedule_Data_Template.xlsx')
-        wb = load_workbook(template_path)
-        ws = wb.active
-
-        # IMPORTANT: Unmerge all cells that will be affected by row insertions and notes population
-        # This must be done BEFORE we insert any rows
-        merged_to_unmerge = []
-        for merged_range in list(ws.merged_cells.ranges):
-            # Unmerge anything in rows 6 and below (will be shifted by row insertions)
-            # and anything in rows 14 and below (will be used for notes)
-            if merged_range.min_row >= 6 or (merged_range.min_row >= 1 and merged_range.max_row >= 6):
-                merged_to_unmerge.append(str(merged_range))
-
-        for merged_range_str in merged_to_unmerge:
-            try:
-                ws.unmerge_cells(merged_range_str)
-            except:
-                pass
+        wb, ws, row_formats = _schedule_template.clone()
 
         # Update project name in row 2
         ws['A2'] = project_name
 
-        # Get template row formatting (row 5)
-        template_row = 5
-
         # Helper function to safely set cell value
         def safe_set_cell(cell_ref, value):
             ws[cell_ref].value = value
 
-        # Insert data rows starting at row 5
-        for i, record in enumerate(tw2_data):
-            row_num = 5 + i
-
-            # If not the first data row, insert a new row
-            if i > 0:
-                ws.insert_rows(row_num)
-
-                # Copy formatting from template row to new row
-                for col_num in range(1, 31):  # Columns A-AD
-                    from openpyxl.utils import get_column_letter
-                    col_letter = get_column_letter(col_num)
-
-                    source_cell = ws.cell(row=template_row, column=col_num)
-                    target_cell = ws.cell(row=row_num, column=col_num)
-
-                    # Copy formatting
-                    if source_cell.font:
-                        target_cell.font = copy(source_cell.font)
-                    if source_cell.border:
-                        target_cell.border = copy(source_cell.border)
-                    if source_cell.alignment:
-                        target_cell.alignment = copy(source_cell.alignment)
-                    if source_cell.fill:
-                        target_cell.fill = copy(source_cell.fill)
-                    if source_cell.number_format:
-                        target_cell.number_format = copy(source_cell.number_format)
-
-            # Populate data columns
-            try:
-                safe_set_cell(f'A{row_num}', record.get('Tag', ''))
-                safe_set_cell(f'F{row_num}', 'DESV')  # Model - always DESV
-                safe_set_cell(f'G{row_num}', record.get('UnitSize', ''))
-                safe_set_cell(f'H{row_num}', record.get('OutletSize', ''))
-                safe_set_cell(f'I{row_num}', record.get('CFMDesign', ''))
-                safe_set_cell(f'J{row_num}', record.get('CFMMinPrime', ''))
-                safe_set_cell(f'K{row_num}', record.get('SPInlet', ''))
-                safe_set_cell(f'L{row_num}', record.get('SPDownstream', ''))
-                safe_set_cell(f'M{row_num}', record.get('SPMin', ''))
-                safe_set_cell(f'N{row_num}', record.get('RadNCRoom', ''))
-                safe_set_cell(f'O{row_num}', record.get('DisNCRoom', ''))
-                safe_set_cell(f'P{row_num}', record.get('HWCFM', ''))
-
-                if record.get('HWMBHCalc'):
-                    safe_set_cell(f'Q{row_num}', round(float(record.get('HWMBHCalc', 0))))
-
-                safe_set_cell(f'R{row_num}', record.get('HWEATCalc', ''))
-                safe_set_cell(f'U{row_num}', record.get('HWEWT', ''))
-
-                if record.get('HWLATCalc'):
-                    safe_set_cell(f'V{row_num}', round(float(record.get('HWLATCalc', 0)), 1))
-
-                if record.get('HWAPDCalc'):
-                    safe_set_cell(f'W{row_num}', round(float(record.get('HWAPDCalc', 0)), 2))
-
-                safe_set_cell(f'X{row_num}', record.get('HWGPMCalc', ''))
-
-                if record.get('HWLWTCalc'):
-                    safe_set_cell(f'Y{row_num}', round(float(record.get('HWLWTCalc', 0)), 1))
-
-                if record.get('HWPDCalc'):
-                    safe_set_cell(f'Z{row_num}', round(float(record.get('HWPDCalc', 0)), 2))
-
-                hw_rows = record.get('HWRowsCalc') or record.get('HWRows', '')
-                control_hand = record.get('ControlHand', '')
-                if hw_rows:
-                    safe_set_cell(f'AA{row_num}', f"{hw_rows}-{control_hand}")
-
-                safe_set_cell(f'AB{row_num}', record.get('HWFPI', ''))
-                safe_set_cell(f'AC{row_num}', record.get('ControlHand', ''))
-
-                # Re-merge cells for this data row to match original template structure
-                ws.merge_cells(f'A{row_num}:B{row_num}')
-                ws.merge_cells(f'C{row_num}:E{row_num}')
-                ws.merge_cells(f'R{row_num}:S{row_num}')
-
-            except Exception as e:
-                logger.error(f"Error processing row for tag {record.get('Tag', 'Unknown')}: {str(e)}")
-                continue
+        write_schedule_rows(ws, tw2_data, progress=progress, row_formats=row_formats)
 
         # Place notes section after data
         notes_start_row = 5 + len(tw2_data) + 2
@@ -1943,19 +5309,78 @@ def generate_schedule_data_excel(tw2_data, project_name):
         output.seek(0)
         return output
 
+    except JobCancelled:
+        raise
     except Exception as e:
         logger.exception(f"Error generating schedule data Excel: {str(e)}")
         raise
 
 
+def build_schedule_export(tw2_data, project_name, export_key, progress=None):
+    """Workbook bytes for an export key, generated (and cached) on a cache miss.
+
+    Returns (bytes, export info) where the info is the background job result.
+    """
+    workbook_bytes = _export_cache.get(export_key)
+    cache_hit = workbook_bytes is not None
+    if not cache_hit:
+        workbook_bytes = generate_schedule_data_excel(tw2_data, project_name, progress).getvalue()
+        _export_cache.put(export_key, workbook_bytes)
+    logger.info(f"EXPORT: {len(tw2_data)} units, cache {'hit' if cache_hit else 'miss'} ({export_key})")
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return workbook_bytes, {
+        'success': True,
+        'export_key': export_key,
+        'filename': f"Schedule_Data_{timestamp}.xlsx",
+        'units': len(tw2_data),
+        'cache_hit': cache_hit
+    }
+
+
+def schedule_export_response(workbook_bytes, export):
+    """Download response for a Schedule Data workbook, with its key as ETag"""
+    from io import BytesIO
+
+    response = send_file(
+        BytesIO(workbook_bytes),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=export['filename'],
+        etag=export['export_key']
+    )
+    response.headers['X-Export-Cache'] = 'hit' if export['cache_hit'] else 'miss'
+    return response
+
+
 @app.route('/export_schedule_data', methods=['POST'])
 def export_schedule_data():
     """Export TW2 data as Schedule Data Excel report"""
     try:
-        updated_tw2_data = session.get('updated_tw2_data') or session.get('tw2_data')
+        has_updated_data = bool(session.get('updated_tw2_dataset') or session.get('updated_tw2_data'))
+        updated_tw2_data = load_session_dataset('updated_tw2') or load_session_dataset('tw2')
         if not updated_tw2_data:
             return jsonify({'success': False, 'error': 'TW2 data not loaded'}), 400
 
+        # Read only the report columns from the file the session data came from
+        if has_updated_data:
+            source_path = session.get('tw2_last_path') or session.get('updated_tw2_path')
+        else:
+            source_path = session.get('tw2_file')
+        projected = {'success': False, 'error': f'File not found at {source_path}'}
+        if source_path and os.path.exists(source_path):
+            projected = read_tw2_data_cached(source_path, columns=SCHEDULE_EXPORT_TW2_COLUMNS)
+            if projected.get('success'):
+                updated_tw2_data = projected['data']
+
+        # After a refresh the session only holds the comparison columns, which would
+        # leave most of the report blank; don't fall back to them
+        if has_updated_data and session.get('updated_tw2_projection') and not projected.get('success'):
+            return jsonify({
+                'success': False,
+                'error': f"Unable to re-read the TW2 file for the report: {projected.get('error')}. Reload the TW2 file and try again."
+            }), 409
+
         # Get TW2 file path from session (check all possible locations)
         tw2_path = session.get('original_tw2_path') or session.get('updated_tw2_path') or session.get('tw2_file') or ''
         project_name = None
@@ -1966,7 +5391,6 @@ def export_schedule_data():
 
         # Fallback to filename parsing if database query didn't work
         if not project_name and tw2_path:
-            import os
             filename = os.path.splitext(os.path.basename(tw2_path))[0]
             if ' - ' in filename:
                 project_name = filename.split(' - ')[0].strip()
@@ -1977,23 +5401,94 @@ def export_schedule_data():
         if not project_name:
             project_name = 'VAV Schedule Data'
 
-        excel_file = generate_schedule_data_excel(updated_tw2_data, project_name)
+        # Same rows, project name and template as an earlier export -> same workbook
+        export_key = _export_cache.make_key(updated_tw2_data, project_name, _schedule_template.version)
+        if export_key in request.if_none_match and _export_cache.contains(export_key):
+            response = Response(status=304)
+            response.set_etag(export_key)
+            return response
 
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"Schedule_Data_{timestamp}.xlsx"
+        if (request.get_json(silent=True) or {}).get('background'):
+            job = _jobs.submit('export_schedule_data', job_owner_key(), lambda job: build_schedule_export(
+                updated_tw2_data, project_name, export_key, job.progress)[1])
+            return jsonify(job_submitted_response(job)), 202
 
-        return send_file(
-            excel_file,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+        workbook_bytes, export = build_schedule_export(updated_tw2_data, project_name, export_key)
+        return schedule_export_response(workbook_bytes, export)
 
     except Exception as e:
         logger.exception(f"Error in export_schedule_data: {str(e)}")
         return jsonify({'success': False, 'error': f'Error generating report: {str(e)}'}), 500
 
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """This session's background jobs, oldest first"""
+    return jsonify({'success': True, 'jobs': _jobs.list(job_owner_key())})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream of a job's progress; ends with its done/failed/cancelled event"""
+    job = _jobs.get(job_id, job_owner_key())
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    def stream():
+        version = None
+        while True:
+            snapshot = _jobs.wait(job, version, JOB_STREAM_KEEPALIVE)
+            if snapshot['version'] == version:
+                yield ': keep-alive\n\n'
+                continue
+            version = snapshot['version']
+            event = 'progress' if snapshot['state'] in ('queued', 'running') else snapshot['state']
+            yield f"event: {event}\ndata: {json.dumps(snapshot, cls=CustomJSONEncoder, ensure_ascii=True)}\n\n"
+            if event != 'progress':
+                return
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/jobs/<job_id>/status', methods=['GET'])
+def job_status(job_id):
+    """Current state of a job, for clients that poll instead of streaming"""
+    job = _jobs.get(job_id, job_owner_key())
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return Response(
+        json.dumps({'success': True, 'job': job.snapshot()}, cls=CustomJSONEncoder, ensure_ascii=True),
+        mimetype='application/json'
+    )
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Stop a queued job, or a running one at its next progress report"""
+    job = _jobs.get(job_id, job_owner_key())
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return Response(
+        json.dumps({'success': True, 'job': _jobs.cancel(job)}, cls=CustomJSONEncoder, ensure_ascii=True),
+        mimetype='application/json'
+    )
+
+
+@app.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job_export(job_id):
+    """Workbook produced by a finished export_schedule_data job"""
+    job = _jobs.get(job_id, job_owner_key())
+    if job is None or job.kind != 'export_schedule_data':
+        return jsonify({'success': False, 'error': 'Export job not found'}), 404
+    if job.state != 'done':
+        return jsonify({'success': False, 'error': f'Export job is {job.state}'}), 409
+
+    workbook_bytes = _export_cache.get(job.result['export_key'])
+    if workbook_bytes is None:
+        return jsonify({'success': False, 'error': 'Export is no longer cached; export again'}), 410
+    return schedule_export_response(workbook_bytes, {**job.result, 'cache_hit': True})
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5004)
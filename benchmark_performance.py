@@ -0,0 +1,553 @@
+"""Benchmarks for the VAV Data Merger hot paths.
+
+Uses synthetic data shaped like a real tblSchedule (243 columns, mostly empty
+text fields) and a contractor schedule sheet, so no TW2 file, workbook or
+working ODBC driver is needed:
+
+    python benchmark_performance.py              # run every benchmark
+    python benchmark_performance.py tw2_read     # run one benchmark
+"""
+import sys
+import os
+import time
+import random
+import re
+import decimal
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+
+
+def _timed(func, *args, repeat=3, **kwargs):
+    """Best-of-N wall time for func(*args, **kwargs), plus its last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def make_tw2_description(column_count=243, seed=0):
+    """cursor.description-like tuples with a realistic mix of column types"""
+    rnd = random.Random(seed)
+    weights = [(str, 0.78), (float, 0.15), (int, 0.05), (bool, 0.015), (decimal.Decimal, 0.0025), (datetime, 0.0025)]
+    types, cumulative = [], []
+    total = 0.0
+    for type_code, weight in weights:
+        total += weight
+        types.append(type_code)
+        cumulative.append(total)
+    description = [('Tag', str, None, 255, 255, 0, True)]
+    for i in range(1, column_count):
+        pick = rnd.random() * total
+        type_code = next(t for t, c in zip(types, cumulative) if pick <= c)
+        description.append((f'Column{i}', type_code, None, None, None, None, True))
+    return description
+
+
+def make_tw2_rows(description, unit_count, seed=0):
+    """Rows of raw ODBC-style values matching a description.
+
+    Like a real TW2 file, ~60% of the columns are never filled in and the rest
+    are sparsely NULL.
+    """
+    rnd = random.Random(seed)
+    empty_columns = {i for i in range(1, len(description)) if rnd.random() < 0.6}
+    samples = {
+        str: ['DESV', '14', '20x17.5', 'Hot Water', 'Right', 'n/a', '', 'Standard Outlet'],
+        float: [3000.0, 430.0, 1250.0, 0.25, 82.5, float('nan')],
+        int: [1, 2, 40, 160],
+        bool: [True, False],
+        decimal.Decimal: [decimal.Decimal('1.50'), decimal.Decimal('20.8')],
+        datetime: [datetime(2025, 10, 29, 8, 30)],
+    }
+    rows = []
+    for n in range(unit_count):
+        row = [f'V-{n // 99 + 1}-{n % 99 + 1:02d}']
+        for i, desc in enumerate(description[1:], 1):
+            if i in empty_columns or rnd.random() < 0.1:
+                row.append(None)
+            else:
+                row.append(rnd.choice(samples[desc[1]]))
+        rows.append(tuple(row))
+    return rows
+
+
+def _convert_rows_per_cell(rows, column_names):
+    """The original read_tw2_data_safe conversion loop, kept as the baseline"""
+    data = []
+    for row in rows:
+        row_dict = {}
+        for i, column_name in enumerate(column_names):
+            try:
+                row_dict[column_name] = app.safe_string_convert(row[i])
+            except Exception:
+                row_dict[column_name] = None
+        data.append(row_dict)
+    return data
+
+
+def _convert_rows_batched(rows, column_names, converters, batch_size):
+    data = []
+    for start in range(0, len(rows), batch_size):
+        data.extend(app.convert_rows_columnwise(rows[start:start + batch_size], column_names, converters))
+    return data
+
+
+def bench_tw2_read(unit_counts=(1000, 5000)):
+    """Per-cell safe_string_convert vs. typed column-wise converters"""
+    description = make_tw2_description()
+    column_names = [desc[0] for desc in description]
+    print(f"TW2 row conversion ({len(column_names)} columns)")
+    for unit_count in unit_counts:
+        rows = make_tw2_rows(description, unit_count)
+        baseline_time, baseline = _timed(_convert_rows_per_cell, rows, column_names)
+        converters = app.build_column_converters(description)
+        typed_time, typed = _timed(_convert_rows_batched, rows, column_names, converters, app.TW2_FETCH_BATCH_SIZE)
+        assert typed == baseline, 'typed converters changed the output'
+        print(f"  {unit_count:>6} units: per-cell {baseline_time * 1000:8.1f} ms | "
+              f"column-wise {typed_time * 1000:8.1f} ms | {baseline_time / typed_time:4.1f}x")
+
+
+def make_excel_frame(unit_count, seed=0):
+    """A cleaned schedule DataFrame as read_excel_data_safe sees it after header mapping"""
+    rnd = random.Random(seed)
+    columns = {
+        'Unit_No': lambda n: f'V-{n // 99 + 1}-{n % 99 + 1:02d}',
+        'Unit_Size': lambda n: rnd.choice(['6"', '8"', '10"', 14, 12.0, '24x16']),
+        'Inlet_Size': lambda n: rnd.choice(['8"', '10"', 12, None]),
+        'Outlet_Size': lambda n: rnd.choice(['20"x17.5"', '14x10', None]),
+        'CFM_Max': lambda n: rnd.choice([400, 1250, 3000]),
+        'CFM_Min': lambda n: rnd.choice([100.0, 250.5, float('nan')]),
+        'Heating_CFM': lambda n: rnd.choice([300, 'n/a', None]),
+        'Manufacturer_Model': lambda n: rnd.choice(['DESV', 'DESV-HW', 'Titus\u2122 DESV']),
+        'Hot_Water_GPM': lambda n: rnd.choice([1.5, 2, None]),
+        'Notes': lambda n: rnd.choice([None, '', 'See plan', 'N/A']),
+    }
+    data = {name: [make(n) for n in range(unit_count)] for name, make in columns.items()}
+    return pd.DataFrame(data)
+
+
+def _excel_records_per_row(df):
+    """The original read_excel_data_safe size cleanup and iterrows loop, kept as the baseline"""
+    df = df.copy()
+    for col in ['Unit_Size', 'Inlet_Size', 'Outlet_Size']:
+        df[col] = df[col].apply(app.clean_size_value)
+    data = []
+    for _, row in df.iterrows():
+        row_dict = {}
+        for col in df.columns:
+            try:
+                row_dict[col] = app.safe_string_convert(row[col])
+            except Exception:
+                row_dict[col] = None
+        data.append(row_dict)
+    return data
+
+
+def _excel_records_vectorized(df):
+    df = df.copy()
+    for col in ['Unit_Size', 'Inlet_Size', 'Outlet_Size']:
+        df[col] = app.clean_size_series(df[col])
+    return app.excel_frame_to_records(df)
+
+
+def bench_excel_read(unit_counts=(1000, 5000)):
+    """iterrows + per-cell conversion vs. column-wise Excel record building"""
+    print("Excel record conversion")
+    for unit_count in unit_counts:
+        df = make_excel_frame(unit_count)
+        baseline_time, baseline = _timed(_excel_records_per_row, df)
+        vectorized_time, vectorized = _timed(_excel_records_vectorized, df)
+        assert vectorized == baseline, 'vectorized Excel conversion changed the output'
+        print(f"  {unit_count:>6} units: iterrows {baseline_time * 1000:8.1f} ms | "
+              f"column-wise {vectorized_time * 1000:8.1f} ms | {baseline_time / vectorized_time:4.1f}x")
+
+
+def write_excel_schedule(path, unit_count, seed=0):
+    """Write a sales-schedule-shaped .xlsx (title row, two header rows, data from row 4)"""
+    from openpyxl import Workbook
+
+    df = make_excel_frame(unit_count, seed=seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['VAV SCHEDULE'])
+    ws.append(['UNIT NO.', 'UNIT SIZE', 'INLET SIZE', 'OUTLET SIZE', 'CFM', None, 'HEAT',
+               'MANUFACTURER & MODEL NO.', 'GPM', 'NOTES'])
+    ws.append([None, None, None, None, 'MAX', 'MIN', None, None, None, None])
+    for row in df.itertuples(index=False):
+        ws.append([None if isinstance(v, float) and v != v else v for v in row])
+    wb.save(path)
+
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def _read_and_store_excel(path, data_start_row):
+    """upload_excel's DataFrame path: parse the sheet, then put the records in the store"""
+    result = app.read_excel_data_safe(path, data_start_row)
+    app._dataset_store.put(result['data'], result['columns'])
+    return result
+
+
+def bench_excel_stream(unit_counts=(2000, 10000)):
+    """Peak memory of the two upload_excel paths, each ending with the table in the dataset store"""
+    print("Excel upload peak memory")
+    with tempfile.TemporaryDirectory() as tmp:
+        app._dataset_store = app.DatasetStore(os.path.join(tmp, 'datasets'))
+        for unit_count in unit_counts:
+            path = os.path.join(tmp, f'schedule_{unit_count}.xlsx')
+            write_excel_schedule(path, unit_count)
+            app._excel_sheet_cache = app.ExcelSheetCache()   # measure a cold parse
+            frame_peak, frame_result = _peak_memory(_read_and_store_excel, path, 4)
+            stream_peak, stream_result = _peak_memory(app.read_excel_data_streaming, path, 4)
+            assert stream_result['row_count'] == frame_result['row_count'], \
+                'streaming reader returned a different row count'
+            print(f"  {unit_count:>6} units: DataFrame {frame_peak / 1e6:7.1f} MB | "
+                  f"streaming {stream_peak / 1e6:7.1f} MB | {os.path.getsize(path) / 1e6:5.2f} MB file")
+
+
+def make_comparison_data(unit_count, seed=0):
+    """Excel schedule rows and updated TW2 rows for compare_performance_data.
+
+    Mixes the value shapes seen in practice: numbers, numeric text, blanks,
+    zeros, unpadded tags and units missing from the TW2 file.
+    """
+    rnd = random.Random(seed)
+    excel_rows, tw2_rows = [], []
+    for n in range(unit_count):
+        floor, unit = n // 99 + 1, n % 99 + 1
+        excel_tag = rnd.choice([f'V-{floor}-{unit}', f'V-{floor}-{unit:02d}'])
+        mbh = rnd.choice([12.5, 20, '18.4', 0, None, 'TBD', 31.0])
+        lat = rnd.choice([95, 90.5, '100', None, 0, 88])
+        excel_rows.append({'Unit_No': excel_tag, 'Total_MBH': mbh, 'LAT': lat, 'CFM_Max': 400})
+        if rnd.random() < 0.03:
+            continue   # not in the TW2 file
+        base_mbh = float(mbh) if isinstance(mbh, (int, float)) and mbh else 15.0
+        base_lat = float(lat) if isinstance(lat, (int, float)) and lat else 95.0
+        tw2_rows.append({
+            'Tag': f'V-{floor}-{unit:02d}',
+            'HWMBHCalc': rnd.choice([round(base_mbh * rnd.uniform(0.7, 1.4), 2), None]),
+            'HWLATCalc': rnd.choice([round(base_lat * rnd.uniform(0.8, 1.3), 1), None, 'n/a']),
+            'HWPDCalc': rnd.choice([1.2, 4.9, 5.5, 7.25, None]),
+            'HWAPDCalc': rnd.choice([0.1, 0.2, 0.31, None]),
+            'HWRowsCalc': rnd.choice([None, '', 1, 2.0]),
+            'HWRows': rnd.choice([None, '2', 'x']),
+            'HWRow': 1,
+        })
+    rnd.shuffle(tw2_rows)
+    return excel_rows, tw2_rows
+
+
+def _normalize_unit_tag_original(tag):
+    """normalize_unit_tag as it was (pattern compiled on every call), for the baseline"""
+    if not tag:
+        return tag
+    tag_str = str(tag).strip()
+    match = re.match(r'^([A-Z]+-\d+-)(\d+)$', tag_str)
+    if match and len(match.group(2)) == 1:
+        return f"{match.group(1)}{match.group(2).zfill(2)}"
+    return tag_str
+
+
+def _compare_per_row(excel_data, updated_tw2_data, mbh_lat_lower_margin=15, mbh_lat_upper_margin=25, wpd_threshold=5, apd_threshold=0.25):
+    """The original row-by-row compare_performance_data, kept as the baseline"""
+    try:
+        comparison_results = []
+        
+        # Create index mapping for faster lookups with normalized tags
+        tw2_index = {}
+        for row in updated_tw2_data:
+            original_tag = str(row.get('Tag', '')).strip()
+            normalized_tag = _normalize_unit_tag_original(original_tag)
+            tw2_index[normalized_tag] = row
+            # Also keep original tag as backup
+            tw2_index[original_tag] = row
+        
+        for excel_row in excel_data:
+            unit_tag = str(excel_row.get('Unit_No', '')).strip()
+            if not unit_tag:
+                continue
+                
+            # Normalize the Excel unit tag for matching
+            normalized_excel_tag = _normalize_unit_tag_original(unit_tag)
+            
+            # Find matching TW2 record - try normalized first, then original
+            tw2_row = tw2_index.get(normalized_excel_tag) or tw2_index.get(unit_tag)
+            if not tw2_row:
+                comparison_results.append({
+                    'unit_tag': f"{unit_tag} \u001a {normalized_excel_tag}" if normalized_excel_tag != unit_tag else unit_tag,
+                    'status': 'Not Found',
+                    'excel_mbh': excel_row.get('MBH', 'N/A'),
+                    'tw2_mbh': 'N/A',
+                    'mbh_diff': 'N/A',
+                    'excel_lat': excel_row.get('LAT', 'N/A'),
+                    'tw2_lat': 'N/A',
+                    'lat_diff': 'N/A',
+                    'tw2_wpd': 'N/A',
+                    'tw2_apd': 'N/A',
+                    'tw2_hw_rows': None,
+                    'tw2_hw_rows_raw': None,
+                })
+                continue
+            
+            # Extract values
+            excel_mbh = excel_row.get('MBH') or excel_row.get('MBH_Total') or excel_row.get('Total_MBH')
+            excel_lat = excel_row.get('LAT') or excel_row.get('Leaving_Air_Temp')
+            
+            tw2_mbh = tw2_row.get('HWMBHCalc')
+            tw2_lat = tw2_row.get('HWLATCalc')
+            tw2_wpd = tw2_row.get('HWPDCalc')
+            tw2_apd = tw2_row.get('HWAPDCalc')
+
+            tw2_hw_raw = None
+            for hw_key in ('HWRowsCalc', 'HWRows', 'HWRow'):
+                candidate = tw2_row.get(hw_key)
+                if candidate not in (None, ''):
+                    tw2_hw_raw = candidate
+                    break
+            tw2_hw_rows = app.normalize_hw_rows_value(tw2_hw_raw)
+
+            
+            # Calculate differences and status
+            mbh_diff = 'N/A'
+            lat_diff = 'N/A'
+            status_flags = []
+            
+            # MBH comparison with separate upper/lower margins
+            if excel_mbh is not None and tw2_mbh is not None:
+                try:
+                    excel_mbh_val = float(excel_mbh)
+                    tw2_mbh_val = float(tw2_mbh)
+                    if excel_mbh_val != 0:
+                        mbh_diff = ((tw2_mbh_val - excel_mbh_val) / excel_mbh_val) * 100
+                        # Check if outside acceptable range: -15% to +25%
+                        if mbh_diff < -mbh_lat_lower_margin:  # Too low (under by more than 15%)
+                            status_flags.append(f'MBH {mbh_diff:.1f}% (too low)')
+                        elif mbh_diff > mbh_lat_upper_margin:  # Too high (over by more than 25%)
+                            status_flags.append(f'MBH {mbh_diff:.1f}% (too high)')
+                except (ValueError, TypeError):
+                    pass
+            
+            # LAT comparison with separate upper/lower margins
+            if excel_lat is not None and tw2_lat is not None:
+                try:
+                    excel_lat_val = float(excel_lat)
+                    tw2_lat_val = float(tw2_lat)
+                    if excel_lat_val != 0:
+                        lat_diff = ((tw2_lat_val - excel_lat_val) / excel_lat_val) * 100
+                        # Check if outside acceptable range: -15% to +25%
+                        if lat_diff < -mbh_lat_lower_margin:  # Too low (under by more than 15%)
+                            status_flags.append(f'LAT {lat_diff:.1f}% (too low)')
+                        elif lat_diff > mbh_lat_upper_margin:  # Too high (over by more than 25%)
+                            status_flags.append(f'LAT {lat_diff:.1f}% (too high)')
+                except (ValueError, TypeError):
+                    pass
+            
+            # WPD check
+            if tw2_wpd is not None:
+                try:
+                    wpd_val = float(tw2_wpd)
+                    if wpd_val > wpd_threshold:
+                        status_flags.append(f'WPD {wpd_val:.2f}')
+                except (ValueError, TypeError):
+                    pass
+            
+            # APD check
+            if tw2_apd is not None:
+                try:
+                    apd_val = float(tw2_apd)
+                    if apd_val > apd_threshold:
+                        status_flags.append(f'APD {apd_val:.2f}')
+                except (ValueError, TypeError):
+                    pass
+            
+            # Determine overall status
+            if status_flags:
+                status = 'Fail' if any('MBH' in flag or 'LAT' in flag for flag in status_flags) else 'Warning'
+            else:
+                status = 'Pass'
+            
+            comparison_results.append({
+                'unit_tag': f"{unit_tag} \u001a {normalized_excel_tag}" if normalized_excel_tag != unit_tag else unit_tag,
+                'status': status,
+                'status_details': ', '.join(status_flags) if status_flags else 'All within range',
+                'excel_mbh': excel_mbh,
+                'tw2_mbh': tw2_mbh,
+                'mbh_diff': f'{mbh_diff:.1f}%' if isinstance(mbh_diff, (int, float)) else mbh_diff,
+                'excel_lat': excel_lat,
+                'tw2_lat': tw2_lat,
+                'lat_diff': f'{lat_diff:.1f}%' if isinstance(lat_diff, (int, float)) else lat_diff,
+                'tw2_wpd': tw2_wpd,
+                'tw2_apd': tw2_apd,
+                'tw2_hw_rows': tw2_hw_rows,
+                'tw2_hw_rows_raw': tw2_hw_raw if tw2_hw_raw not in (None, '') else None
+            })
+        
+        return {
+            'success': True,
+            'results': comparison_results,
+            'summary': {
+                'total': len(comparison_results),
+                'pass': len([r for r in comparison_results if r['status'] == 'Pass']),
+                'warning': len([r for r in comparison_results if r['status'] == 'Warning']),
+                'fail': len([r for r in comparison_results if r['status'] == 'Fail']),
+                'not_found': len([r for r in comparison_results if r['status'] == 'Not Found'])
+            }
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Error during performance comparison: {str(e)}'
+        }
+
+
+def bench_compare(unit_counts=(1000, 10000, 20000)):
+    """Row-by-row vs. columnar compare_performance_data"""
+    print("Performance comparison")
+    for unit_count in unit_counts:
+        excel_rows, tw2_rows = make_comparison_data(unit_count)
+        baseline_time, baseline = _timed(_compare_per_row, excel_rows, tw2_rows)
+        columnar_time, columnar = _timed(app.compare_performance_data, excel_rows, tw2_rows)
+        assert columnar == baseline, 'columnar comparison changed the output'
+        print(f"  {unit_count:>6} units: per-row {baseline_time * 1000:8.1f} ms | "
+              f"columnar {columnar_time * 1000:8.1f} ms | {baseline_time / columnar_time:4.1f}x")
+
+
+def make_schedule_records(unit_count, seed=0):
+    """TW2 rows carrying the columns the Schedule Data export reads"""
+    rnd = random.Random(seed)
+    records = []
+    for n in range(unit_count):
+        records.append({
+            'Tag': f'V-{n // 99 + 1}-{n % 99 + 1:02d}', 'UnitSize': rnd.choice(['06', '08', '10', '14', '24x16']),
+            'OutletSize': '12x10', 'CFMDesign': rnd.randint(100, 2000), 'CFMMinPrime': rnd.choice([None, 150, 300]),
+            'SPInlet': 0.5, 'SPDownstream': 0.25, 'SPMin': 0.12, 'RadNCRoom': rnd.choice([None, 20]), 'DisNCRoom': 22,
+            'HWCFM': rnd.randint(100, 800), 'HWMBHCalc': rnd.choice([12.34, None, 7.5]), 'HWEATCalc': 55, 'HWEWT': 180,
+            'HWLATCalc': rnd.choice([85.55, None]), 'HWAPDCalc': 0.123, 'HWGPMCalc': 1.9, 'HWLWTCalc': 150.12,
+            'HWPDCalc': rnd.choice([1.234, None]), 'HWRowsCalc': rnd.choice([1, 2, None]), 'HWRows': 2,
+            'ControlHand': rnd.choice(['L', 'R']), 'HWFPI': 10, 'FluidType': 'EG', 'PctGlycol': 30,
+        })
+    return records
+
+
+def _write_schedule_rows_per_row(ws, tw2_data):
+    """The original generate_schedule_data_excel row loop, kept as the baseline"""
+    from copy import copy
+    from openpyxl.utils import get_column_letter
+
+    template_row = 5
+    for i, record in enumerate(tw2_data):
+        row_num = 5 + i
+        if i > 0:
+            ws.insert_rows(row_num)
+            for col_num in range(1, 31):
+                source_cell = ws.cell(row=template_row, column=col_num)
+                target_cell = ws.cell(row=row_num, column=col_num)
+                if source_cell.font:
+                    target_cell.font = copy(source_cell.font)
+                if source_cell.border:
+                    target_cell.border = copy(source_cell.border)
+                if source_cell.alignment:
+                    target_cell.alignment = copy(source_cell.alignment)
+                if source_cell.fill:
+                    target_cell.fill = copy(source_cell.fill)
+                if source_cell.number_format:
+                    target_cell.number_format = copy(source_cell.number_format)
+
+        values = {
+            'A': record.get('Tag', ''), 'F': 'DESV', 'G': record.get('UnitSize', ''), 'H': record.get('OutletSize', ''),
+            'I': record.get('CFMDesign', ''), 'J': record.get('CFMMinPrime', ''), 'K': record.get('SPInlet', ''),
+            'L': record.get('SPDownstream', ''), 'M': record.get('SPMin', ''), 'N': record.get('RadNCRoom', ''),
+            'O': record.get('DisNCRoom', ''), 'P': record.get('HWCFM', ''),
+        }
+        if record.get('HWMBHCalc'):
+            values['Q'] = round(float(record.get('HWMBHCalc', 0)))
+        values['R'] = record.get('HWEATCalc', '')
+        values['U'] = record.get('HWEWT', '')
+        if record.get('HWLATCalc'):
+            values['V'] = round(float(record.get('HWLATCalc', 0)), 1)
+        if record.get('HWAPDCalc'):
+            values['W'] = round(float(record.get('HWAPDCalc', 0)), 2)
+        values['X'] = record.get('HWGPMCalc', '')
+        if record.get('HWLWTCalc'):
+            values['Y'] = round(float(record.get('HWLWTCalc', 0)), 1)
+        if record.get('HWPDCalc'):
+            values['Z'] = round(float(record.get('HWPDCalc', 0)), 2)
+        hw_rows = record.get('HWRowsCalc') or record.get('HWRows', '')
+        if hw_rows:
+            values['AA'] = f"{hw_rows}-{record.get('ControlHand', '')}"
+        values['AB'] = record.get('HWFPI', '')
+        values['AC'] = record.get('ControlHand', '')
+        for column, value in values.items():
+            ws[f'{column}{row_num}'].value = value
+
+        ws.merge_cells(f'A{row_num}:B{row_num}')
+        ws.merge_cells(f'C{row_num}:E{row_num}')
+        ws.merge_cells(f'R{row_num}:S{row_num}')
+
+
+def _layout_schedule(write_rows, records):
+    wb, ws = app.load_schedule_template()
+    write_rows(ws, records)
+    return ws
+
+
+def _cell_formatting(cell):
+    from copy import copy
+
+    if not cell.has_style:
+        return None
+    return (copy(cell.font), copy(cell.border), copy(cell.alignment), copy(cell.fill),
+            cell.number_format, copy(cell.protection))
+
+
+def _schedule_layout(ws):
+    """Values, formatting and merges of a laid-out sheet, for comparing the two writers"""
+    cells = {(cell.row, cell.column): (cell.value, _cell_formatting(cell), type(cell).__name__)
+             for row in ws.iter_rows() for cell in row}
+    return cells, sorted(str(merged_range) for merged_range in ws.merged_cells.ranges)
+
+
+def bench_export(unit_counts=(100, 1000, 5000)):
+    """Per-row insert_rows vs. one block insert for the Schedule Data export rows"""
+    print("Schedule Data export rows")
+    for unit_count in unit_counts:
+        records = make_schedule_records(unit_count)
+        repeat = 1 if unit_count > 1000 else 3
+        baseline_time, baseline = _timed(_layout_schedule, _write_schedule_rows_per_row, records, repeat=repeat)
+        block_time, block = _timed(_layout_schedule, app.write_schedule_rows, records, repeat=repeat)
+        assert _schedule_layout(block) == _schedule_layout(baseline), 'block layout changed the output'
+        print(f"  {unit_count:>6} units: per-row {baseline_time * 1000:8.1f} ms | "
+              f"block {block_time * 1000:8.1f} ms | {baseline_time / block_time:4.1f}x")
+
+
+BENCHMARKS = {
+    'tw2_read': bench_tw2_read,
+    'excel_read': bench_excel_read,
+    'excel_stream': bench_excel_stream,
+    'compare': bench_compare,
+    'export': bench_export,
+}
+
+
+if __name__ == '__main__':
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
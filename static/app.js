@@ -4,6 +4,8 @@
         let updatedTw2Data = null;
         let mappingFields = null;
         let currentMappings = {};
+        let lastComparison = null;  // {version, results} of the table currently shown
+        let lastScheduleReport = null;  // {etag, blob} of the last Schedule Data download
 
         // TW2 field descriptions for tooltips
         const fieldDescriptions = {
@@ -226,6 +228,9 @@
                     columnInfo += `<small><strong>Original Headers:</strong> ${data.header_info.original_headers ? data.header_info.original_headers.join(', ') : 'N/A'}</small><br>`;
                     columnInfo += `<small><strong>Combined Headers:</strong> ${data.header_info.combined_headers ? data.header_info.combined_headers.join(', ') : 'N/A'}</small><br>`;
                     columnInfo += `<small><strong>Mapped Headers:</strong> ${data.columns.join(', ')}</small>`;
+                    if (data.header_info.confidence !== undefined) {
+                        columnInfo += `<br><small><strong>Mapping Confidence:</strong> ${Math.round(data.header_info.confidence * 100)}%</small>`;
+                    }
                     columnInfo += '</div></details>';
                 }
                 
@@ -363,6 +368,92 @@
             }
         }
 
+        // Server-side paging for the data viewers: only one page of rows is fetched and rendered
+        const DATA_PAGE_SIZE = 100;
+        const dataViews = {};   // table id -> {url, title, offset, tagPrefix, sort}
+
+        function resetDataView(tableId, url, title) {
+            dataViews[tableId] = { url: url, title: title, offset: 0, tagPrefix: '', sort: '' };
+            return dataViews[tableId];
+        }
+
+        function dataPageUrl(view) {
+            const params = new URLSearchParams({ offset: view.offset, limit: DATA_PAGE_SIZE });
+            if (view.tagPrefix) params.set('tag_prefix', view.tagPrefix);
+            if (view.sort) params.set('sort', view.sort);
+            return `${view.url}?${params.toString()}`;
+        }
+
+        // Fetch and render the current page of a data view
+        function showDataPage(tableId) {
+            const view = dataViews[tableId];
+            return fetch(dataPageUrl(view))
+                .then(response => response.json().then(data => {
+                    if (!response.ok || !data.success) {
+                        throw new Error(data.error || `HTTP ${response.status}`);
+                    }
+                    renderDataTable(tableId, view, data);
+                }))
+                .catch(error => showToast('Error loading data: ' + error.message, 'error'));
+        }
+
+        function renderDataTable(tableId, view, data) {
+            const first = data.total ? data.offset + 1 : 0;
+            const last = data.offset + data.data.length;
+            const filtered = data.total !== data.row_count ? ` (filtered from ${data.row_count})` : '';
+
+            let html = `<caption class="caption-top">
+                <div class="d-flex align-items-center gap-2">
+                    <button class="btn btn-sm btn-outline-secondary" onclick="pageData('${tableId}', -1)" ${data.offset > 0 ? '' : 'disabled'}>&laquo; Prev</button>
+                    <span>Rows ${first}-${last} of ${data.total}${filtered}</span>
+                    <button class="btn btn-sm btn-outline-secondary" onclick="pageData('${tableId}', 1)" ${data.has_more ? '' : 'disabled'}>Next &raquo;</button>
+                    <input type="text" class="form-control form-control-sm w-auto ms-auto" placeholder="Filter by tag prefix"
+                           value="${view.tagPrefix}" onchange="filterData('${tableId}', this.value)">
+                </div>
+            </caption><thead>`;
+            if (view.title) {
+                html += `<tr><th colspan="${data.columns.length}" class="bg-warning text-dark text-center">${view.title}</th></tr>`;
+            }
+            html += '<tr>';
+            data.columns.forEach(col => {
+                const arrow = view.sort === col ? ' &#9650;' : (view.sort === '-' + col ? ' &#9660;' : '');
+                html += `<th style="cursor: pointer" onclick="sortData('${tableId}', '${col}')">${col}${arrow}</th>`;
+            });
+            html += '</tr></thead><tbody>';
+            data.data.forEach(row => {
+                html += '<tr>';
+                data.columns.forEach(col => {
+                    let value = row[col];
+                    if (value === null || value === undefined) value = '';
+                    html += `<td>${formatByColumn(col, value)}</td>`;
+                });
+                html += '</tr>';
+            });
+            html += '</tbody>';
+
+            document.getElementById(tableId).innerHTML = html;
+        }
+
+        function pageData(tableId, direction) {
+            const view = dataViews[tableId];
+            view.offset = Math.max(0, view.offset + direction * DATA_PAGE_SIZE);
+            showDataPage(tableId);
+        }
+
+        function filterData(tableId, prefix) {
+            const view = dataViews[tableId];
+            view.tagPrefix = prefix.trim();
+            view.offset = 0;
+            showDataPage(tableId);
+        }
+
+        function sortData(tableId, column) {
+            const view = dataViews[tableId];
+            view.sort = view.sort === column ? '-' + column : column;
+            view.offset = 0;
+            showDataPage(tableId);
+        }
+
         // View TW2 Data
         function viewTW2Data() {
             if (!tw2Data) return;
@@ -370,32 +461,9 @@
             document.getElementById('data-preview-section').style.display = 'block';
             document.getElementById('tw2-tab').click();
             
-            const table = document.getElementById('tw2-table');
-            
-            // Show ALL available columns from TW2 data
-            const availableColumns = tw2Data.columns;
-            
-            // Create header - show ALL columns
-            let headerHtml = '<thead><tr>';
-            availableColumns.forEach(col => {
-                headerHtml += `<th>${col}</th>`;
-            });
-            headerHtml += '</tr></thead>';
-            
-            // Create body - show ALL records with scrolling
-            let bodyHtml = '<tbody>';
-            tw2Data.data.forEach((row, index) => {
-                bodyHtml += '<tr>';
-                availableColumns.forEach(col => {
-                    let value = row[col];
-                    if (value === null || value === undefined) value = '';
-                    bodyHtml += `<td>${formatByColumn(col, value)}</td>`;
-                });
-                bodyHtml += '</tr>';
-            });
-            bodyHtml += '</tbody>';
-            
-            table.innerHTML = headerHtml + bodyHtml;
+            // Show ALL available columns, one page of records at a time
+            resetDataView('tw2-table', '/data/tw2', null);
+            showDataPage('tw2-table');
         }
 
         // View Excel Data
@@ -405,29 +473,8 @@
             document.getElementById('data-preview-section').style.display = 'block';
             document.getElementById('excel-tab').click();
             
-            const table = document.getElementById('excel-table');
-            
-            // Create header - show ALL columns
-            let headerHtml = '<thead><tr>';
-            excelData.columns.forEach(col => {
-                headerHtml += `<th>${col}</th>`;
-            });
-            headerHtml += '</tr></thead>';
-            
-            // Create body - show ALL records
-            let bodyHtml = '<tbody>';
-            excelData.data.forEach((row, index) => {
-                bodyHtml += `<tr>`;
-                excelData.columns.forEach(col => {  // Show ALL columns including Unit_No
-                    let value = row[col];
-                    if (value === null || value === undefined) value = '';
-                    bodyHtml += `<td>${formatByColumn(col, value)}</td>`;
-                });
-                bodyHtml += '</tr>';
-            });
-            bodyHtml += '</tbody>';
-            
-            table.innerHTML = headerHtml + bodyHtml;
+            resetDataView('excel-table', '/data/excel', null);
+            showDataPage('excel-table');
         }
 
         // Apply mapping
@@ -437,10 +484,73 @@
                 return;
             }
             
-            if (!confirm('Are you sure you want to apply these mappings? This will update your TW2 database. A backup will be created automatically.')) {
-                return;
-            }
-            
+            // Dry run first so the confirmation can say what will change
+            fetch('/apply_mapping', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ mappings: currentMappings, dry_run: true })
+            })
+            .then(response => response.json())
+            .then(preview => {
+                if (!preview.success) {
+                    showToast('Error previewing mappings: ' + preview.error, 'error');
+                    return;
+                }
+                let summary = `${preview.changed_cells} values on ${preview.changed_tags.length} units will change`;
+                summary += ` (${preview.unchanged_tags.length} units already match`;
+                summary += preview.missing_tags.length ? `, ${preview.missing_tags.length} tags not found in TW2).` : ').';
+                if (preview.changed_cells === 0) {
+                    showToast('TW2 file already matches the Excel data; nothing to update.', 'info');
+                    return;
+                }
+                if (!confirm(`${summary}\n\nApply these changes to your TW2 database? A backup will be created automatically.`)) {
+                    return;
+                }
+                submitMapping(preview.preview_token);
+            })
+            .catch(error => {
+                showToast('Error: ' + error, 'error');
+            });
+        }
+
+        // Follow a background job over Server-Sent Events; resolves with its result
+        function followJob(submitted, onProgress) {
+            return new Promise((resolve, reject) => {
+                const source = new EventSource(submitted.events_url);
+                source.addEventListener('progress', event => {
+                    if (onProgress) onProgress(JSON.parse(event.data));
+                });
+                source.addEventListener('done', event => {
+                    source.close();
+                    resolve(JSON.parse(event.data).result);
+                });
+                source.addEventListener('failed', event => {
+                    source.close();
+                    reject(new Error(JSON.parse(event.data).error || 'Job failed'));
+                });
+                source.addEventListener('cancelled', () => {
+                    source.close();
+                    reject(new Error('Job was cancelled'));
+                });
+            });
+        }
+
+        function jobProgressText(job) {
+            if (job.state === 'queued') return 'Waiting for other jobs to finish...';
+            if (!job.total) return 'Starting...';
+            let text = `${job.done} of ${job.total} rows (${job.percent}%)`;
+            if (job.stage) text += ` - ${job.stage}`;
+            if (job.eta_seconds) text += `, about ${Math.ceil(job.eta_seconds)} s left`;
+            return text;
+        }
+
+        function cancelJob(jobId) {
+            fetch(`/jobs/${jobId}/cancel`, { method: 'POST' });
+        }
+
+        function submitMapping(previewToken) {
             showToast('Applying mappings and updating database...', 'info');
             
             fetch('/apply_mapping', {
@@ -448,20 +558,43 @@
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ mappings: currentMappings })
+                body: JSON.stringify({ mappings: currentMappings, preview_token: previewToken, background: true })
             })
             .then(response => response.json())
+            .then(data => {
+                if (!data.success || !data.job_id) {
+                    return data;
+                }
+                document.getElementById('results-section').style.display = 'block';
+                return followJob(data, job => {
+                    document.getElementById('results-content').innerHTML = `
+                        <h5>Updating TW2 file...</h5>
+                        <p>${jobProgressText(job)}</p>
+                        <button class="btn btn-sm btn-outline-secondary" onclick="cancelJob('${data.job_id}')">Cancel</button>
+                    `;
+                }).catch(error => ({ success: false, error: error.message }));
+            })
             .then(data => {
                 if (data.success) {
                     let message = `Successfully updated ${data.updated_records} records.`;
-                    if (data.backup_file) {
-                        message += ` Backup saved as: ${data.backup_file.split('\\').pop()}`;
+                    if (data.unchanged_tags && data.unchanged_tags.length) {
+                        message += ` ${data.unchanged_tags.length} already matched the Excel data.`;
+                    }
+                    if (data.missing_tags && data.missing_tags.length) {
+                        message += ` ${data.missing_tags.length} tags were not found in the TW2 file.`;
+                    }
+                    if (data.backup_id) {
+                        message += ` Backup saved as: ${data.backup_id}`;
+                    }
+                    if (data.write_stats && data.write_stats.rows_per_second) {
+                        console.log(`Write stats: ${data.write_stats.statements} statements, ${data.write_stats.rows_per_second} rows/s`);
                     }
                     
                     document.getElementById('results-content').innerHTML = `
                         <h5>Update Complete!</h5>
                         <p>${message}</p>
                         ${data.errors ? `<p><strong>Warnings:</strong> ${data.errors.length} issues occurred. Check console for details.</p>` : ''}
+                        ${data.journal_batch ? `<button class="btn btn-sm btn-outline-secondary" onclick="undoChanges('${data.journal_batch}')">Undo these changes</button>` : ''}
                     `;
                     document.getElementById('results-section').style.display = 'block';
                     
@@ -480,6 +613,33 @@
             });
         }
 
+        // Revert one journaled write batch; cells edited since are reported as conflicts
+        function undoChanges(batchId, force = false) {
+            fetch('/undo_changes', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ batch_id: batchId, force: force })
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    showToast(`Reverted ${data.reverted_cells} values on ${data.reverted_tags.length} units`, 'success');
+                } else if (data.conflicts && !force) {
+                    const tags = [...new Set(data.conflicts.map(conflict => conflict.tag))].join(', ');
+                    if (confirm(`${data.conflicts.length} values were changed again since this update (${tags}).\n\nUndo anyway and overwrite them?`)) {
+                        undoChanges(batchId, true);
+                    }
+                } else {
+                    showToast('Error undoing changes: ' + data.error, 'error');
+                }
+            })
+            .catch(error => {
+                showToast('Error: ' + error, 'error');
+            });
+        }
+
         function downloadMergedFile() {
             const link = document.createElement('a');
             link.href = '/download_merged_tw2';
@@ -610,7 +770,8 @@
 
         // Display Updated TW2 Data in the TW2 table
         function displayUpdatedTW2Data() {
-            fetch('/get_updated_tw2_data')
+            const view = resetDataView('tw2-table', '/get_updated_tw2_data', 'Updated TW2 Data (Post-Titus Teams)');
+            fetch(dataPageUrl(view))
             .then(response => {
                 if (!response.ok) {
                     if (response.status === 400) {
@@ -623,32 +784,8 @@
             })
             .then(data => {
                 if (data.success) {
-                    const table = document.getElementById('tw2-table');
-                    
-                    // Show ALL available columns from updated TW2 data
-                    const availableColumns = data.columns;
-                    
-                    // Create header with indication this is updated data
-                    let headerHtml = '<thead><tr><th colspan="' + availableColumns.length + '" class="bg-warning text-dark text-center">Updated TW2 Data (Post-Titus Teams)</th></tr><tr>';
-                    availableColumns.forEach(col => {
-                        headerHtml += `<th>${col}</th>`;
-                    });
-                    headerHtml += '</tr></thead>';
-                    
-                    // Create body - show ALL records with scrolling
-                    let bodyHtml = '<tbody>';
-                    data.data.forEach((row, index) => {
-                        bodyHtml += '<tr>';
-                        availableColumns.forEach(col => {
-                            let value = row[col];
-                            if (value === null || value === undefined) value = '';
-                            bodyHtml += `<td>${formatByColumn(col, value)}</td>`;
-                        });
-                        bodyHtml += '</tr>';
-                    });
-                    bodyHtml += '</tbody>';
-                    
-                    table.innerHTML = headerHtml + bodyHtml;
+                    // Show ALL available columns from updated TW2 data, one page at a time
+                    renderDataTable('tw2-table', view, data);
                 } else if (data.error && data.expected) {
                     // Expected error - no TW2 data uploaded yet
                     const tableContainer = document.getElementById('tw2-table');
@@ -760,6 +897,7 @@
                 if (data.success) {
                     const payload = data.data || {};
                     displayComparisonResults(payload.results, payload.summary);
+                    lastComparison = { version: payload.comparison_version, results: payload.results };
 
                     const summary = payload.summary || {};
                     const totalUnits = typeof summary.total !== 'undefined' ? summary.total : null;
@@ -797,8 +935,8 @@
         }
 
         // Setup HW Rows editing functionality
-        function setupHWRowsEditing() {
-            const hwRowsSelects = document.querySelectorAll('.hw-rows-select');
+        function setupHWRowsEditing(root) {
+            const hwRowsSelects = (root || document).querySelectorAll('.hw-rows-select');
 
             hwRowsSelects.forEach(select => {
                 select.addEventListener('change', function() {
@@ -954,6 +1092,70 @@
         window.resetHWRows = resetHWRows;
 
 
+        // One row of the comparison table
+        function comparisonRowHtml(result) {
+            const statusClass = result.status === 'Pass' ? 'comparison-pass' : 
+                              result.status === 'Warning' ? 'comparison-warning' : 
+                              result.status === 'Fail' ? 'comparison-fail' : '';
+            
+            return `
+                <tr class="${statusClass}">
+                    <td class="unit-tag">${result.unit_tag}</td>
+                    <td class="status-${result.status.toLowerCase()}">${result.status}</td>
+                    <td class="comparison-value">${formatNumber(result.excel_mbh) || 'N/A'}</td>
+                    <td class="comparison-value">${formatNumber(result.tw2_mbh) || 'N/A'}</td>
+                    <td class="percentage-diff">${result.mbh_diff}</td>
+                    <td class="comparison-value">${formatNumber(result.excel_lat) || 'N/A'}</td>
+                    <td class="comparison-value">${formatNumber(result.tw2_lat) || 'N/A'}</td>
+                    <td class="percentage-diff">${result.lat_diff}</td>
+                    <td class="comparison-value">${formatNumber(result.tw2_wpd) || 'N/A'}</td>
+                    <td class="comparison-value">${formatNumber(result.tw2_apd) || 'N/A'}</td>
+                    <td class="hw-rows-cell">
+                        ${result.status !== 'Not Found' ?
+                            `<select class="hw-rows-select"
+                                    data-unit-tag="${result.unit_tag}"
+                                    data-original="${result.tw2_hw_rows || 1}">
+                                <option value="1" ${(result.tw2_hw_rows || 1) == 1 ? 'selected' : ''}>1</option>
+                                <option value="2" ${(result.tw2_hw_rows || 1) == 2 ? 'selected' : ''}>2</option>
+                                <option value="3" ${(result.tw2_hw_rows || 1) == 3 ? 'selected' : ''}>3</option>
+                                <option value="4" ${(result.tw2_hw_rows || 1) == 4 ? 'selected' : ''}>4</option>
+                            </select>`
+                            : 'N/A'
+                        }
+                    </td>
+                </tr>
+            `;
+        }
+
+        // Update summary badges if present
+        function updateComparisonSummary(summary) {
+            try {
+                const s = summary || {};
+                const setText = (id, text) => { const el = document.getElementById(id); if (el) el.textContent = text; };
+                if (typeof s.pass !== 'undefined') setText('summary-pass', `Pass: ${s.pass}`);
+                if (typeof s.warning !== 'undefined') setText('summary-warning', `Warn: ${s.warning}`);
+                if (typeof s.fail !== 'undefined') setText('summary-fail', `Fail: ${s.fail}`);
+                if (typeof s.not_found !== 'undefined') setText('summary-notfound', `Not Found: ${s.not_found}`);
+            } catch (e) {
+                console.warn('DISPLAY: unable to update summary badges', e);
+            }
+        }
+
+        // Patch changed rows of the comparison table in place
+        function applyComparisonDelta(changed, summary) {
+            const tbody = document.querySelector('#comparison-table tbody');
+            changed.forEach(({ index, result }) => {
+                lastComparison.results[index] = result;
+                const row = tbody ? tbody.rows[index] : null;
+                if (!row) return;
+                row.insertAdjacentHTML('afterend', comparisonRowHtml(result));
+                const newRow = row.nextElementSibling;
+                row.remove();
+                setupHWRowsEditing(newRow);
+            });
+            updateComparisonSummary(summary);
+        }
+
 // Display comparison results
         function displayComparisonResults(results, summary) {
             console.log('DISPLAY: displayComparisonResults called with:', results?.length, 'results');
@@ -987,38 +1189,8 @@
             `;
             
             let bodyHtml = '<tbody>';
-            results.forEach((result, index) => {
-                const statusClass = result.status === 'Pass' ? 'comparison-pass' : 
-                                  result.status === 'Warning' ? 'comparison-warning' : 
-                                  result.status === 'Fail' ? 'comparison-fail' : '';
-                
-                bodyHtml += `
-                    <tr class="${statusClass}">
-                        <td class="unit-tag">${result.unit_tag}</td>
-                        <td class="status-${result.status.toLowerCase()}">${result.status}</td>
-                        <td class="comparison-value">${formatNumber(result.excel_mbh) || 'N/A'}</td>
-                        <td class="comparison-value">${formatNumber(result.tw2_mbh) || 'N/A'}</td>
-                        <td class="percentage-diff">${result.mbh_diff}</td>
-                        <td class="comparison-value">${formatNumber(result.excel_lat) || 'N/A'}</td>
-                        <td class="comparison-value">${formatNumber(result.tw2_lat) || 'N/A'}</td>
-                        <td class="percentage-diff">${result.lat_diff}</td>
-                        <td class="comparison-value">${formatNumber(result.tw2_wpd) || 'N/A'}</td>
-                        <td class="comparison-value">${formatNumber(result.tw2_apd) || 'N/A'}</td>
-                        <td class="hw-rows-cell">
-                            ${result.status !== 'Not Found' ?
-                                `<select class="hw-rows-select"
-                                        data-unit-tag="${result.unit_tag}"
-                                        data-original="${result.tw2_hw_rows || 1}">
-                                    <option value="1" ${(result.tw2_hw_rows || 1) == 1 ? 'selected' : ''}>1</option>
-                                    <option value="2" ${(result.tw2_hw_rows || 1) == 2 ? 'selected' : ''}>2</option>
-                                    <option value="3" ${(result.tw2_hw_rows || 1) == 3 ? 'selected' : ''}>3</option>
-                                    <option value="4" ${(result.tw2_hw_rows || 1) == 4 ? 'selected' : ''}>4</option>
-                                </select>`
-                                : 'N/A'
-                            }
-                        </td>
-                    </tr>
-                `;
+            results.forEach((result) => {
+                bodyHtml += comparisonRowHtml(result);
             });
             bodyHtml += '</tbody>';
             
@@ -1029,16 +1201,7 @@
             // Show results section
             document.getElementById('comparison-results').style.display = 'block';
             // Update summary badges if present
-            try {
-                const s = summary || {};
-                const setText = (id, text) => { const el = document.getElementById(id); if (el) el.textContent = text; };
-                if (typeof s.pass !== 'undefined') setText('summary-pass', `Pass: ${s.pass}`);
-                if (typeof s.warning !== 'undefined') setText('summary-warning', `Warn: ${s.warning}`);
-                if (typeof s.fail !== 'undefined') setText('summary-fail', `Fail: ${s.fail}`);
-                if (typeof s.not_found !== 'undefined') setText('summary-notfound', `Not Found: ${s.not_found}`);
-            } catch (e) {
-                console.warn('DISPLAY: unable to update summary badges', e);
-            }
+            updateComparisonSummary(summary);
             
             // Show acceptable ranges and summary
             const rangeInfo = document.createElement('div');
@@ -1075,19 +1238,45 @@
             reportBtn.disabled = true;
             reportBtn.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status"></span>Creating...';
 
+            const headers = {
+                'Content-Type': 'application/json'
+            };
+            if (lastScheduleReport) {
+                headers['If-None-Match'] = lastScheduleReport.etag;
+            }
+
             fetch('/export_schedule_data', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                }
+                headers: headers,
+                body: JSON.stringify({ background: true })
             })
             .then(response => {
+                // Nothing changed since the last report: reuse the workbook we already have
+                if (response.status === 304 && lastScheduleReport) {
+                    console.log('CREATE REPORT: Unchanged, reusing previous workbook');
+                    return lastScheduleReport.blob;
+                }
                 if (!response.ok) {
                     return response.json().then(data => {
                         throw new Error(data.error || `HTTP error! status: ${response.status}`);
                     });
                 }
-                return response.blob();
+                return response.json()
+                    .then(job => followJob(job, progress => {
+                        reportBtn.innerHTML = `<span class="spinner-border spinner-border-sm me-2" role="status"></span>Creating... ${progress.percent || 0}%`;
+                    }).then(() => fetch(`/jobs/${job.job_id}/download`)))
+                    .then(download => {
+                        if (!download.ok) {
+                            return download.json().then(data => {
+                                throw new Error(data.error || `HTTP error! status: ${download.status}`);
+                            });
+                        }
+                        const etag = download.headers.get('ETag');
+                        return download.blob().then(blob => {
+                            lastScheduleReport = etag ? { etag: etag, blob: blob } : null;
+                            return blob;
+                        });
+                    });
             })
             .then(blob => {
                 // Create a temporary URL for the blob
@@ -1142,7 +1331,10 @@
                 wpd_threshold: parseFloat(document.getElementById('wpd-threshold').value) || 5,
                 apd_threshold: parseFloat(document.getElementById('apd-threshold').value) || 0.25,
                 // Pass through the original path (if user provided it)
-                original_path: sanitizeLocalPath((document.getElementById('original-tw2-path').value || ''))
+                original_path: sanitizeLocalPath((document.getElementById('original-tw2-path').value || '')),
+                // Ask for only the changed rows when a comparison table is already shown
+                incremental: !!lastComparison,
+                base_version: lastComparison ? lastComparison.version : null
             };
             
             console.log('REFRESH: Configuration:', config);
@@ -1173,7 +1365,14 @@
                         console.log('REFRESH: About to call displayComparisonResults with data:', payload.results);
                         console.log('REFRESH: Summary data:', payload.summary);
                         try {
-                            displayComparisonResults(payload.results, payload.summary);
+                            if (payload.delta && lastComparison) {
+                                console.log(`REFRESH: Patching ${payload.delta.changed.length} changed rows`);
+                                applyComparisonDelta(payload.delta.changed, payload.summary);
+                                lastComparison.version = payload.comparison_version;
+                            } else {
+                                displayComparisonResults(payload.results, payload.summary);
+                                lastComparison = { version: payload.comparison_version, results: payload.results };
+                            }
                             console.log('REFRESH: ✅ displayComparisonResults completed successfully');
                         } catch (error) {
                             console.error('REFRESH: ❌ Error in displayComparisonResults:', error);
@@ -0,0 +1,72 @@
+import os
+import re
+import sqlite3
+import sys
+import types
+
+import pytest
+
+# app.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pyodbc  # noqa: F401
+except ImportError:
+    # No ODBC driver manager here; app only needs the module to import, and the
+    # tests that touch a database patch pyodbc.connect (see tw2_db)
+    pyodbc = types.ModuleType('pyodbc')
+
+    class Error(Exception):
+        pass
+
+    def connect(*args, **kwargs):
+        raise Error('pyodbc is stubbed in the test suite')
+
+    pyodbc.Error = Error
+    pyodbc.connect = connect
+    pyodbc.drivers = lambda: []
+    sys.modules['pyodbc'] = pyodbc
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    """Keep sessions created by test requests out of the repository's sessions/"""
+    from cachelib import FileSystemCache
+
+    import app
+
+    monkeypatch.setattr(app.app.session_interface, 'cache', FileSystemCache(str(tmp_path / 'sessions')))
+
+
+TW2_TEST_COLUMNS = ('Tag', 'UnitSize', 'InletSize', 'CFMDesign', 'CFMMinPrime', 'HWCFM', 'HWGPM', 'HWRowsCalc')
+
+
+@pytest.fixture
+def tw2_db(tmp_path, monkeypatch):
+    """A small tblSchedule in a SQLite file standing in for a TW2 database.
+
+    pyodbc.connect opens the DBQ= path with sqlite3 (which also accepts the
+    [bracketed] names the app uses), and the app gets a fresh connection pool.
+    Returns the file path.
+    """
+    import app
+
+    path = tmp_path / 'project.tw2'
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE tblSchedule ({', '.join(f'[{name}]' for name in TW2_TEST_COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO tblSchedule VALUES ({', '.join('?' * len(TW2_TEST_COLUMNS))})",
+        [('V-1-01', '08', '08', 400, 120, 200, 1.5, 1),
+         ('V-1-02', '10', '10', 650, 200, 300, 2.0, 2),
+         ('V-1-03', '12', '12', 900, 300, 450, 2.5, 1)])
+    conn.commit()
+    conn.close()
+
+    def connect(conn_str, *args, **kwargs):
+        return sqlite3.connect(re.search(r'DBQ=([^;]+);', conn_str).group(1), check_same_thread=False)
+
+    pool = app.MdbConnectionPool()
+    monkeypatch.setattr(app.pyodbc, 'connect', connect)
+    monkeypatch.setattr(app, '_mdb_pool', pool)
+    yield str(path)
+    pool.close_all()
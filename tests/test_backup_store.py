@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import app
+
+CHUNK = 1024
+
+
+def write(path, *blocks):
+    with open(path, 'wb') as f:
+        for block in blocks:
+            f.write(block * CHUNK)
+    # Step the mtime forward so every rewrite looks changed to the store
+    stamp = os.stat(path).st_mtime_ns + 10**9 * (write.calls + 1)
+    write.calls += 1
+    os.utime(path, ns=(stamp, stamp))
+
+
+write.calls = 0
+
+
+def chunk_files(store):
+    chunk_dir = os.path.join(store.directory, 'chunks')
+    return {name for prefix in os.listdir(chunk_dir) for name in os.listdir(os.path.join(chunk_dir, prefix))}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return app.BackupStore(str(tmp_path / 'backups'), chunk_size=CHUNK, keep_last=2, keep_daily=0)
+
+
+def test_snapshot_dedups_chunks_and_restores(store, tmp_path):
+    path = str(tmp_path / 'project.tw2')
+    write(path, b'a', b'b', b'a')
+    first = store.snapshot(path, 'first')
+    original = open(path, 'rb').read()
+
+    assert first['new'] and len(first['chunks']) == 3
+    assert store.snapshot(path)['new'] is False
+    assert store.stats()['chunks'] == 2
+
+    write(path, b'a', b'c', b'a')
+    second = store.snapshot(path, 'second')
+    assert second['new'] and store.stats()['chunks'] == 3
+
+    store.restore(first['id'])
+    assert open(path, 'rb').read() == original
+
+
+def test_restore_rejects_a_corrupt_chunk(store, tmp_path):
+    path = str(tmp_path / 'project.tw2')
+    write(path, b'a')
+    manifest = store.snapshot(path)
+    with open(store._chunk_path(manifest['chunks'][0]), 'wb') as f:
+        f.write(app.zlib.compress(b'x' * CHUNK))
+
+    with pytest.raises(ValueError, match='corrupt'):
+        store.restore(manifest['id'], str(tmp_path / 'restored.tw2'))
+    assert not os.path.exists(tmp_path / 'restored.tw2')
+
+
+def test_retention_drops_expired_snapshots_and_their_chunks(store, tmp_path):
+    path = str(tmp_path / 'project.tw2')
+    ids = []
+    for block in (b'a', b'b', b'c'):
+        write(path, b'z', block)
+        ids.append(store.snapshot(path)['id'])
+
+    assert [m['id'] for m in store.list()] == ids[:0:-1]
+    assert chunk_files(store) == {app.hashlib.blake2b(b * CHUNK, digest_size=16).hexdigest()
+                                  for b in (b'z', b'b', b'c')}
+    stats = store.stats()
+    assert stats['snapshots'] == 2 and stats['chunks'] == 3
+    assert stats['stored_bytes'] == sum(os.path.getsize(store._chunk_path(c)) for c in chunk_files(store))
+
+
+def test_index_is_rebuilt_from_disk_and_orphans_removed(store, tmp_path):
+    path = str(tmp_path / 'project.tw2')
+    write(path, b'a', b'b')
+    store.snapshot(path)
+    orphan = '0' * 32
+    os.makedirs(os.path.dirname(store._chunk_path(orphan)), exist_ok=True)
+    open(store._chunk_path(orphan), 'wb').close()
+
+    reopened = app.BackupStore(store.directory, chunk_size=CHUNK, keep_last=2, keep_daily=0)
+    assert reopened.stats() == store.stats()
+    assert orphan not in chunk_files(store)
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+import app
+
+MAPPINGS = {'Tag': 'Unit_No', 'UnitSize': 'Unit_Size', 'CFMDesign': 'CFM_Max', 'HWGPM': 'GPM'}
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, '_change_journal', app.ChangeJournal(str(tmp_path / 'journal')))
+    monkeypatch.setattr(app, '_backup_store', app.BackupStore(str(tmp_path / 'backups')))
+    return app._change_journal
+
+
+def query(path, sql, *params):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def test_record_appends_batches_and_skips_torn_lines(stores, tmp_path):
+    path = str(tmp_path / 'project.tw2')
+    first = stores.record(path, 'apply_mapping', [('V-1-01', 'CFMCost', app.decimal.Decimal('12.10'), 13)])
+    with open(stores._path(path), 'a', encoding='utf-8') as f:
+        f.write('{"batch": "torn')
+
+    assert stores.record(path, 'apply_mapping', []) is None
+    batches = stores.batches(path)
+    assert [batch['batch'] for batch in batches] == [first['batch']]
+    # Currency values keep their exact digits
+    assert batches[0]['cells'] == [['V-1-01', 'CFMCost', '12.10', 13]]
+
+
+def test_journal_holds_raw_values_for_groups_that_succeeded(tw2_db, stores):
+    query(tw2_db, "UPDATE tblSchedule SET [UnitSize] = 'Ø08' WHERE [Tag] = 'V-1-01'")
+    query(tw2_db, "CREATE TRIGGER gpm_check BEFORE UPDATE OF [HWGPM] ON tblSchedule "
+                  "WHEN NEW.[HWGPM] < 0 BEGIN SELECT RAISE(ABORT, 'negative GPM'); END")
+    excel = [{'Unit_No': 'V-1-1', 'Unit_Size': '10', 'CFM_Max': 400, 'GPM': 1.5},
+             {'Unit_No': 'V-1-2', 'Unit_Size': '10', 'CFM_Max': 700, 'GPM': -1}]
+
+    result = app.write_mapping(tw2_db, excel, MAPPINGS)
+
+    assert result['errors'] and 'V-1-2' in result['errors'][0]
+    cells = stores.batches(tw2_db)[0]['cells']
+    # The stored text is journaled as read, not as the viewer shows it ('08'), and
+    # V-1-02's failed HWGPM write is left out while its CFMDesign write is kept
+    assert cells == [['V-1-01', 'UnitSize', 'Ø08', '10'], ['V-1-02', 'CFMDesign', 650, 700]]
+
+
+def test_undo_reports_conflicts_then_forces(tw2_db, stores):
+    excel = [{'Unit_No': 'V-1-1', 'CFM_Max': 450}, {'Unit_No': 'V-1-2', 'CFM_Max': 700}]
+    batch_id = app.write_mapping(tw2_db, excel, MAPPINGS)['journal_batch']
+    query(tw2_db, "UPDATE tblSchedule SET [CFMDesign] = 999 WHERE [Tag] = 'V-1-02'")
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['tw2_file'] = tw2_db
+
+    response = client.post('/undo_changes', json={'batch_id': batch_id})
+    assert response.status_code == 409
+    assert response.get_json()['conflicts'] == [
+        {'tag': 'V-1-02', 'column': 'CFMDesign', 'expected': 700, 'current': 999}]
+    assert query(tw2_db, 'SELECT [CFMDesign] FROM tblSchedule ORDER BY [Tag]')[:2] == [(450,), (999,)]
+
+    result = client.post('/undo_changes', json={'batch_id': batch_id, 'force': True}).get_json()
+    assert result['success'] and result['reverted_tags'] == ['V-1-01', 'V-1-02']
+    assert query(tw2_db, 'SELECT [CFMDesign] FROM tblSchedule ORDER BY [Tag]')[:2] == [(400,), (650,)]
+    # The undo batch records what the cells actually held before it ran
+    undo = stores.batches(tw2_db)[-1]
+    assert undo['undoes'] == batch_id
+    assert undo['cells'] == [['V-1-01', 'CFMDesign', 450, 400], ['V-1-02', 'CFMDesign', 999, 650]]
+
+    assert client.post('/undo_changes', json={'batch_id': batch_id}).status_code == 409
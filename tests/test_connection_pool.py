@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+import app
+
+
+class FakeConnection:
+    def __init__(self, fail_cursor=False):
+        self.fail_cursor = fail_cursor
+        self.closed = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        if self.fail_cursor:
+            raise RuntimeError('cursor failed')
+        return None
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    opened = []
+
+    def connect(conn_str, *args, **kwargs):
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(app.pyodbc, 'connect', connect)
+    path = tmp_path / 'project.tw2'
+    path.write_bytes(b'jet')
+    pool = app.MdbConnectionPool(max_per_file=2, idle_timeout=60, acquire_timeout=0.2)
+    yield pool, str(path), opened
+    pool.close_all()
+
+
+def test_released_connection_is_reused(pool):
+    pool, path, opened = pool
+    first = pool.acquire(path)
+    first.close()
+    second = pool.acquire(path)
+
+    assert len(opened) == 1
+    assert opened[0].rollbacks == 1   # uncommitted work is rolled back on release
+    assert pool.stats()['reused'] == 1
+    second.close()
+    assert pool.stats()['in_use'] == {}
+
+
+def test_acquire_times_out_when_every_slot_is_in_use(pool):
+    pool, path, opened = pool
+    held = [pool.acquire(path), pool.acquire(path)]
+
+    with pytest.raises(Exception, match='Timed out'):
+        pool.acquire(path)
+    held[0].close()
+    pool.acquire(path).close()
+    held[1].close()
+
+
+def test_invalidate_closes_idle_and_drops_checked_out_connections(pool):
+    pool, path, opened = pool
+    checked_out = pool.acquire(path)
+    idle = pool.acquire(path)
+    idle.close()
+
+    pool.invalidate(path)
+    assert opened[1].closed
+    checked_out.close()
+    assert opened[0].closed
+    assert pool.stats()['idle'] == {}
+
+
+def test_replaced_file_is_not_served_an_old_connection(pool):
+    pool, path, opened = pool
+    pool.acquire(path).close()
+    with open(path, 'wb') as f:
+        f.write(b'a different jet file')
+
+    pool.acquire(path).close()
+    assert opened[0].closed
+    assert len(opened) == 2
+
+
+def test_idle_connections_are_closed_by_the_reaper(pool):
+    pool, path, opened = pool
+    pool.idle_timeout = 0.05
+    pool.acquire(path).close()
+
+    deadline = time.monotonic() + 2
+    while not opened[0].closed and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert opened[0].closed
+    assert pool.stats()['idle'] == {}
+
+
+def test_failed_read_returns_its_connection(pool, monkeypatch):
+    pool, path, opened = pool
+    monkeypatch.setattr(app, '_mdb_pool', pool)
+    monkeypatch.setattr(app.pyodbc, 'connect', lambda *args, **kwargs: FakeConnection(fail_cursor=True))
+
+    for _ in range(3):
+        assert not app.read_tw2_data_safe(path)['success']
+    assert pool.stats()['in_use'] == {}
+
+
+def test_tw2_read_through_the_pool(tw2_db):
+    result = app.read_tw2_data_safe(tw2_db)
+
+    assert result['success']
+    assert [row['Tag'] for row in result['data']] == ['V-1-01', 'V-1-02', 'V-1-03']
+    assert app._mdb_pool.stats()['idle']
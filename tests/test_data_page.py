@@ -0,0 +1,74 @@
+import pytest
+
+# app imports pyodbc, which needs the ODBC driver manager
+pytest.importorskip('pyodbc', exc_type=ImportError)
+import app  # noqa: E402
+
+TW2_COLUMNS = ['Tag', 'HWMBHCalc', 'HWLATCalc']
+
+
+def _compare(excel_rows, tw2_rows):
+    state_key = app.comparison_state_key()
+    result = app.compare_performance_incremental(state_key, excel_rows, tw2_rows, excel_id='excel', tw2_id='tw2')
+    assert result['success']
+    return result
+
+
+def test_status_filter_matches_zero_padded_tags():
+    # V-1-1 in the schedule is V-1-01 in the TW2 file
+    excel_rows = [{'Unit_No': 'V-1-1', 'Total_MBH': 20, 'LAT': 95},
+                  {'Unit_No': 'V-1-02', 'Total_MBH': 20, 'LAT': 95}]
+    tw2_rows = [{'Tag': 'V-1-01', 'HWMBHCalc': 5, 'HWLATCalc': 60},
+                {'Tag': 'V-1-02', 'HWMBHCalc': 20, 'HWLATCalc': 95}]
+
+    with app.app.test_request_context():
+        result = _compare(excel_rows, tw2_rows)
+        statuses = {unit['unit_tag']: unit['status'] for unit in result['results']}
+        assert statuses['V-1-1 \u001a V-1-01'] == 'Fail'
+        assert statuses['V-1-02'] == 'Pass'
+
+        status_by_tag = app.session_comparison_statuses()
+        failed = app.data_page(tw2_rows, TW2_COLUMNS, {'status': 'fail'}, 'Tag', status_by_tag)
+        assert [row['Tag'] for row in failed['data']] == ['V-1-01']
+        failed_excel = app.data_page(excel_rows, ['Unit_No'], {'status': 'fail'}, 'Unit_No', status_by_tag)
+        assert [row['Unit_No'] for row in failed_excel['data']] == ['V-1-1']
+        passed = app.data_page(tw2_rows, TW2_COLUMNS, {'status': 'pass'}, 'Tag', status_by_tag)
+        assert [row['Tag'] for row in passed['data']] == ['V-1-02']
+
+
+def test_data_page_slices_projects_and_sorts():
+    rows = [{'Tag': f'V-1-{n:02d}', 'HWMBHCalc': n, 'HWLATCalc': None} for n in range(1, 11)]
+
+    page = app.data_page(rows, TW2_COLUMNS, {'offset': '2', 'limit': '3', 'columns': 'Tag,Bogus', 'sort': '-HWMBHCalc'})
+    assert page['columns'] == ['Tag']
+    assert [row['Tag'] for row in page['data']] == ['V-1-08', 'V-1-07', 'V-1-06']
+    assert (page['total'], page['has_more']) == (10, True)
+    assert app.data_page(rows, TW2_COLUMNS, {'limit': '100000'})['limit'] == app.DATA_PAGE_MAX_LIMIT
+
+
+def test_projected_table_is_read_in_full_once_per_file_version(tw2_db, tmp_path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.setattr(app, '_dataset_store', app.DatasetStore(str(tmp_path / 'datasets')))
+    reads = []
+    read_tw2_data_cached = app.read_tw2_data_cached
+    monkeypatch.setattr(app, 'read_tw2_data_cached', lambda *args, **kwargs: reads.append(args) or read_tw2_data_cached(*args, **kwargs))
+    projected = app.read_tw2_data_safe(tw2_db, columns=['Tag', 'CFMDesign'])
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['updated_tw2_dataset'] = app._dataset_store.put(projected['data'], projected['columns'])
+        sess['updated_tw2_columns'] = projected['columns']
+        sess['updated_tw2_projection'] = ['Tag', 'CFMDesign']
+        sess['tw2_last_path'] = tw2_db
+
+    pages = [client.get(f'/data/updated_tw2?offset={offset}&limit=2').get_json() for offset in (0, 2)]
+    assert len(reads) == 1
+    assert 'HWGPM' in pages[0]['all_columns']
+    assert [row['Tag'] for page in pages for row in page['data']] == ['V-1-01', 'V-1-02', 'V-1-03']
+
+    conn = sqlite3.connect(tw2_db)
+    conn.execute("UPDATE tblSchedule SET [HWGPM] = 9.5 WHERE [Tag] = 'V-1-01'")
+    conn.commit()
+    conn.close()
+    page = client.get('/data/updated_tw2?limit=1').get_json()
+    assert len(reads) == 2 and page['data'][0]['HWGPM'] == 9.5
@@ -0,0 +1,64 @@
+import io
+import pickle
+
+import pytest
+
+import app
+
+COLUMNS = ['Unit_No', 'CFM_Max']
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = app.DatasetStore(str(tmp_path / 'datasets'))
+    monkeypatch.setattr(app, '_dataset_store', store)
+    return store
+
+
+def make_rows(count):
+    return [{'Unit_No': f'V-{n // 99 + 1}-{n % 99 + 1}', 'CFM_Max': 400 + n} for n in range(count)]
+
+
+def test_put_stream_matches_put(store, tmp_path):
+    rows = make_rows(2500)
+    streamed = store.put_stream(iter(rows), COLUMNS)
+    other = app.DatasetStore(str(tmp_path / 'other'))
+
+    assert other.put(rows, COLUMNS) == streamed
+    assert streamed['row_count'] == 2500
+    assert app.DatasetStore(store.directory).get(streamed['id']) == rows
+
+
+def test_single_pickle_datasets_still_load(store):
+    rows = make_rows(3)
+    with open(store._path('legacy'), 'wb') as f:
+        pickle.dump((COLUMNS, rows), f)
+
+    assert store.get('legacy') == rows
+
+
+def test_streaming_upload_stores_the_table_without_returning_it(store, tmp_path, monkeypatch):
+    from openpyxl import Workbook
+
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['VAV SCHEDULE'])
+    ws.append(['UNIT NO.', 'UNIT SIZE', 'CFM', None])
+    ws.append([None, None, 'MAX', 'MIN'])
+    for n in range(1, 651):
+        ws.append([f'V-1-{n}', 8, 400 + n, 100])
+    workbook = io.BytesIO()
+    wb.save(workbook)
+    workbook.seek(0)
+
+    client = app.app.test_client()
+    upload = client.post('/upload_excel', data={'file': (workbook, 'schedule.xlsx'), 'streaming': 'true',
+                                                'data_start_row': '4'}).get_json()
+    assert upload['success'] and upload['streamed']
+    assert 'dataset' not in upload
+    assert (len(upload['data']), upload['total'], upload['row_count'], upload['has_more']) == (100, 650, 650, True)
+
+    last = client.get('/data/excel?offset=600').get_json()
+    assert [row['Unit_No'] for row in last['data']][-1] == 'V-1-650'
+    assert (last['total'], len(last['data'])) == (650, 50)
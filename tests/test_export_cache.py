@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(tw2_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, '_export_cache', app.ExportCache(str(tmp_path / 'exports')))
+    monkeypatch.setattr(app, '_dataset_store', app.DatasetStore(str(tmp_path / 'datasets')))
+    result = app.read_tw2_data_safe(tw2_db)
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['tw2_file'] = tw2_db
+        sess['tw2_dataset'] = app._dataset_store.put(result['data'], result['columns'])
+    return client
+
+
+def test_repeat_export_is_served_from_the_cache(client):
+    first = client.post('/export_schedule_data')
+    second = client.post('/export_schedule_data')
+
+    assert first.status_code == second.status_code == 200
+    assert (first.headers['X-Export-Cache'], second.headers['X-Export-Cache']) == ('miss', 'hit')
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.data == second.data
+    assert app._export_cache.stats()['entries'] == 1
+
+
+def test_if_none_match_gets_304_until_the_data_changes(client, tw2_db):
+    etag = client.post('/export_schedule_data').headers['ETag']
+
+    cached = client.post('/export_schedule_data', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    conn = sqlite3.connect(tw2_db)
+    conn.execute("UPDATE tblSchedule SET [CFMDesign] = 999 WHERE [Tag] = 'V-1-01'")
+    conn.commit()
+    conn.close()
+
+    changed = client.post('/export_schedule_data', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['X-Export-Cache'] == 'miss'
+    assert changed.headers['ETag'] != etag
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def queue():
+    queue = app.JobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def wait_for(queue, job, states, timeout=5):
+    snapshot = job.snapshot()
+    while snapshot['state'] not in states:
+        snapshot = queue.wait(job, snapshot['version'], timeout)
+    return snapshot
+
+
+def test_job_reports_progress_and_result(queue):
+    def work(job):
+        for done in range(1, 4):
+            job.progress(done, 3, 'rows')
+        return {'rows': 3}
+
+    job = queue.submit('export_schedule_data', 'owner', work)
+    snapshot = wait_for(queue, job, ('done', 'failed'))
+
+    assert snapshot['state'] == 'done' and snapshot['result'] == {'rows': 3}
+    assert (snapshot['done'], snapshot['total'], snapshot['percent']) == (3, 3, 100.0)
+    assert queue.get(job.id, 'someone else') is None
+    assert [entry['id'] for entry in queue.list('owner')] == [job.id]
+
+
+def test_cancel_stops_a_running_job_at_its_next_progress_report(queue):
+    started = threading.Event()
+    release = threading.Event()
+    reached = []
+
+    def work(job):
+        job.progress(1, 10)
+        started.set()
+        release.wait(5)
+        reached.append(2)
+        job.progress(2, 10)
+        reached.append(3)
+
+    job = queue.submit('apply_mapping', 'owner', work)
+    assert started.wait(5)
+    assert queue.cancel(job)['cancel_requested']
+    release.set()
+
+    assert wait_for(queue, job, ('done', 'failed', 'cancelled'))['state'] == 'cancelled'
+    assert reached == [2]
+
+
+def test_cancel_before_start_never_runs_the_job(queue):
+    release = threading.Event()
+    ran = []
+    blocker = queue.submit('apply_mapping', 'owner', lambda job: release.wait(5))
+    queued = queue.submit('save_hw_rows', 'owner', lambda job: ran.append(job.id))
+
+    assert queue.cancel(queued)['state'] == 'cancelled'
+    release.set()
+    wait_for(queue, blocker, ('done',))
+    assert ran == []
+
+
+def test_cancelled_export_is_not_logged_as_an_error(queue, caplog):
+    tw2_data = [{'Tag': f'V-1-{n:02d}', 'UnitSize': '08'} for n in range(1, 4)]
+
+    def work(job):
+        job.cancel_requested = True
+        return app.generate_schedule_data_excel(tw2_data, 'Project', progress=job.progress)
+
+    job = queue.submit('export_schedule_data', 'owner', work)
+
+    assert wait_for(queue, job, ('done', 'failed', 'cancelled'))['state'] == 'cancelled'
+    assert not [record for record in caplog.records if record.levelname == 'ERROR']
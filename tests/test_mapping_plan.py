@@ -0,0 +1,118 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import app
+
+MAPPINGS = {'Tag': 'Unit_No', 'UnitSize': 'Unit_Size', 'InletSize': 'Unit_Size',
+            'CFMDesign': 'CFM_Max', 'HWGPM': 'GPM'}
+RESOLVED = {'UnitSize': 'UnitSize', 'InletSize': 'InletSize', 'CFMDesign': 'CFMDesign', 'HWGPM': 'HWGPM'}
+
+
+def current_values():
+    return app.index_tw2_values([
+        {'Tag': 'V-1-01', 'UnitSize': '08', 'InletSize': '08', 'CFMDesign': 400.0, 'HWGPM': 1.5},
+        {'Tag': 'V-1-02', 'UnitSize': '10', 'InletSize': '10', 'CFMDesign': 650.0, 'HWGPM': 2.0},
+    ], list(RESOLVED.values()))
+
+
+@pytest.mark.parametrize('current, new, expected', [
+    (None, None, True),
+    (None, 0, False),
+    ('08', '08', True),
+    ('40', 40.0, True),
+    ('08', '8', False),
+    (400, 400.0, True),
+    (float(np.float32(1.9)), 1.9, True),
+    (1.9, 1.95, False),
+    (400, 'n/a', False),
+])
+def test_tw2_values_equal(current, new, expected):
+    assert app.tw2_values_equal(current, new) is expected
+
+
+def test_plan_groups_rows_by_batch_and_column_list():
+    excel = [{'Unit_No': 'V-1-1', 'Unit_Size': '8', 'CFM_Max': 450, 'GPM': 1.5},
+             {'Unit_No': 'V-1-2', 'Unit_Size': '12', 'CFM_Max': 650, 'GPM': 2.0}]
+
+    plan = app.plan_mapping_writes(excel, MAPPINGS, RESOLVED)
+
+    # Without current values every mapped cell is planned, tag last in params
+    assert list(plan['groups']) == [('Batch 1', ('UnitSize', 'InletSize', 'CFMDesign')), ('Batch 4', ('HWGPM',))]
+    assert plan['groups'][('Batch 1', ('UnitSize', 'InletSize', 'CFMDesign'))][0] == (0, ['08', '08', 450, 'V-1-01'])
+    assert plan['row_labels'] == {0: 'V-1-1', 1: 'V-1-2'}
+
+
+def test_plan_skips_unchanged_cells_and_reports_missing_tags():
+    excel = [{'Unit_No': 'V-1-1', 'Unit_Size': '8', 'CFM_Max': 450, 'GPM': 1.5},
+             {'Unit_No': 'V-1-2', 'Unit_Size': '10', 'CFM_Max': 650, 'GPM': 2},
+             {'Unit_No': 'V-9-9', 'Unit_Size': '10', 'CFM_Max': 100, 'GPM': 1}]
+
+    plan = app.plan_mapping_writes(excel, MAPPINGS, RESOLVED, current_values())
+
+    assert plan['groups'] == {('Batch 1', ('CFMDesign',)): [(0, [450, 'V-1-01'])]}
+    assert plan['changes'] == [{'tag': 'V-1-01', 'column': 'CFMDesign', 'old': 400.0, 'new': 450}]
+    assert plan['changed_tags'] == ['V-1-01']
+    assert plan['unchanged_tags'] == ['V-1-02']
+    assert plan['missing_tags'] == ['V-9-09']
+    assert plan['unchanged_cells'] == 7
+
+
+def test_later_rows_for_a_tag_diff_against_earlier_writes():
+    excel = [{'Unit_No': 'V-1-1', 'CFM_Max': 450},
+             {'Unit_No': 'V-1-01', 'CFM_Max': 450}]
+
+    plan = app.plan_mapping_writes(excel, {'Tag': 'Unit_No', 'CFMDesign': 'CFM_Max'},
+                                   {'CFMDesign': 'CFMDesign'}, current_values())
+
+    assert [index for index, _ in plan['groups'][('Batch 1', ('CFMDesign',))]] == [0]
+
+
+def test_size_40_unit_takes_a_24x16_inlet():
+    plan = app.plan_mapping_writes([{'Unit_No': 'V-1-1', 'Unit_Size': '40'}],
+                                   {'Tag': 'Unit_No', 'UnitSize': 'Unit_Size', 'InletSize': 'Unit_Size'},
+                                   {'UnitSize': 'UnitSize', 'InletSize': 'InletSize'})
+
+    assert plan['changes'][1] == {'tag': 'V-1-01', 'column': 'InletSize', 'old': None, 'new': '24x16'}
+
+
+def test_execute_write_plan_retries_a_failed_group_row_by_row():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE tblSchedule ([Tag] TEXT, [CFMDesign] INTEGER CHECK ([CFMDesign] > 0))')
+    conn.executemany('INSERT INTO tblSchedule VALUES (?, ?)', [('V-1-01', 1), ('V-1-02', 1), ('V-1-03', 1)])
+    groups = {('Batch 1', ('CFMDesign',)): [(0, [450, 'V-1-01']), (1, [-1, 'V-1-02']), (2, [900, 'V-1-03'])]}
+
+    written, errors, statements, retried, written_groups = app.execute_write_plan(
+        conn.cursor(), groups, {0: 'V-1-1', 1: 'V-1-2', 2: 'V-1-3'})
+
+    assert written == {0, 2} and written_groups == {('Batch 1', ('CFMDesign',)): {0, 2}}
+    assert retried == 3 and statements == 2
+    assert len(errors) == 1 and errors[0].startswith('Batch 1 error for V-1-2')
+    assert conn.execute('SELECT [CFMDesign] FROM tblSchedule ORDER BY [Tag]').fetchall() == [(450,), (1,), (900,)]
+
+
+def test_background_apply_rechecks_the_preview_when_the_job_runs(tw2_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, '_dataset_store', app.DatasetStore(str(tmp_path / 'datasets')))
+    submitted = []
+    monkeypatch.setattr(app._jobs, 'submit', lambda kind, owner, func: submitted.append(func) or app.Job(app._jobs, kind, owner))
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['tw2_file'] = tw2_db
+        sess['excel_dataset'] = app._dataset_store.put([{'Unit_No': 'V-1-1', 'CFM_Max': 450}], ['Unit_No', 'CFM_Max'])
+    mappings = {'Tag': 'Unit_No', 'CFMDesign': 'CFM_Max'}
+
+    token = client.post('/apply_mapping', json={'mappings': mappings, 'dry_run': True}).get_json()['preview_token']
+    assert client.post('/apply_mapping', json={'mappings': mappings, 'preview_token': token,
+                                               'background': True}).status_code == 202
+    # Someone else writes the file while the job waits its turn
+    conn = sqlite3.connect(tw2_db)
+    conn.execute("UPDATE tblSchedule SET [CFMDesign] = 999, [UnitSize] = 'changed' WHERE [Tag] = 'V-1-01'")
+    conn.commit()
+    conn.close()
+
+    result = submitted[0](app.Job(app._jobs, 'apply_mapping', 'owner'))
+    assert result == {'success': False, 'error': app.MAPPING_PREVIEW_STALE_ERROR, 'status': 409}
+    conn = sqlite3.connect(tw2_db)
+    assert conn.execute("SELECT [CFMDesign] FROM tblSchedule WHERE [Tag] = 'V-1-01'").fetchone() == (999,)
+    conn.close()
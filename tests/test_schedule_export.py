@@ -0,0 +1,65 @@
+from copy import copy
+
+import pytest
+from openpyxl import load_workbook
+
+# app imports pyodbc, which needs the ODBC driver manager
+pytest.importorskip('pyodbc', exc_type=ImportError)
+import app  # noqa: E402
+
+
+def _record(tag, unit_size='8'):
+    return {'Tag': tag, 'UnitSize': unit_size, 'CFMDesign': 400, 'CFMMinPrime': 120,
+            'HWMBHCalc': 12.4, 'HWRowsCalc': 1, 'ControlHand': 'R'}
+
+
+def _sheet(output):
+    ws = load_workbook(output).active
+    values = [[cell.value for cell in row] for row in ws.iter_rows()]
+    return values, sorted(str(merged_range) for merged_range in ws.merged_cells.ranges)
+
+
+def test_template_clones_are_separate_workbooks():
+    template = app.ScheduleTemplate()
+    wb1, ws1, row_formats = template.clone()
+    wb2, ws2, _ = template.clone()
+
+    assert wb1 is not wb2
+    ws1['A2'] = 'Changed'
+    app.write_schedule_rows(ws1, [_record('V-1-01'), _record('V-1-02')], row_formats=row_formats)
+    assert ws2['A2'].value != 'Changed'
+    assert ws2.max_row < ws1.max_row
+
+
+def test_exports_from_one_template_are_independent(monkeypatch):
+    monkeypatch.setattr(app, '_schedule_template', app.ScheduleTemplate())
+    first_records = [_record('V-1-01'), _record('V-1-02'), _record('V-1-03', '10')]
+    second_records = [_record('V-2-01')]
+
+    alone = _sheet(app.generate_schedule_data_excel(second_records, 'Second'))
+    first = _sheet(app.generate_schedule_data_excel(first_records, 'First'))
+    second = _sheet(app.generate_schedule_data_excel(second_records, 'Second'))
+
+    # The larger export in between leaves no rows, values or merges behind
+    assert second == alone
+    assert first[0][1][0] == 'First'
+    assert [row[0] for row in first[0][4:7]] == ['V-1-01', 'V-1-02', 'V-1-03']
+    assert second[0][1][0] == 'Second'
+    assert second[0][4][0] == 'V-2-01'
+    assert 'A7:B7' in first[1] and 'A7:B7' not in second[1]
+
+
+def test_precomputed_row_formats_match_the_sheet():
+    template = app.ScheduleTemplate()
+    records = [_record('V-1-01'), _record('V-1-02'), _record('V-1-03', '10')]
+    _, planned, row_formats = template.clone()
+    _, read, _ = template.clone()
+
+    app.write_schedule_rows(planned, records, row_formats=row_formats)
+    app.write_schedule_rows(read, records)
+
+    # Row formats worked out once per template version lay rows out as reading them from each sheet does
+    assert row_formats == app.schedule_row_formats(read)
+    for planned_row, read_row in zip(planned.iter_rows(min_row=6, max_row=7), read.iter_rows(min_row=6, max_row=7)):
+        assert [(cell.value, cell.style, copy(cell.border)) for cell in planned_row] == \
+            [(cell.value, cell.style, copy(cell.border)) for cell in read_row]